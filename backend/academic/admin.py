@@ -9,5 +9,5 @@ class TurmaAdmin(admin.ModelAdmin):
 @admin.register(Matricula)
 class MatriculaAdmin(admin.ModelAdmin):
     list_display = ('aluno', 'turma', 'status', 'data_matricula')
-    list_filter = ('status', 'turma__ano_letivo')
+    list_filter = ('status', 'ano_letivo')
     search_fields = ('aluno__pessoa__nome',)
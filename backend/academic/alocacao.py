@@ -0,0 +1,166 @@
+"""
+Alocação da fila de espera em turmas com vagas.
+
+Tudo é carregado de uma vez (pedidos, turmas com ocupação, matrículas já
+existentes dos alunos da fila) e a distribuição é feita em memória:
+
+- os pedidos saem de um heap por prioridade: pessoa com deficiência
+  primeiro, depois data de solicitação e ordem de chegada;
+- cada escola tem um heap de turmas ordenado por vagas livres, então o
+  pedido vai para a turma mais vazia e as turmas enchem por igual.
+
+No fim, um bulk_create das matrículas e um UPDATE da fila.
+"""
+import heapq
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from pedagogical import zoneamento
+from .models import FilaEspera, Matricula, Turma
+from .signals import matriculas_criadas
+
+
+@dataclass(order=True)
+class Pedido:
+    prioridade: tuple
+    fila_id: int = field(compare=False)
+    aluno_id: int = field(compare=False)
+    escola_id: int | None = field(compare=False)
+
+
+@dataclass
+class Alocacao:
+    fila_id: int
+    aluno_id: int
+    escola_id: int | None
+    turma_id: int | None = None
+    motivo: str | None = None # preenchido quando o pedido continua aguardando
+
+
+@dataclass
+class ResultadoAlocacao:
+    itens: list
+    segundos: float
+    dry_run: bool
+
+    @property
+    def alocados(self):
+        return sum(1 for i in self.itens if i.turma_id)
+
+    @property
+    def pendentes(self):
+        return len(self.itens) - self.alocados
+
+
+def _carregar_pedidos(travar):
+    fila = FilaEspera.objects.filter(status=FilaEspera.Status.AGUARDANDO)
+    if travar:
+        # Duas alocações simultâneas não podem pegar os mesmos pedidos
+        fila = fila.select_for_update(of=('self',))
+    pedidos = []
+    for fila_id, aluno_id, escola_id, data, deficiencia, endereco in fila.values_list(
+        'id', 'aluno_id', 'escola_pretendida_id', 'data_solicitacao',
+        'aluno__pessoa__deficiencia', 'aluno__pessoa__endereco'
+    ):
+        if escola_id is None:
+            escola_id = zoneamento.resolver(endereco)
+        pedidos.append(Pedido((not deficiencia, data, fila_id), fila_id, aluno_id, escola_id))
+    return pedidos
+
+
+def _carregar_turmas(ano):
+    """{escola_id: heap de [-vagas_livres, turma_id]} e {turma_id: ano_letivo_id}."""
+    turmas = Turma.objects.filter(ano_letivo__ativo=True)
+    if ano:
+        turmas = turmas.filter(ano_letivo__ano=ano)
+    turmas = turmas.annotate(
+        ocupadas=Count('matriculas', filter=Q(matriculas__status=Matricula.Status.ATIVA))
+    ).values_list('id', 'ano_letivo_id', 'ano_letivo__escola_id', 'vagas', 'ocupadas')
+
+    heaps = defaultdict(list)
+    ano_da_turma = {}
+    for turma_id, ano_letivo_id, escola_id, vagas, ocupadas in turmas:
+        ano_da_turma[turma_id] = ano_letivo_id
+        if vagas > ocupadas:
+            heaps[escola_id].append([ocupadas - vagas, turma_id])
+    for heap in heaps.values():
+        heapq.heapify(heap)
+    return heaps, ano_da_turma
+
+
+def _escolher_turma(heap, aluno_id, pares, ativas, ano_da_turma):
+    """Tira do heap a turma mais vazia em que o aluno pode entrar (ou None)."""
+    descartadas = []
+    escolhida = None
+    while heap:
+        item = heapq.heappop(heap)
+        turma_id = item[1]
+        if (aluno_id, turma_id) in pares or (aluno_id, ano_da_turma[turma_id]) in ativas:
+            descartadas.append(item)
+            continue
+        escolhida = item
+        break
+    for item in descartadas:
+        heapq.heappush(heap, item)
+    if escolhida is None:
+        return None
+    escolhida[0] += 1
+    if escolhida[0] < 0:
+        heapq.heappush(heap, escolhida)
+    return escolhida[1]
+
+
+def alocar(ano=None, dry_run=False):
+    """
+    Aloca todos os pedidos AGUARDANDO. Com dry_run=True nada é gravado e o
+    resultado serve de prévia. `ano` restringe a turmas daquele ano letivo.
+    """
+    inicio = time.perf_counter()
+    with transaction.atomic():
+        pedidos = _carregar_pedidos(travar=not dry_run)
+        heaps, ano_da_turma = _carregar_turmas(ano)
+
+        aluno_ids = {p.aluno_id for p in pedidos}
+        pares = set()
+        ativas = set()
+        for aluno_id, turma_id, ano_letivo_id, status in Matricula.objects.filter(
+            aluno_id__in=aluno_ids
+        ).values_list('aluno_id', 'turma_id', 'ano_letivo_id', 'status'):
+            pares.add((aluno_id, turma_id))
+            if status == Matricula.Status.ATIVA:
+                ativas.add((aluno_id, ano_letivo_id))
+
+        heapq.heapify(pedidos)
+        itens = []
+        while pedidos:
+            p = heapq.heappop(pedidos)
+            item = Alocacao(p.fila_id, p.aluno_id, p.escola_id)
+            itens.append(item)
+            if p.escola_id is None:
+                item.motivo = "Endereço fora do zoneamento e sem escola pretendida."
+                continue
+            turma_id = _escolher_turma(heaps.get(p.escola_id, []), p.aluno_id, pares, ativas, ano_da_turma)
+            if turma_id is None:
+                item.motivo = "Sem vagas na escola."
+                continue
+            item.turma_id = turma_id
+            pares.add((p.aluno_id, turma_id))
+            ativas.add((p.aluno_id, ano_da_turma[turma_id]))
+
+        alocados = [i for i in itens if i.turma_id]
+        if not dry_run and alocados:
+            novas = Matricula.objects.bulk_create(
+                [
+                    Matricula(aluno_id=i.aluno_id, turma_id=i.turma_id, ano_letivo_id=ano_da_turma[i.turma_id], status=Matricula.Status.ATIVA)
+                    for i in alocados
+                ],
+                batch_size=5000
+            )
+            FilaEspera.objects.filter(id__in=[i.fila_id for i in alocados]).update(status=FilaEspera.Status.ALOCADO)
+            matriculas_criadas.send(sender=Matricula, matricula_ids={m.id for m in novas})
+
+    return ResultadoAlocacao(itens, time.perf_counter() - inicio, dry_run)
@@ -1,9 +1,18 @@
-from ninja import Router, Schema
+import datetime
+from ninja import Field, FilterSchema, Query, Router, Schema
+from ninja.decorators import decorate_view
+from django.db import IntegrityError, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from typing import List
+from sge.cache_http import versionado
+from sge.metricas import orcamento_sql
+from sge.pagination import pagina, paginate_valores
 from .models import Matricula, Turma, FilaEspera
 from people.models import Aluno
-from pedagogical.models import Escola
+from pedagogical.models import AnoLetivo, Escola
+from pedagogical import zoneamento
 
 router = Router()
 
@@ -17,49 +26,53 @@ class MatriculaOut(Schema):
     turma_nome: str
     status: str
 
+    @staticmethod
+    def resolve_aluno_nome(obj):
+        return obj.aluno.pessoa.nome
+
+    @staticmethod
+    def resolve_turma_nome(obj):
+        return obj.turma.nome
+
+class MatriculaFiltro(FilterSchema):
+    escola_id: int | None = Field(None, json_schema_extra={'q': 'ano_letivo__escola_id'})
+    ano_letivo_id: int | None = None
+    turma_id: int | None = None
+    status: Matricula.Status | None = None
+
 @router.post("/matriculas", response={201: MatriculaOut, 409: dict})
 def criar_matricula(request, payload: MatriculaIn):
-    aluno = get_object_or_404(Aluno, id=payload.aluno_id)
-    turma = get_object_or_404(Turma, id=payload.turma_id)
+    aluno = get_object_or_404(Aluno.objects.select_related('pessoa'), id=payload.aluno_id)
+    turma = get_object_or_404(Turma.objects.select_related('ano_letivo'), id=payload.turma_id)
 
-    # Validar Conflito: Aluno não pode ter matrícula ATIVA no mesmo Ano Letivo
-    # Verifica se existe matrícula desse aluno, em turmas DESSA escola e DESSE ano, com status ATIVA.
-    ano_letivo = turma.ano_letivo
+    # Conflito (matrícula ATIVA no mesmo ano letivo, ou já na turma) é barrado
+    # pelo banco: sem consulta prévia e sem janela para duas requisições simultâneas
+    try:
+        with transaction.atomic():
+            matricula = Matricula.objects.create(
+                aluno=aluno,
+                turma=turma,
+                ano_letivo_id=turma.ano_letivo_id,
+                status=Matricula.Status.ATIVA
+            )
+    except IntegrityError as e:
+        restricao = getattr(getattr(e.__cause__, 'diag', None), 'constraint_name', None)
+        if restricao == 'matricula_ativa_unica_por_ano':
+            return 409, {"message": f"O aluno {aluno.pessoa.nome} já possui uma matrícula ativa no ano letivo {turma.ano_letivo.ano}."}
+        if Matricula.objects.filter(aluno=aluno, turma=turma).exists():
+            return 409, {"message": f"O aluno {aluno.pessoa.nome} já possui matrícula nesta turma."}
+        raise
+    zoneamento.atualizar_aluno(aluno)
     
-    conflito = Matricula.objects.filter(
-        aluno=aluno,
-        turma__ano_letivo=ano_letivo,
-        status=Matricula.Status.ATIVA
-    ).exists()
+    return 201, matricula
 
-    if conflito:
-        return 409, {"message": f"O aluno {aluno.pessoa.nome} já possui uma matrícula ativa no ano letivo {ano_letivo.ano}."}
-
-    matricula = Matricula.objects.create(
-        aluno=aluno,
-        turma=turma,
-        status=Matricula.Status.ATIVA
-    )
-    
-    return 201, {
-        "id": matricula.id,
-        "aluno_nome": matricula.aluno.pessoa.nome,
-        "turma_nome": matricula.turma.nome,
-        "status": matricula.status
-    }
-
-@router.get("/matriculas", response=List[MatriculaOut])
-def listar_matriculas(request):
-    matriculas = Matricula.objects.select_related('aluno__pessoa', 'turma').all()
-    return [
-        {
-            "id": m.id,
-            "aluno_nome": m.aluno.pessoa.nome,
-            "turma_nome": m.turma.nome,
-            "status": m.status
-        }
-        for m in matriculas
-    ]
+@router.get("/matriculas", response=pagina(MatriculaOut))
+@decorate_view(orcamento_sql(2))
+@paginate_valores
+def listar_matriculas(request, filtros: MatriculaFiltro = Query(...)):
+    return filtros.filter(Matricula.objects.all()).values(
+        'id', 'status', aluno_nome=F('aluno__pessoa__nome'), turma_nome=F('turma__nome')
+    ).order_by('id')
 
 class TurmaOut(Schema):
     id: int
@@ -68,6 +81,7 @@ class TurmaOut(Schema):
     turno: str
 
 @router.get("/turmas", response=List[TurmaOut])
+@decorate_view(versionado(Turma, AnoLetivo))
 def listar_turmas(request):
     turmas = Turma.objects.select_related('ano_letivo').all()
     return [
@@ -92,7 +106,8 @@ def listar_alunos_turma(request, turma_id: int):
     
     return [
         {
-            "id": m.aluno.id,
+            "id": m.id,
+            "aluno_id": m.aluno_id,
             "nome": m.aluno.pessoa.nome
         }
         for m in matriculas
@@ -111,44 +126,54 @@ class FilaOut(Schema):
     data_solicitacao: str
     status: str
 
-@router.get("/fila", response=List[FilaOut])
-def listar_fila(request):
-    fila = FilaEspera.objects.select_related('aluno__pessoa', 'escola_pretendida').all()
-    return [
-        {
-            "id": f.id,
-            "aluno_id": f.aluno.id,
-            "aluno_nome": f.aluno.pessoa.nome,
-            "escola_nome": f.escola_pretendida.nome if f.escola_pretendida else "Zoneamento Automático",
-            "data_solicitacao": str(f.data_solicitacao),
-            "status": f.status
-        }
-        for f in fila
-    ]
+    @staticmethod
+    def resolve_aluno_nome(obj):
+        return obj.aluno.pessoa.nome
+
+    @staticmethod
+    def resolve_escola_nome(obj):
+        return obj.escola_pretendida.nome if obj.escola_pretendida else "Zoneamento Automático"
+
+    @staticmethod
+    def resolve_data_solicitacao(obj):
+        return str(obj.data_solicitacao)
+
+class FilaFiltro(FilterSchema):
+    escola_id: int | None = Field(None, json_schema_extra={'q': 'escola_pretendida_id'})
+    status: FilaEspera.Status | None = None
+    data_de: datetime.date | None = Field(None, json_schema_extra={'q': 'data_solicitacao__gte'})
+    data_ate: datetime.date | None = Field(None, json_schema_extra={'q': 'data_solicitacao__lte'})
+
+@router.get("/fila", response=pagina(FilaOut))
+@decorate_view(orcamento_sql(2))
+@paginate_valores
+def listar_fila(request, filtros: FilaFiltro = Query(...)):
+    # Ordem de chegada: quem pediu primeiro aparece primeiro
+    return filtros.filter(FilaEspera.objects.all()).values(
+        'id', 'aluno_id', 'data_solicitacao', 'status',
+        aluno_nome=F('aluno__pessoa__nome'),
+        escola_nome=Coalesce(F('escola_pretendida__nome'), Value("Zoneamento Automático"))
+    ).order_by('data_solicitacao', 'id')
 
 @router.post("/fila", response={201: FilaOut})
 def adicionar_fila(request, payload: FilaIn):
-    aluno = get_object_or_404(Aluno, id=payload.aluno_id)
+    aluno = get_object_or_404(Aluno.objects.select_related('pessoa'), id=payload.aluno_id)
     escola = None
     if payload.escola_id:
         escola = get_object_or_404(Escola, id=payload.escola_id)
     
-    # TODO: Implementar lógica de Zoneamento aqui se escola for None
+    # Sem escola escolhida: vale a escola do bairro do aluno
+    escola_zoneada_id = zoneamento.atualizar_aluno(aluno)
     
+    # Passando a escola já carregada, o FilaOut não a busca de novo (escola_nome)
+    destino = {'escola_pretendida': escola} if escola else {'escola_pretendida_id': escola_zoneada_id}
     item = FilaEspera.objects.create(
         aluno=aluno,
-        escola_pretendida=escola,
-        status=FilaEspera.Status.AGUARDANDO
+        status=FilaEspera.Status.AGUARDANDO,
+        **destino
     )
     
-    return 201, {
-        "id": item.id,
-        "aluno_id": item.aluno.id,
-        "aluno_nome": item.aluno.pessoa.nome,
-        "escola_nome": item.escola_pretendida.nome if item.escola_pretendida else None,
-        "data_solicitacao": str(item.data_solicitacao),
-        "status": item.status
-    }
+    return 201, item
 
 @router.delete("/fila/{item_id}", response={204: None})
 def remover_da_fila(request, item_id: int):
@@ -156,54 +181,168 @@ def remover_da_fila(request, item_id: int):
     item.delete()
     return 204, None
 
+# --- Alocação da Fila ---
+from . import alocacao
+
+class AlocacaoIn(Schema):
+    dry_run: bool = True # por padrão só mostra a prévia
+    ano: int | None = None
+
+class AlocacaoItem(Schema):
+    fila_id: int
+    aluno_id: int
+    escola_id: int | None
+    turma_id: int | None
+    motivo: str | None
+
+class AlocacaoOut(Schema):
+    dry_run: bool
+    alocados: int
+    pendentes: int
+    segundos: float
+    itens: List[AlocacaoItem]
+
+@router.post("/alocacoes", response=AlocacaoOut)
+def alocar_fila(request, payload: AlocacaoIn):
+    return alocacao.alocar(ano=payload.ano, dry_run=payload.dry_run)
+
+# --- Importação ---
+from typing import Literal
+from ninja import File, UploadedFile
+from . import importacao
+
+class ErroLinhaOut(Schema):
+    linha: int
+    motivo: str
+
+class ImportacaoOut(Schema):
+    dry_run: bool
+    linhas: int
+    pessoas_criadas: int
+    pessoas_existentes: int
+    alunos_criados: int
+    matriculas_criadas: int
+    segundos: float
+    erros: List[ErroLinhaOut]
+
+@router.post("/importacoes", response=ImportacaoOut)
+def importar_alunos(
+    request,
+    arquivo: UploadedFile = File(...),
+    formato: Literal['csv', 'educacenso'] = 'csv',
+    dry_run: bool = False
+):
+    return importacao.importar(importacao.abrir(arquivo.file, formato), formato, dry_run)
+
+# --- Rematrícula em Lote ---
+from . import rematricula
+
+class TurmaMapeada(Schema):
+    origem: int
+    destino: int
+
+class RematriculaIn(Schema):
+    ano_origem_id: int
+    ano_destino_id: int
+    mapeamento: List[TurmaMapeada]
+    encerrar_sem_destino: bool = True
+    dry_run: bool = True
+
+class ConflitoOut(Schema):
+    matricula_id: int
+    aluno_id: int
+    motivo: str
+
+class RematriculaOut(Schema):
+    dry_run: bool
+    criadas: int
+    encerradas: int
+    segundos: float
+    conflitos: List[ConflitoOut]
+
+@router.post("/rematriculas", response={200: RematriculaOut, 400: dict})
+def rematricular(request, payload: RematriculaIn):
+    try:
+        return rematricula.rematricular(
+            {m.origem: m.destino for m in payload.mapeamento},
+            ano_origem_id=payload.ano_origem_id,
+            ano_destino_id=payload.ano_destino_id,
+            encerrar_sem_destino=payload.encerrar_sem_destino,
+            dry_run=payload.dry_run
+        )
+    except rematricula.RematriculaInvalida as e:
+        return 400, {"message": str(e)}
+
 # --- Conselho de Classe ---
-from diary.models import Nota
-from pedagogical.models import Disciplina
-from django.db.models import Sum
+from pedagogical.models import Etapa
+from sge.db_router import ler_da_replica
+from . import conselho
+
+# total: resultado calculado pelo critério do ano letivo (diary/medias.py), sobre
+# maximo (nota_maxima, ou pontos em SOMA); None = sem nota
+class EtapaTotal(Schema):
+    etapa: str
+    total: float | None
+    maximo: float | None
 
 class NotaDisciplina(Schema):
     disciplina: str
-    total: float
+    total: float | None
+    maximo: float | None
+    etapas: List[EtapaTotal] | None = None
 
 class AlunoConselho(Schema):
     aluno_nome: str
     notas: List[NotaDisciplina]
 
+class AlunoMatriz(Schema):
+    matricula_id: int
+    aluno_nome: str
+    turma: str
+
+class DisciplinaMatriz(Schema):
+    id: int
+    nome: str
+
+class ConselhoMatriz(Schema):
+    alunos: List[AlunoMatriz]
+    disciplinas: List[DisciplinaMatriz]
+    totais: List[List[float | None]] # [aluno][disciplina], na ordem dos cabeçalhos
+
 @router.get("/turmas/{turma_id}/conselho", response=List[AlunoConselho])
-def dados_conselho_classe(request, turma_id: int):
+@decorate_view(ler_da_replica)
+def dados_conselho_classe(request, turma_id: int, etapa_id: int = None, por_etapa: bool = False):
     turma = get_object_or_404(Turma, id=turma_id)
-    matriculas = Matricula.objects.filter(turma=turma, status=Matricula.Status.ATIVA).select_related('aluno__pessoa')
-    disciplinas = Disciplina.objects.all() # Idealmente filtrar por Matriz da turma
+    etapa = get_object_or_404(Etapa, id=etapa_id, ano_letivo_id=turma.ano_letivo_id) if etapa_id else None
+    matriculas = conselho.matriculas_ativas(turma=turma)
+    disciplinas = list(turma.matriz_curricular.disciplinas.order_by('nome'))
     
-    # Otimização: Buscar todas as notas da turma de uma vez
-    notas_raw = Nota.objects.filter(
-        matricula__turma=turma
-    ).select_related('avaliacao', 'avaliacao__disciplina')
-    
-    # Dicionário para acesso rápido: [matricula_id][disciplina_id] = soma_notas
-    notas_map = {}
-    for nota in notas_raw:
-        if not nota.valor: continue
-        
-        mat_id = nota.matricula_id
-        disc_id = nota.avaliacao.disciplina_id
-        
-        if not disc_id: continue # Ignora notas sem disciplina (legado ou erro)
-        
-        if mat_id not in notas_map: notas_map[mat_id] = {}
-        if disc_id not in notas_map[mat_id]: notas_map[mat_id][disc_id] = 0
-        
-        notas_map[mat_id][disc_id] += float(nota.valor)
+    # Resultados por [matricula][disciplina](,etapa) já calculados, em uma consulta
+    totais = conselho.resultados(matriculas, [d.id for d in disciplinas], etapa=etapa, por_etapa=por_etapa)
+
+    etapas = []
+    if por_etapa:
+        # Com etapa_id, a quebra (e o total) fica só na etapa pedida
+        etapas = [etapa] if etapa else list(Etapa.objects.filter(ano_letivo_id=turma.ano_letivo_id).order_by('data_inicio'))
+    sem_nota = (None, None)
         
     resultado = []
     for m in matriculas:
         lista_notas = []
         for d in disciplinas:
-            total = notas_map.get(m.id, {}).get(d.id, 0.0)
-            lista_notas.append({
+            chave = (m.id, d.id, etapa.id if etapa else None) if por_etapa else (m.id, d.id)
+            total, maximo = totais.get(chave, sem_nota)
+            item = {
                 "disciplina": d.nome,
-                "total": total
-            })
+                "total": total,
+                "maximo": maximo
+            }
+            if por_etapa:
+                item["etapas"] = []
+                for e in etapas:
+                    total_etapa, maximo_etapa = totais.get((m.id, d.id, e.id), sem_nota)
+                    item["etapas"].append({"etapa": e.nome, "total": total_etapa, "maximo": maximo_etapa})
+            lista_notas.append(item)
             
         resultado.append({
             "aluno_nome": m.aluno.pessoa.nome,
@@ -211,3 +350,27 @@ def dados_conselho_classe(request, turma_id: int):
         })
         
     return resultado
+
+@router.get("/turmas/{turma_id}/conselho/matriz", response=ConselhoMatriz)
+@decorate_view(ler_da_replica)
+def conselho_matriz_turma(request, turma_id: int, etapa_id: int = None):
+    turma = get_object_or_404(Turma, id=turma_id)
+    etapa = get_object_or_404(Etapa, id=etapa_id, ano_letivo_id=turma.ano_letivo_id) if etapa_id else None
+    return conselho.matriz(
+        conselho.matriculas_ativas(turma=turma),
+        turma.matriz_curricular.disciplinas.order_by('nome'),
+        etapa=etapa
+    )
+
+@router.get("/escolas/{escola_id}/conselho/matriz", response=ConselhoMatriz)
+@decorate_view(ler_da_replica)
+def conselho_matriz_escola(request, escola_id: int, etapa_id: int = None):
+    """Conselho da escola inteira (ano letivo ativo): disciplinas = união das matrizes das turmas."""
+    escola = get_object_or_404(Escola, id=escola_id)
+    etapa = get_object_or_404(Etapa, id=etapa_id, ano_letivo__escola=escola) if etapa_id else None
+    turma_ids = list(Turma.objects.filter(ano_letivo__escola=escola, ano_letivo__ativo=True).values_list('id', flat=True))
+    return conselho.matriz(
+        conselho.matriculas_ativas(turma_id__in=turma_ids).order_by('turma__nome', 'aluno__pessoa__nome', 'id'),
+        conselho.disciplinas_das_turmas(turma_ids),
+        etapa=etapa
+    )
@@ -0,0 +1,58 @@
+"""
+Dados do conselho de classe.
+
+Os resultados por (matrícula, disciplina[, etapa]) vêm prontos de
+ResultadoDisciplina (calculados por diary/medias.py conforme o critério do
+ano letivo); as disciplinas são as da matriz curricular de cada turma.
+"""
+from diary.models import ResultadoDisciplina
+from pedagogical.models import Disciplina
+from .models import Matricula
+
+
+def disciplinas_das_turmas(turma_ids):
+    return Disciplina.objects.filter(matrizes__turma__id__in=turma_ids).distinct().order_by('nome')
+
+
+def resultados(matriculas, disciplina_ids, etapa=None, por_etapa=False):
+    """
+    Devolve {(matricula_id, disciplina_id[, etapa_id]): (valor, maximo)}.
+    etapa: resultado da Etapa informada; sem etapa, o resultado anual.
+    por_etapa: quebra por etapa (etapa_id None = anual); com etapa, só ela.
+    """
+    linhas = ResultadoDisciplina.objects.filter(matricula__in=matriculas, disciplina_id__in=disciplina_ids)
+    campos = ['matricula_id', 'disciplina_id']
+    if por_etapa:
+        campos.append('etapa_id')
+    if etapa is not None:
+        linhas = linhas.filter(etapa=etapa)
+    elif not por_etapa:
+        linhas = linhas.filter(etapa__isnull=True)
+    return {
+        tuple(linha[:-2]): (float(linha[-2]), float(linha[-1]))
+        for linha in linhas.values_list(*campos, 'valor', 'maximo')
+    }
+
+
+def matriculas_ativas(**filtros):
+    return Matricula.objects.filter(status=Matricula.Status.ATIVA, **filtros).select_related(
+        'aluno__pessoa', 'turma'
+    ).order_by('aluno__pessoa__nome', 'id')
+
+
+def matriz(matriculas, disciplinas, etapa=None):
+    """Formato denso: cabeçalhos ordenados + array 2D [aluno][disciplina] (None = sem nota)."""
+    matriculas = list(matriculas)
+    disciplinas = list(disciplinas)
+    valores = resultados([m.id for m in matriculas], [d.id for d in disciplinas], etapa=etapa)
+    return {
+        "alunos": [
+            {"matricula_id": m.id, "aluno_nome": m.aluno.pessoa.nome, "turma": m.turma.nome}
+            for m in matriculas
+        ],
+        "disciplinas": [{"id": d.id, "nome": d.nome} for d in disciplinas],
+        "totais": [
+            [valores.get((m.id, d.id), (None,))[0] for d in disciplinas]
+            for m in matriculas
+        ]
+    }
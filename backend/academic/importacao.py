@@ -0,0 +1,335 @@
+"""
+Importação em massa de alunos (Pessoa + Aluno) e matrículas.
+
+O arquivo é lido em streaming e processado em blocos de TAMANHO_BLOCO
+linhas. Para cada bloco:
+
+1. valida as linhas (nome, data de nascimento, CPF, turma);
+2. procura as pessoas já cadastradas com uma consulta por CPF e outra por
+   nome + data de nascimento (para quem não tem CPF);
+3. busca turmas e matrículas ativas dos alunos envolvidos de uma vez;
+4. grava Pessoa, Aluno e Matricula com bulk_create, dentro de uma transação.
+
+Linhas com problema não interrompem a importação: entram no relatório de
+erros com o número da linha e o motivo.
+"""
+import csv
+import datetime
+import io
+import re
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+
+from pedagogical import zoneamento
+from people.models import Aluno, Pessoa
+from people.signals import alunos_criados
+from .models import Matricula, Turma
+from .signals import matriculas_criadas
+
+TAMANHO_BLOCO = 5000
+
+
+@dataclass
+class ErroLinha:
+    linha: int
+    motivo: str
+
+
+@dataclass
+class ResultadoImportacao:
+    dry_run: bool
+    linhas: int = 0
+    pessoas_criadas: int = 0
+    pessoas_existentes: int = 0
+    alunos_criados: int = 0
+    matriculas_criadas: int = 0
+    erros: list = field(default_factory=list)
+    segundos: float = 0.0
+
+
+# --- Validação ---
+
+def normalizar_cpf(valor):
+    """
+    '123.456.789-09' ou '12345678909' -> '12345678909'. Vazio -> None.
+    Grava só os dígitos, como o login do portal procura; a máscara é só
+    para exibição (formatar_cpf).
+    """
+    digitos = re.sub(r'\D', '', valor or '')
+    if not digitos:
+        return None
+    if len(digitos) != 11 or digitos == digitos[0] * 11:
+        raise ValueError(f"CPF inválido: {valor}")
+    for posicao in (9, 10):
+        soma = sum(int(d) * peso for d, peso in zip(digitos[:posicao], range(posicao + 1, 1, -1)))
+        if (soma * 10 % 11) % 10 != int(digitos[posicao]):
+            raise ValueError(f"CPF inválido: {valor}")
+    return digitos
+
+
+def formatar_cpf(digitos):
+    """'12345678909' -> '123.456.789-09'."""
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+
+def _data(valor):
+    """AAAA-MM-DD ou DD/MM/AAAA (strptime é lento demais para 100k linhas)."""
+    valor = (valor or '').strip()
+    try:
+        if '/' in valor:
+            dia, mes, ano = valor.split('/')
+            return datetime.date(int(ano), int(mes), int(dia))
+        return datetime.date.fromisoformat(valor)
+    except ValueError:
+        raise ValueError(f"Data de nascimento inválida: {valor or '(vazia)'}")
+
+
+def _booleano(valor):
+    return (valor or '').strip().lower() in ('1', 's', 'sim', 'true', 'x')
+
+
+# Aceita o código ('PA'), o rótulo ('Parda') ou o código do Educacenso ('3')
+_RACAS = {
+    **{codigo.lower(): codigo for codigo in Pessoa.RacaCor.values},
+    **{rotulo.lower(): codigo for codigo, rotulo in Pessoa.RacaCor.choices},
+    '0': 'ND', '1': 'BR', '2': 'PR', '3': 'PA', '4': 'AM', '5': 'IN',
+}
+
+
+def _vazio(valor):
+    valor = (valor or '').strip()
+    return valor or None
+
+
+def validar(dados):
+    """dict cru da linha -> dict pronto para gravar. Levanta ValueError."""
+    nome = (dados.get('nome') or '').strip()
+    if not nome:
+        raise ValueError("Nome não informado.")
+    turma = _vazio(dados.get('turma_id'))
+    if turma is not None and not turma.isdigit():
+        raise ValueError(f"Turma inválida: {turma}")
+    return {
+        'nome': nome,
+        'cpf': normalizar_cpf(dados.get('cpf')),
+        'data_nascimento': _data(dados.get('data_nascimento')),
+        'nome_mae': _vazio(dados.get('nome_mae')),
+        'endereco': _vazio(dados.get('endereco')),
+        'raca_cor': _RACAS.get((dados.get('raca_cor') or '').strip().lower(), Pessoa.RacaCor.NAO_DECLARADA),
+        'deficiencia': _booleano(dados.get('deficiencia')),
+        'nis': _vazio(dados.get('nis')),
+        'codigo_inep': _vazio(dados.get('codigo_inep')),
+        'transporte_escolar': _booleano(dados.get('transporte_escolar')),
+        'turma_id': int(turma) if turma else None,
+    }
+
+
+# --- Leitura dos formatos ---
+
+# Cabeçalhos aceitos no CSV; inclui os do export /reports/educacenso/alunos
+COLUNAS_CSV = {
+    'nome': 'nome', 'cpf': 'cpf',
+    'data_nascimento': 'data_nascimento', 'data nascimento': 'data_nascimento',
+    'nome_mae': 'nome_mae', 'nome mãe': 'nome_mae',
+    'endereco': 'endereco', 'endereço': 'endereco',
+    'raca_cor': 'raca_cor', 'raça/cor': 'raca_cor',
+    'deficiencia': 'deficiencia', 'deficiência': 'deficiencia',
+    'nis': 'nis', 'codigo_inep': 'codigo_inep', 'inep': 'codigo_inep',
+    'transporte_escolar': 'transporte_escolar', 'transporte': 'transporte_escolar',
+    'turma_id': 'turma_id', 'turma': 'turma_id',
+}
+
+
+def ler_csv(arquivo):
+    """Gera (numero_linha, dict) de um CSV com cabeçalho (separado por ',', ';' ou tab)."""
+    primeira = arquivo.readline()
+    delimitador = max((',', ';', '\t'), key=primeira.count)
+    cabecalho = [COLUNAS_CSV.get(c.strip().lower()) for c in next(csv.reader([primeira], delimiter=delimitador))]
+    for numero, valores in enumerate(csv.reader(arquivo, delimiter=delimitador), start=2):
+        if any(v.strip() for v in valores):
+            yield numero, {c: v for c, v in zip(cabecalho, valores) if c}
+
+
+# Layout do Educacenso (arquivo de migração, campos separados por '|').
+# Posições (base 0) usadas de cada registro:
+#   30 - pessoa física: 2 código da pessoa no sistema próprio, 3 ID INEP,
+#        4 CPF, 5 nome, 6 data de nascimento, 8 filiação 1, 11 cor/raça,
+#        15 possui deficiência
+#   60 - vínculo do aluno: 2 código da pessoa, 4 código da turma no sistema
+#        próprio (o ID da Turma aqui)
+EDUCACENSO_PESSOA = {
+    'codigo_pessoa': 2, 'codigo_inep': 3, 'cpf': 4, 'nome': 5, 'data_nascimento': 6,
+    'nome_mae': 8, 'raca_cor': 11, 'deficiencia': 15,
+}
+EDUCACENSO_VINCULO = {'codigo_pessoa': 2, 'turma_id': 4}
+
+
+def _campos(linha, posicoes):
+    partes = linha.rstrip('\r\n').split('|')
+    return {nome: partes[i] if i < len(partes) else '' for nome, i in posicoes.items()}
+
+
+def ler_educacenso(arquivo):
+    """
+    Gera (numero_linha, dict) dos registros 30 que têm vínculo de aluno (60).
+    O 60 vem depois de todos os 30 da escola, então o arquivo é lido duas
+    vezes: a primeira só monta {código da pessoa: turma}.
+    """
+    turmas = {}
+    for linha in arquivo:
+        if linha.startswith('60|'):
+            vinculo = _campos(linha, EDUCACENSO_VINCULO)
+            turmas[vinculo['codigo_pessoa']] = vinculo['turma_id']
+    arquivo.seek(0)
+    for numero, linha in enumerate(arquivo, start=1):
+        if linha.startswith('30|'):
+            dados = _campos(linha, EDUCACENSO_PESSOA)
+            if dados['codigo_pessoa'] in turmas:
+                dados['turma_id'] = turmas[dados['codigo_pessoa']]
+                yield numero, dados
+
+
+LEITORES = {'csv': ler_csv, 'educacenso': ler_educacenso}
+
+
+# --- Gravação ---
+
+def _pessoas_existentes(registros):
+    """{indice do registro: pessoa_id} para quem já está cadastrado."""
+    # CPFs antigos podem estar gravados com máscara: procura as duas formas
+    por_cpf = {}
+    for i, r in registros.items():
+        if r['cpf']:
+            por_cpf[r['cpf']] = i
+            por_cpf[formatar_cpf(r['cpf'])] = i
+    sem_cpf = {(r['nome'], r['data_nascimento']): i for i, r in registros.items() if not r['cpf']}
+
+    encontradas = {}
+    if por_cpf:
+        for pessoa_id, cpf in Pessoa.objects.filter(cpf__in=list(por_cpf)).values_list('id', 'cpf'):
+            encontradas[por_cpf[cpf]] = pessoa_id
+    if sem_cpf:
+        for pessoa_id, nome, nascimento in Pessoa.objects.filter(
+            nome__in={n for n, _ in sem_cpf},
+            data_nascimento__in={d for _, d in sem_cpf}
+        ).values_list('id', 'nome', 'data_nascimento'):
+            indice = sem_cpf.get((nome, nascimento))
+            if indice is not None:
+                encontradas[indice] = pessoa_id
+    return encontradas
+
+
+def _importar_bloco(bloco, resultado, vistos):
+    registros = {}
+    for numero, dados in bloco:
+        try:
+            registro = validar(dados)
+        except ValueError as e:
+            resultado.erros.append(ErroLinha(numero, str(e)))
+            continue
+        chave = registro['cpf'] or (registro['nome'], registro['data_nascimento'])
+        if chave in vistos:
+            resultado.erros.append(ErroLinha(numero, f"Pessoa repetida no arquivo (linha {vistos[chave]})."))
+            continue
+        vistos[chave] = numero
+        registros[numero] = registro
+    if not registros:
+        return
+
+    existentes = _pessoas_existentes(registros)
+    alunos = dict(Aluno.objects.filter(pessoa_id__in=set(existentes.values())).values_list('pessoa_id', 'id'))
+
+    turma_ids = {r['turma_id'] for r in registros.values() if r['turma_id']}
+    ano_da_turma = dict(Turma.objects.filter(id__in=turma_ids).values_list('id', 'ano_letivo_id'))
+    pares = set()
+    ativas = set()
+    for aluno_id, turma_id, ano_letivo_id, status in Matricula.objects.filter(
+        aluno_id__in=set(alunos.values())
+    ).values_list('aluno_id', 'turma_id', 'ano_letivo_id', 'status'):
+        pares.add((aluno_id, turma_id))
+        if status == Matricula.Status.ATIVA:
+            ativas.add((aluno_id, ano_letivo_id))
+
+    # Matrículas pedidas: valida turma e conflito de matrícula ativa no ano letivo
+    matricular = {}
+    for numero, r in registros.items():
+        if not r['turma_id']:
+            continue
+        if r['turma_id'] not in ano_da_turma:
+            resultado.erros.append(ErroLinha(numero, f"Turma {r['turma_id']} não encontrada."))
+            continue
+        aluno_id = alunos.get(existentes.get(numero))
+        if aluno_id and (aluno_id, r['turma_id']) in pares:
+            resultado.erros.append(ErroLinha(numero, "Aluno já possui matrícula nesta turma."))
+        elif aluno_id and (aluno_id, ano_da_turma[r['turma_id']]) in ativas:
+            resultado.erros.append(ErroLinha(numero, "Aluno já possui matrícula ativa neste ano letivo."))
+        else:
+            matricular[numero] = r['turma_id']
+
+    novas_pessoas = [n for n in registros if n not in existentes]
+    novos_alunos = [n for n in registros if alunos.get(existentes.get(n)) is None]
+    resultado.pessoas_criadas += len(novas_pessoas)
+    resultado.pessoas_existentes += len(existentes)
+    resultado.alunos_criados += len(novos_alunos)
+    resultado.matriculas_criadas += len(matricular)
+    if resultado.dry_run:
+        return
+
+    campos_pessoa = ('nome', 'cpf', 'data_nascimento', 'nome_mae', 'endereco', 'raca_cor', 'deficiencia')
+    with transaction.atomic():
+        pessoas = Pessoa.objects.bulk_create(
+            [Pessoa(**{c: registros[n][c] for c in campos_pessoa}) for n in novas_pessoas]
+        )
+        pessoa_de = {**existentes, **{n: p.id for n, p in zip(novas_pessoas, pessoas)}}
+
+        criados = Aluno.objects.bulk_create([
+            Aluno(
+                pessoa_id=pessoa_de[n],
+                nis=registros[n]['nis'],
+                codigo_inep=registros[n]['codigo_inep'],
+                transporte_escolar=registros[n]['transporte_escolar'],
+                escola_zoneamento_id=zoneamento.resolver(registros[n]['endereco'])
+            )
+            for n in novos_alunos
+        ])
+        aluno_de = {n: alunos[pessoa_de[n]] for n in registros if pessoa_de[n] in alunos}
+        aluno_de.update({n: a.id for n, a in zip(novos_alunos, criados)})
+
+        matriculas = Matricula.objects.bulk_create([
+            Matricula(aluno_id=aluno_de[n], turma_id=turma_id, ano_letivo_id=ano_da_turma[turma_id], status=Matricula.Status.ATIVA)
+            for n, turma_id in matricular.items()
+        ])
+
+        if criados:
+            alunos_criados.send(sender=Aluno, aluno_ids={a.id for a in criados})
+        if matriculas:
+            matriculas_criadas.send(sender=Matricula, matricula_ids={m.id for m in matriculas})
+
+
+def importar(arquivo, formato='csv', dry_run=False):
+    """
+    arquivo: arquivo de texto já aberto (seekable no formato educacenso).
+    Devolve ResultadoImportacao com os totais e o relatório de erros.
+    """
+    inicio = time.perf_counter()
+    resultado = ResultadoImportacao(dry_run=dry_run)
+    linhas = LEITORES[formato](arquivo)
+    vistos = {} # CPF ou (nome, nascimento) -> linha, para achar repetidos entre blocos
+    while True:
+        bloco = list(islice(linhas, TAMANHO_BLOCO))
+        if not bloco:
+            break
+        resultado.linhas += len(bloco)
+        _importar_bloco(bloco, resultado, vistos)
+    resultado.erros.sort(key=lambda e: e.linha)
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
+
+
+def abrir(arquivo_binario, formato='csv', encoding=None):
+    """Envolve um arquivo binário (upload) em texto. Educacenso vem em Latin-1."""
+    encoding = encoding or ('latin-1' if formato == 'educacenso' else 'utf-8-sig')
+    return io.TextIOWrapper(arquivo_binario, encoding=encoding, newline='')
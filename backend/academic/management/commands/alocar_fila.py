@@ -0,0 +1,22 @@
+from collections import Counter
+from django.core.management.base import BaseCommand
+from academic import alocacao
+
+
+class Command(BaseCommand):
+    help = 'Aloca os pedidos AGUARDANDO da fila de espera em turmas com vagas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Só mostra a prévia, sem gravar')
+        parser.add_argument('--ano', type=int, help='Ano letivo das turmas (padrão: anos letivos ativos)')
+
+    def handle(self, *args, **options):
+        resultado = alocacao.alocar(ano=options['ano'], dry_run=options['dry_run'])
+
+        for motivo, total in Counter(i.motivo for i in resultado.itens if i.motivo).most_common():
+            self.stdout.write(f'  {total:6d}  {motivo}')
+
+        prefixo = '[dry-run] ' if resultado.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefixo}{resultado.alocados} alocados, {resultado.pendentes} pendentes em {resultado.segundos:.2f}s.'
+        ))
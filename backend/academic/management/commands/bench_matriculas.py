@@ -0,0 +1,100 @@
+import json
+import statistics
+import threading
+import time
+from collections import Counter
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from academic.models import Matricula, Turma
+from people.models import Aluno
+from pedagogical.models import AnoLetivo
+
+
+class Command(BaseCommand):
+    help = 'Mede matrículas/s com várias requisições simultâneas, disputando o mesmo aluno no mesmo ano letivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Requisições simultâneas')
+        parser.add_argument('--alunos', type=int, default=200, help='Alunos matriculados')
+        parser.add_argument(
+            '--disputa', type=int, default=2,
+            help='Requisições por aluno, cada uma para uma turma diferente do mesmo ano (só uma pode vingar)'
+        )
+
+    def handle(self, *args, **options):
+        disputa = options['disputa']
+        ano = AnoLetivo.objects.annotate(n=Count('turmas')).filter(n__gte=disputa).order_by('-ativo', '-ano', 'id').first()
+        if ano is None:
+            self.stderr.write(f'Nenhum ano letivo com {disputa} turmas. Popule a base antes.')
+            return
+        turmas = list(Turma.objects.filter(ano_letivo=ano).order_by('id').values_list('id', flat=True)[:disputa])
+        alunos = list(
+            Aluno.objects.exclude(id__in=Matricula.objects.filter(
+                ano_letivo=ano, status=Matricula.Status.ATIVA
+            ).values('aluno_id')).order_by('id').values_list('id', flat=True)[:options['alunos']]
+        )
+        if not alunos:
+            self.stderr.write(f'Nenhum aluno sem matrícula ativa em {ano}.')
+            return
+
+        # As requisições do mesmo aluno ficam em sequência na fila: threads
+        # diferentes as pegam quase juntas e disputam a restrição única
+        fila = [(a, t) for a in alunos for t in turmas]
+        proxima = iter(fila)
+        latencias = []
+        status = Counter()
+        criadas = []
+        lock = threading.Lock()
+
+        def secretaria():
+            client = Client()
+            while True:
+                with lock:
+                    item = next(proxima, None)
+                if item is None:
+                    break
+                aluno_id, turma_id = item
+                inicio = time.perf_counter()
+                r = client.post(
+                    '/api/academic/matriculas', json.dumps({"aluno_id": aluno_id, "turma_id": turma_id}),
+                    content_type='application/json'
+                )
+                with lock:
+                    latencias.append(time.perf_counter() - inicio)
+                    status[r.status_code] += 1
+                    if r.status_code == 201:
+                        criadas.append(r.json()['id'])
+            connections.close_all()
+
+        threads = [threading.Thread(target=secretaria) for _ in range(options['threads'])]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        segundos = time.perf_counter() - inicio
+
+        duplicados = (
+            Matricula.objects.filter(ano_letivo=ano, status=Matricula.Status.ATIVA, aluno_id__in=alunos)
+            .values('aluno_id').annotate(n=Count('id')).filter(n__gt=1).count()
+        )
+        # Remove uma a uma: o post_delete mantém os contadores do dashboard
+        for matricula in Matricula.objects.filter(id__in=criadas):
+            matricula.delete()
+
+        ms = sorted(x * 1000 for x in latencias)
+        self.stdout.write(
+            f"{options['threads']} threads, {len(fila)} requisições ({len(alunos)} alunos x {len(turmas)} turmas) "
+            f"em {segundos:.2f}s: {len(fila) / segundos:.1f} req/s | "
+            f"req p50 {statistics.median(ms):.1f} ms, p95 {ms[int(len(ms) * 0.95) - 1]:.1f} ms | "
+            f"201: {status[201]}, 409: {status[409]}, outros: {sum(n for s, n in status.items() if s not in (201, 409))}"
+        )
+        if status[201] != len(alunos) or duplicados:
+            self.stderr.write(self.style.ERROR(
+                f"Esperada uma matrícula por aluno: {status[201]} criadas para {len(alunos)} alunos, "
+                f"{duplicados} com mais de uma ativa no ano."
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS('Uma matrícula ativa por aluno no ano letivo.'))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from academic import importacao
+
+
+class Command(BaseCommand):
+    help = 'Importa alunos e matrículas de um CSV ou do arquivo de migração do Educacenso'
+
+    def add_arguments(self, parser):
+        parser.add_argument('arquivo')
+        parser.add_argument('--formato', choices=sorted(importacao.LEITORES), default='csv')
+        parser.add_argument('--encoding', help='Padrão: utf-8 (csv) ou latin-1 (educacenso)')
+        parser.add_argument('--dry-run', action='store_true', help='Valida e conta, sem gravar')
+
+    def handle(self, *args, **options):
+        with open(options['arquivo'], 'rb') as f:
+            texto = importacao.abrir(f, options['formato'], options['encoding'])
+            resultado = importacao.importar(texto, options['formato'], options['dry_run'])
+
+        for erro in resultado.erros:
+            self.stderr.write(f"linha {erro.linha}: {erro.motivo}")
+
+        prefixo = '[dry-run] ' if resultado.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixo}{resultado.linhas} linhas em {resultado.segundos:.1f}s: "
+            f"{resultado.pessoas_criadas} pessoas novas, {resultado.pessoas_existentes} já cadastradas, "
+            f"{resultado.alunos_criados} alunos, {resultado.matriculas_criadas} matrículas, "
+            f"{len(resultado.erros)} erros."
+        ))
@@ -0,0 +1,35 @@
+import csv
+from django.core.management.base import BaseCommand, CommandError
+from academic import rematricula
+
+
+class Command(BaseCommand):
+    help = 'Virada de ano letivo: rematricula os alunos ativos conforme um mapa de turmas (CSV origem,destino)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('mapa', help='CSV com as colunas origem,destino (IDs de Turma); pode cobrir várias escolas')
+        parser.add_argument('--manter-sem-destino', action='store_true',
+                            help='Não encerra matrículas de turmas que não estão no mapa')
+        parser.add_argument('--dry-run', action='store_true', help='Executa e desfaz, só para ver os números')
+
+    def handle(self, *args, **options):
+        with open(options['mapa'], newline='') as f:
+            mapeamento = {int(linha['origem']): int(linha['destino']) for linha in csv.DictReader(f)}
+
+        try:
+            resultado = rematricula.rematricular(
+                mapeamento,
+                encerrar_sem_destino=not options['manter_sem_destino'],
+                dry_run=options['dry_run']
+            )
+        except rematricula.RematriculaInvalida as e:
+            raise CommandError(str(e))
+
+        for conflito in resultado.conflitos:
+            self.stderr.write(f"matrícula {conflito.matricula_id} (aluno {conflito.aluno_id}): {conflito.motivo}")
+
+        prefixo = '[dry-run] ' if resultado.dry_run else ''
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefixo}{resultado.criadas} matrículas criadas, {resultado.encerradas} encerradas, "
+            f"{len(resultado.conflitos)} conflitos em {resultado.segundos:.2f}s."
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_filaespera'),
+        ('pedagogical', '0002_zoneamento'),
+        ('people', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='filaespera',
+            index=models.Index(fields=['data_solicitacao', 'id'], name='fila_data_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='filaespera',
+            index=models.Index(fields=['status', 'data_solicitacao', 'id'], name='fila_status_data_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0003_filaespera_fila_data_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='turma',
+            name='vagas',
+            field=models.PositiveIntegerField(default=35),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:56
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não roda dentro de transação; assim a tabela
+    # não fica bloqueada para escrita durante a criação
+    atomic = False
+
+    dependencies = [
+        ('academic', '0004_turma_vagas'),
+        ('people', '0003_aluno_escola_zoneamento'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='matricula',
+            index=models.Index(condition=models.Q(('status', 'ATIVA')), fields=['turma'], include=('aluno',), name='matricula_turma_ativa_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='matricula',
+            index=models.Index(condition=models.Q(('status', 'ATIVA')), fields=['aluno'], include=('turma',), name='matricula_aluno_ativa_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def verificar_duplicadas(apps, schema_editor):
+    # A restrição única (0007) não pode ser criada enquanto houver aluno com
+    # duas matrículas ativas no mesmo ano: encerre as excedentes antes
+    Matricula = apps.get_model('academic', 'Matricula')
+    duplicadas = list(
+        Matricula.objects.filter(status='ATIVA')
+        .values('aluno_id', 'ano_letivo_id')
+        .annotate(total=models.Count('id'))
+        .filter(total__gt=1)
+        .values_list('aluno_id', 'ano_letivo_id')[:20]
+    )
+    if duplicadas:
+        raise RuntimeError(
+            "Alunos com mais de uma matrícula ATIVA no mesmo ano letivo "
+            f"(aluno_id, ano_letivo_id), até 20: {duplicadas}"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0005_matricula_ativa_idx'),
+        ('pedagogical', '0002_zoneamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matricula',
+            name='ano_letivo',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matriculas', to='pedagogical.anoletivo'),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE academic_matricula m SET ano_letivo_id = t.ano_letivo_id
+            FROM academic_turma t
+            WHERE t.id = m.turma_id AND m.ano_letivo_id IS NULL
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(verificar_duplicadas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='matricula',
+            name='ano_letivo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matriculas', to='pedagogical.anoletivo'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:58
+
+from django.contrib.postgres.operations import RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Índices criados/removidos com CONCURRENTLY: a tabela de matrículas
+    # continua aceitando escritas durante a migração
+    atomic = False
+
+    dependencies = [
+        ('academic', '0006_matricula_ano_letivo'),
+        ('pedagogical', '0002_zoneamento'),
+        ('people', '0003_aluno_escola_zoneamento'),
+    ]
+
+    operations = [
+        # UniqueConstraint com condition é um índice único parcial no Postgres
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddConstraint(
+                    model_name='matricula',
+                    constraint=models.UniqueConstraint(condition=models.Q(('status', 'ATIVA')), fields=('aluno', 'ano_letivo'), include=('turma',), name='matricula_ativa_unica_por_ano'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'CREATE UNIQUE INDEX CONCURRENTLY "matricula_ativa_unica_por_ano" ON "academic_matricula" '
+                    '("aluno_id", "ano_letivo_id") INCLUDE ("turma_id") WHERE "status" = \'ATIVA\';',
+                    reverse_sql='DROP INDEX CONCURRENTLY IF EXISTS "matricula_ativa_unica_por_ano";',
+                ),
+            ],
+        ),
+        # O índice único já atende a busca da matrícula ativa do aluno
+        RemoveIndexConcurrently(
+            model_name='matricula',
+            name='matricula_aluno_ativa_idx',
+        ),
+    ]
@@ -7,6 +7,7 @@ class Turma(models.Model):
     ano_letivo = models.ForeignKey(AnoLetivo, on_delete=models.CASCADE, related_name='turmas')
     matriz_curricular = models.ForeignKey(MatrizCurricular, on_delete=models.PROTECT)
     turno = models.CharField(max_length=20, choices=[('M', 'Matutino'), ('V', 'Vespertino'), ('N', 'Noturno'), ('I', 'Integral')])
+    vagas = models.PositiveIntegerField(default=35) # capacidade usada na alocação da fila
     
     def __str__(self):
         return f"{self.nome} - {self.ano_letivo} ({self.turno})"
@@ -20,11 +21,48 @@ class Matricula(models.Model):
 
     aluno = models.ForeignKey(Aluno, on_delete=models.CASCADE, related_name='matriculas')
     turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='matriculas')
+    # Cópia de turma.ano_letivo, para a restrição de uma matrícula ativa por ano
+    # (o índice não alcança a turma). Quem cria matrículas em lote deve preenchê-lo.
+    ano_letivo = models.ForeignKey(AnoLetivo, on_delete=models.CASCADE, related_name='matriculas')
     data_matricula = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.ATIVA)
     
     class Meta:
         unique_together = ('aluno', 'turma') # Prevent duplicate enrollment in SAME class
+        constraints = [
+            # Uma matrícula ATIVA por aluno e ano letivo. O índice também atende a
+            # busca da matrícula ativa do aluno (portal, boletim)
+            models.UniqueConstraint(
+                fields=['aluno', 'ano_letivo'], include=['turma'], condition=models.Q(status='ATIVA'),
+                name='matricula_ativa_unica_por_ano'
+            ),
+        ]
+        indexes = [
+            # Só as ATIVAs da turma: diários, conselho, boletins em lote
+            models.Index(fields=['turma'], include=['aluno'], condition=models.Q(status='ATIVA'), name='matricula_turma_ativa_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        # Para o save() saber se a turma mudou (None se turma_id veio adiado)
+        instancia._turma_id_carregada = instancia.__dict__.get('turma_id')
+        return instancia
+
+    def save(self, *args, **kwargs):
+        # ano_letivo é recopiado da turma quando falta, quando a turma está em
+        # memória (sem consulta) ou quando turma_id mudou desde a leitura
+        if self.turma_id is not None and (
+            self.ano_letivo_id is None
+            or Matricula.turma.is_cached(self)
+            or self.turma_id != getattr(self, '_turma_id_carregada', self.turma_id)
+        ):
+            self.ano_letivo_id = self.turma.ano_letivo_id
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and {'turma', 'turma_id'} & set(update_fields):
+                kwargs['update_fields'] = {*update_fields, 'ano_letivo'}
+        super().save(*args, **kwargs)
+        self._turma_id_carregada = self.turma_id
 
     def __str__(self):
         return f"{self.aluno} -> {self.turma}"
@@ -40,5 +78,12 @@ class FilaEspera(models.Model):
     data_solicitacao = models.DateField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.AGUARDANDO)
 
+    class Meta:
+        indexes = [
+            # Ordem da fila (keyset) com e sem filtro de status
+            models.Index(fields=['data_solicitacao', 'id'], name='fila_data_idx'),
+            models.Index(fields=['status', 'data_solicitacao', 'id'], name='fila_status_data_idx'),
+        ]
+
     def __str__(self):
         return f"{self.aluno} - {self.status}"
@@ -0,0 +1,190 @@
+"""
+Rematrícula em lote (virada de ano letivo).
+
+Recebe um mapeamento turma de origem -> turma de destino (101 -> 201, ...)
+e, em uma transação:
+
+1. cria a matrícula ATIVA de cada aluno ativo de uma turma de origem na
+   turma de destino correspondente (um INSERT ... SELECT com o mapeamento
+   passado como unnest de dois arrays);
+2. encerra como CONCLUIDO as matrículas ativas do ano de origem (um UPDATE).
+
+Alunos que já têm matrícula ativa no ano de destino, ou já estão na turma
+de destino, não ganham matrícula nova e aparecem como conflito. No dry-run
+tudo é executado e desfeito no fim, então os números são os mesmos da
+execução real.
+
+Os dois comandos devolvem (id, aluno_id, escola_id) de cada matrícula: os
+signals em lote já recebem os totais por escola e os alunos afetados, sem
+voltar ao banco com centenas de milhares de IDs.
+"""
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.db import connection, transaction
+
+from pedagogical.models import AnoLetivo
+from .models import Matricula, Turma
+from .signals import matriculas_criadas, matriculas_encerradas
+
+
+class RematriculaInvalida(Exception):
+    pass
+
+
+@dataclass
+class Conflito:
+    matricula_id: int
+    aluno_id: int
+    motivo: str
+
+
+@dataclass
+class ResultadoRematricula:
+    dry_run: bool
+    criadas: int = 0
+    encerradas: int = 0
+    conflitos: list = field(default_factory=list)
+    segundos: float = 0.0
+
+
+def _tabelas():
+    return {
+        'matricula': Matricula._meta.db_table,
+        'turma': Turma._meta.db_table,
+        'ano_letivo': AnoLetivo._meta.db_table,
+    }
+
+
+# Matrícula de origem que não pode ir para a turma de destino
+_SQL_CONFLITO = """
+    EXISTS (
+        SELECT 1 FROM {matricula} x
+        WHERE x.aluno_id = m.aluno_id
+          AND (x.turma_id = mapa.destino
+               OR (x.status = %(ativa)s AND x.ano_letivo_id = td.ano_letivo_id))
+    )
+"""
+
+_SQL_ORIGEM = """
+    FROM {matricula} m
+    JOIN unnest(%(origens)s::bigint[], %(destinos)s::bigint[]) AS mapa(origem, destino)
+      ON mapa.origem = m.turma_id
+    JOIN {turma} td ON td.id = mapa.destino
+    WHERE m.status = %(ativa)s
+"""
+
+
+def _sql_conflitos():
+    t = _tabelas()
+    return f"""
+        SELECT m.id, m.aluno_id,
+               CASE WHEN EXISTS (
+                   SELECT 1 FROM {t['matricula']} x WHERE x.aluno_id = m.aluno_id AND x.turma_id = mapa.destino
+               ) THEN 'Aluno já está na turma de destino.'
+               ELSE 'Aluno já possui matrícula ativa no ano de destino.' END
+        {_SQL_ORIGEM.format(**t)}
+          AND {_SQL_CONFLITO.format(**t)}
+        ORDER BY m.id
+    """
+
+
+def _sql_criar():
+    t = _tabelas()
+    # DISTINCT ON: um aluno ativo em duas turmas de origem ganha uma só matrícula
+    return f"""
+        WITH criadas AS (
+            INSERT INTO {t['matricula']} (aluno_id, turma_id, ano_letivo_id, data_matricula, status)
+            SELECT DISTINCT ON (m.aluno_id) m.aluno_id, mapa.destino, td.ano_letivo_id, CURRENT_DATE, %(ativa)s
+            {_SQL_ORIGEM.format(**t)}
+              AND NOT {_SQL_CONFLITO.format(**t)}
+            ORDER BY m.aluno_id, m.id
+            RETURNING id, aluno_id, ano_letivo_id
+        )
+        SELECT criadas.id, criadas.aluno_id, al.escola_id
+        FROM criadas JOIN {t['ano_letivo']} al ON al.id = criadas.ano_letivo_id
+    """
+
+
+def _sql_encerrar(somente_mapeadas):
+    t = _tabelas()
+    filtro = "AND m.turma_id = ANY(%(origens)s)" if somente_mapeadas else ""
+    return f"""
+        UPDATE {t['matricula']} m SET status = %(concluido)s
+        FROM {t['ano_letivo']} al
+        WHERE al.id = m.ano_letivo_id
+          AND m.ano_letivo_id = ANY(%(anos_origem)s)
+          AND m.status = %(ativa)s
+          {filtro}
+        RETURNING m.id, m.aluno_id, al.escola_id
+    """
+
+
+def validar(mapeamento, ano_origem_id=None, ano_destino_id=None):
+    """
+    Confere que as turmas existem e que origem e destino são de anos letivos
+    diferentes (e, se informados, dos anos esperados). Devolve o conjunto de
+    anos letivos de origem.
+    """
+    if not mapeamento:
+        raise RematriculaInvalida("Mapeamento de turmas vazio.")
+    turmas = set(mapeamento) | set(mapeamento.values())
+    ano_da_turma = dict(Turma.objects.filter(id__in=turmas).values_list('id', 'ano_letivo_id'))
+    faltando = sorted(turmas - set(ano_da_turma))
+    if faltando:
+        raise RematriculaInvalida(f"Turmas não encontradas: {faltando}")
+
+    for origem, destino in mapeamento.items():
+        if ano_da_turma[origem] == ano_da_turma[destino]:
+            raise RematriculaInvalida(f"Turmas {origem} e {destino} são do mesmo ano letivo.")
+        if ano_origem_id and ano_da_turma[origem] != ano_origem_id:
+            raise RematriculaInvalida(f"Turma {origem} não pertence ao ano letivo de origem.")
+        if ano_destino_id and ano_da_turma[destino] != ano_destino_id:
+            raise RematriculaInvalida(f"Turma {destino} não pertence ao ano letivo de destino.")
+    return {ano_da_turma[o] for o in mapeamento}
+
+
+def rematricular(mapeamento, ano_origem_id=None, ano_destino_id=None, encerrar_sem_destino=True, dry_run=False):
+    """
+    mapeamento: {turma_origem_id: turma_destino_id}.
+    encerrar_sem_destino: encerra também as matrículas ativas de turmas do
+    ano de origem que não estão no mapeamento (ex.: último ano da escola).
+    """
+    inicio = time.perf_counter()
+    anos_origem = validar(mapeamento, ano_origem_id, ano_destino_id)
+    if ano_origem_id:
+        anos_origem = {ano_origem_id}
+
+    params = {
+        'ativa': Matricula.Status.ATIVA,
+        'concluido': Matricula.Status.CONCLUIDO,
+        'origens': list(mapeamento),
+        'destinos': list(mapeamento.values()),
+        'anos_origem': sorted(anos_origem),
+    }
+    resultado = ResultadoRematricula(dry_run=dry_run)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_sql_conflitos(), params)
+        resultado.conflitos = [Conflito(*linha) for linha in cursor.fetchall()]
+
+        cursor.execute(_sql_criar(), params)
+        criadas = cursor.fetchall()
+        cursor.execute(_sql_encerrar(not encerrar_sem_destino), params)
+        encerradas = cursor.fetchall()
+
+        resultado.criadas = len(criadas)
+        resultado.encerradas = len(encerradas)
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            for signal, linhas in ((matriculas_encerradas, encerradas), (matriculas_criadas, criadas)):
+                signal.send(
+                    sender=Matricula,
+                    matricula_ids={m for m, _, _ in linhas},
+                    aluno_ids={a for _, a, _ in linhas},
+                    por_escola=Counter(e for _, _, e in linhas),
+                )
+
+    resultado.segundos = time.perf_counter() - inicio
+    return resultado
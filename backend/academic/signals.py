@@ -0,0 +1,17 @@
+"""
+Signals de alto nível de matrícula.
+
+matriculas_criadas / matriculas_encerradas avisam que matrículas entraram
+ou saíram do status ATIVA em lote (bulk_create e update() não disparam
+post_save). Contadores, ranking de risco e cache do portal escutam estes
+signals além dos post_save de Matricula.
+
+Quem já tem os dados à mão (ex.: o RETURNING da rematrícula) manda também
+aluno_ids e por_escola; sem eles, os receivers consultam pelas matrículas.
+"""
+from django.dispatch import Signal
+
+# kwargs: matricula_ids (set[int]); opcionais: aluno_ids (set[int]),
+# por_escola ({escola_id: quantidade de matrículas})
+matriculas_criadas = Signal()
+matriculas_encerradas = Signal()
@@ -0,0 +1,298 @@
+import io
+import math
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from academic.models import Matricula, Turma
+from diary.models import Aula, Avaliacao, Frequencia, Nota
+from pedagogical import zoneamento
+from pedagogical.models import AnoLetivo, Disciplina, Escola, Etapa, MatrizCurricular, NivelEnsino, Zoneamento
+from people.models import Aluno, Pessoa
+from reports import contadores
+from sge import cache_http
+
+PRENOMES = [
+    "Ana", "Maria", "João", "Pedro", "Lucas", "Julia", "Gabriel", "Beatriz", "Mateus", "Larissa",
+    "Rafael", "Camila", "Gustavo", "Fernanda", "Felipe", "Mariana", "Bruno", "Letícia", "Thiago", "Amanda",
+    "Davi", "Isabela", "Arthur", "Sofia", "Heitor", "Helena", "Miguel", "Valentina", "Enzo", "Laura",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+    "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Soares", "Fernandes", "Vieira", "Barbosa",
+    "Rocha", "Dias", "Nascimento", "Andrade", "Moreira", "Nunes", "Marques", "Machado", "Mendes", "Freitas",
+]
+PATRONOS = [
+    "Tiradentes", "Monteiro Lobato", "Cecília Meireles", "Santos Dumont", "Paulo Freire", "Rui Barbosa",
+    "Carlos Drummond", "Anísio Teixeira", "Cora Coralina", "Machado de Assis", "Darcy Ribeiro", "Vital Brazil",
+]
+DISCIPLINAS = [("Matemática", "MAT"), ("Português", "POR"), ("História", "HIS"), ("Geografia", "GEO"), ("Ciências", "CIE")]
+RACAS = [c for c, _ in Pessoa.RacaCor.choices]
+BAIRROS_POR_ESCOLA = 3
+ETAPAS = 4
+
+
+def _cpf(base):
+    """CPF válido (com dígitos verificadores) a partir de um número de até 9 dígitos."""
+    digitos = [int(d) for d in f"{base % 10**9:09d}"]
+    for tamanho in (9, 10):
+        soma = sum(d * peso for d, peso in zip(digitos, range(tamanho + 1, 1, -1)))
+        resto = soma * 10 % 11
+        digitos.append(0 if resto == 10 else resto)
+    return ''.join(map(str, digitos))
+
+
+def _dias_letivos(inicio, n):
+    dias = []
+    dia = inicio
+    while len(dias) < n:
+        if dia.weekday() < 5:
+            dias.append(dia)
+        dia += timedelta(days=1)
+    return dias
+
+
+def _reservar_ids(cursor, modelo, n):
+    """Reserva n ids na sequência da tabela; devolve o primeiro. Rodar com a base parada."""
+    tabela = modelo._meta.db_table
+    cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", [tabela])
+    inicio = cursor.fetchone()[0]
+    cursor.execute("SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)", [tabela, inicio + n - 1])
+    return inicio
+
+
+def _copiar(cursor, modelo, colunas, linhas, lote):
+    """COPY das linhas (já no formato texto do COPY, sem o \\n) em blocos de `lote`."""
+    sql = f"COPY {modelo._meta.db_table} ({', '.join(colunas)}) FROM STDIN"
+    total = 0
+    bloco = []
+    for linha in linhas:
+        bloco.append(linha)
+        if len(bloco) >= lote:
+            cursor.copy_expert(sql, io.StringIO('\n'.join(bloco) + '\n'))
+            total += len(bloco)
+            bloco = []
+    if bloco:
+        cursor.copy_expert(sql, io.StringIO('\n'.join(bloco) + '\n'))
+        total += len(bloco)
+    return total
+
+
+@contextmanager
+def _sem_fks(cursor, modelos):
+    """
+    Remove as FKs das tabelas durante a carga e as recria no fim: a recriação
+    valida cada FK com uma consulta só, em vez de um trigger por linha no commit.
+    """
+    tabelas = [m._meta.db_table for m in modelos]
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname, pg_get_constraintdef(oid) FROM pg_constraint "
+        "WHERE contype = 'f' AND conrelid::regclass::text = ANY(%s)",
+        [tabelas]
+    )
+    fks = cursor.fetchall()
+    # Dispara as verificações pendentes (bulk_create anteriores): ALTER TABLE não
+    # roda com eventos de trigger pendentes
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    for tabela, nome, _ in fks:
+        cursor.execute(f'ALTER TABLE {tabela} DROP CONSTRAINT "{nome}"')
+    yield
+    for tabela, nome, definicao in fks:
+        cursor.execute(f'ALTER TABLE {tabela} ADD CONSTRAINT "{nome}" {definicao}')
+
+
+class Command(BaseCommand):
+    help = 'Gera massa de dados sintética (escolas, turmas, alunos, aulas, frequências, notas) para carga e benchmarks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--escolas', type=int, default=10)
+        parser.add_argument('--turmas-por-escola', type=int, default=12)
+        parser.add_argument('--alunos', type=int, default=3000, help='Total de alunos, distribuídos entre as turmas')
+        parser.add_argument('--avaliacoes', type=int, default=8, help='Avaliações por turma (as disciplinas se revezam)')
+        parser.add_argument('--dias', type=int, default=100, help='Dias letivos com chamada lançada, por turma')
+        parser.add_argument('--ano', type=int, default=date.today().year)
+        parser.add_argument('--seed', type=int, default=42, help='Mesma seed, mesma massa (exceto ids)')
+        parser.add_argument('--lote', type=int, default=50000, help='Linhas por COPY')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.lote = options['lote']
+        self.ano = options['ano']
+        inicio = time.perf_counter()
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            turmas = self._estrutura(options['escolas'], options['turmas_por_escola'], options['alunos'])
+            with _sem_fks(cursor, [Pessoa, Aluno, Matricula, Aula, Frequencia, Avaliacao, Nota]):
+                matriculas = self._alunos(cursor, turmas, options['alunos'])
+                self._aulas(cursor, turmas, matriculas, options['dias'])
+                self._avaliacoes(cursor, turmas, matriculas, options['avaliacoes'])
+
+            # COPY e bulk_create não disparam signals
+            contadores.reconciliar()
+            zoneamento.invalidar()
+            for modelo in (Escola, AnoLetivo, Disciplina, Turma, Zoneamento):
+                cache_http.invalidar(modelo)
+
+        with connection.cursor() as cursor:
+            for modelo in (Pessoa, Aluno, Matricula, Aula, Frequencia, Avaliacao, Nota):
+                cursor.execute(f"ANALYZE {modelo._meta.db_table}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Massa gerada em {time.perf_counter() - inicio:.1f}s. '
+            f'Rode recalcular_risco e recalcular_medias para o ranking de risco e as médias.'
+        ))
+
+    def _etapa(self, nome, inicio):
+        self.stdout.write(f"{nome}: {time.perf_counter() - inicio:.1f}s")
+
+    def _estrutura(self, n_escolas, turmas_por_escola, n_alunos):
+        inicio = time.perf_counter()
+        rng = self.rng
+        nivel, _ = NivelEnsino.objects.get_or_create(nome="Fundamental")
+        self.disciplinas = [
+            Disciplina.objects.get_or_create(codigo=codigo, defaults={'nome': nome})[0].id
+            for nome, codigo in DISCIPLINAS
+        ]
+
+        escolas = Escola.objects.bulk_create([
+            Escola(
+                nome=f"Escola Municipal {PATRONOS[i % len(PATRONOS)]}" + (f" {i // len(PATRONOS) + 1}" if i >= len(PATRONOS) else ""),
+                inep=f"31{rng.randrange(10**6):06d}",
+                endereco=f"Rua {rng.choice(SOBRENOMES)}, {rng.randrange(1, 999)}"
+            )
+            for i in range(n_escolas)
+        ])
+        self.data_inicio = date(self.ano, 2, 1)
+        anos = AnoLetivo.objects.bulk_create([
+            AnoLetivo(ano=self.ano, escola=e, data_inicio=self.data_inicio, data_fim=date(self.ano, 12, 15), ativo=True)
+            for e in escolas
+        ])
+        etapas = Etapa.objects.bulk_create([
+            Etapa(
+                nome=f"{b + 1}º Bimestre", ano_letivo=ano,
+                data_inicio=self.data_inicio + timedelta(days=b * 80),
+                data_fim=self.data_inicio + timedelta(days=(b + 1) * 80 - 1)
+            )
+            for ano in anos for b in range(ETAPAS)
+        ])
+        self.etapas = {}
+        for etapa in etapas:
+            self.etapas.setdefault(etapa.ano_letivo_id, []).append(etapa.id)
+        matrizes = MatrizCurricular.objects.bulk_create([
+            MatrizCurricular(nome="Matriz Fundamental", escola=e, nivel=nivel) for e in escolas
+        ])
+        MatrizCurricular.disciplinas.through.objects.bulk_create([
+            MatrizCurricular.disciplinas.through(matrizcurricular_id=m.id, disciplina_id=d)
+            for m in matrizes for d in self.disciplinas
+        ])
+        zonas = Zoneamento.objects.bulk_create([
+            Zoneamento(bairro=f"Bairro {e.id}-{k + 1}", escola=e) for e in escolas for k in range(BAIRROS_POR_ESCOLA)
+        ])
+        self.bairros = [z.bairro for z in zonas]
+        self.escola_do_bairro = {z.bairro: z.escola_id for z in zonas}
+
+        vagas = max(35, math.ceil(n_alunos / max(1, n_escolas * turmas_por_escola)) + 2)
+        turmas = Turma.objects.bulk_create([
+            Turma(
+                nome=f"{t % 9 + 1}º Ano {chr(ord('A') + t // 9)}",
+                ano_letivo=ano, matriz_curricular=matriz, turno='MV'[t % 2], vagas=vagas
+            )
+            for ano, matriz in zip(anos, matrizes) for t in range(turmas_por_escola)
+        ])
+        self._etapa(f"{len(escolas)} escolas, {len(turmas)} turmas", inicio)
+        return turmas
+
+    def _alunos(self, cursor, turmas, n):
+        """Pessoa, Aluno e uma Matricula ATIVA por aluno. Devolve {turma_id: [(matricula_id, perfil)]}."""
+        inicio = time.perf_counter()
+        rng = self.rng
+        pessoa_0 = _reservar_ids(cursor, Pessoa, n)
+        aluno_0 = _reservar_ids(cursor, Aluno, n)
+        matricula_0 = _reservar_ids(cursor, Matricula, n)
+
+        # Turma de cada aluno: distribuição uniforme, em ordem embaralhada
+        destino = [turmas[i % len(turmas)] for i in range(n)]
+        rng.shuffle(destino)
+
+        pessoas, alunos, matriculas = [], [], []
+        por_turma = {t.id: [] for t in turmas}
+        for i in range(n):
+            turma = destino[i]
+            serie = int(turma.nome.split('º')[0])
+            nascimento = date(self.ano - serie - 5, 1, 1) + timedelta(days=rng.randrange(365))
+            sobrenome = f"{rng.choice(SOBRENOMES)} {rng.choice(SOBRENOMES)}"
+            bairro = rng.choice(self.bairros)
+            pessoas.append(
+                f"{pessoa_0 + i}\t{rng.choice(PRENOMES)} {sobrenome}\t{_cpf(pessoa_0 + i)}\t{nascimento}\t"
+                f"{rng.choice(PRENOMES)} {sobrenome}\tRua {rng.choice(SOBRENOMES)}, {rng.randrange(1, 2000)}, {bairro}\t"
+                f"{rng.choice(RACAS)}\t{'t' if rng.random() < 0.02 else 'f'}"
+            )
+            alunos.append(
+                f"{aluno_0 + i}\t{pessoa_0 + i}\t{rng.randrange(10**10, 10**11)}\t{'t' if rng.random() < 0.2 else 'f'}\t"
+                f"{rng.randrange(10**11, 10**12)}\t{self.escola_do_bairro[bairro]}"
+            )
+            matriculas.append(
+                f"{matricula_0 + i}\t{aluno_0 + i}\t{turma.id}\t{turma.ano_letivo_id}\t{self.data_inicio - timedelta(days=rng.randrange(60))}\tATIVA"
+            )
+            # Perfil do aluno: média esperada (0-10) e probabilidade de presença
+            perfil = (min(10, max(0, rng.gauss(7, 1.5))), 0.95 if rng.random() < 0.85 else 0.7)
+            por_turma[turma.id].append((matricula_0 + i, perfil))
+
+        _copiar(cursor, Pessoa, ['id', 'nome', 'cpf', 'data_nascimento', 'nome_mae', 'endereco', 'raca_cor', 'deficiencia'], pessoas, self.lote)
+        _copiar(cursor, Aluno, ['id', 'pessoa_id', 'nis', 'transporte_escolar', 'codigo_inep', 'escola_zoneamento_id'], alunos, self.lote)
+        _copiar(cursor, Matricula, ['id', 'aluno_id', 'turma_id', 'ano_letivo_id', 'data_matricula', 'status'], matriculas, self.lote)
+        self._etapa(f"{n} alunos e matrículas", inicio)
+        return por_turma
+
+    def _aulas(self, cursor, turmas, matriculas, n_dias):
+        inicio = time.perf_counter()
+        rng = self.rng
+        dias = _dias_letivos(self.data_inicio, n_dias)
+        aula_0 = _reservar_ids(cursor, Aula, len(turmas) * len(dias))
+
+        aulas = (
+            f"{aula_0 + t * len(dias) + d}\t{turma.id}\t{dia}\tConteúdo da aula {d + 1}"
+            for t, turma in enumerate(turmas) for d, dia in enumerate(dias)
+        )
+        total_aulas = _copiar(cursor, Aula, ['id', 'turma_id', 'data', 'conteudo'], aulas, self.lote)
+
+        frequencias = (
+            f"{aula_0 + t * len(dias) + d}\t{matricula_id}\t{'t' if rng.random() < presenca else 'f'}"
+            for t, turma in enumerate(turmas)
+            for d in range(len(dias))
+            for matricula_id, (_, presenca) in matriculas[turma.id]
+        )
+        total = _copiar(cursor, Frequencia, ['aula_id', 'matricula_id', 'presente'], frequencias, self.lote)
+        self._etapa(f"{total_aulas} aulas, {total} frequências", inicio)
+
+    def _avaliacoes(self, cursor, turmas, matriculas, n_avaliacoes):
+        inicio = time.perf_counter()
+        rng = self.rng
+        avaliacao_0 = _reservar_ids(cursor, Avaliacao, len(turmas) * n_avaliacoes)
+
+        # Etapas de 80 dias a partir de data_inicio: a avaliação cai na etapa (dias // 80)
+        avaliacoes = (
+            f"{avaliacao_0 + t * n_avaliacoes + a}\t{turma.id}\t{self.disciplinas[a % len(self.disciplinas)]}\t"
+            f"Avaliação {a // len(self.disciplinas) + 1}\t{self.data_inicio + timedelta(days=20 + a * 15)}\t10.00\t"
+            + (str(self.etapas[turma.ano_letivo_id][(20 + a * 15) // 80]) if (20 + a * 15) // 80 < ETAPAS else r'\N')
+            + "\t1\tf"
+            for t, turma in enumerate(turmas) for a in range(n_avaliacoes)
+        )
+        total_avaliacoes = _copiar(
+            cursor, Avaliacao,
+            ['id', 'turma_id', 'disciplina_id', 'nome', 'data', 'valor_maximo', 'etapa_id', 'peso', 'recuperacao'],
+            avaliacoes, self.lote
+        )
+
+        # 1% sem nota lançada
+        notas = (
+            f"{avaliacao_0 + t * n_avaliacoes + a}\t{matricula_id}\t"
+            + (r'\N' if rng.random() < 0.01 else f"{min(10, max(0, rng.gauss(media, 1.5))):.1f}")
+            for t, turma in enumerate(turmas)
+            for a in range(n_avaliacoes)
+            for matricula_id, (media, _) in matriculas[turma.id]
+        )
+        total = _copiar(cursor, Nota, ['avaliacao_id', 'matricula_id', 'valor'], notas, self.lote)
+        self._etapa(f"{total_avaliacoes} avaliações, {total} notas", inicio)
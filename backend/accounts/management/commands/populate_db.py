@@ -77,7 +77,7 @@ class Command(BaseCommand):
                 
                 # Matricular em uma turma aleatória
                 turma = random.choice(turmas)
-                if not Matricula.objects.filter(aluno=aluno, turma__ano_letivo=ano_letivo, status='ATIVA').exists():
+                if not Matricula.objects.filter(aluno=aluno, ano_letivo=ano_letivo, status='ATIVA').exists():
                     Matricula.objects.create(aluno=aluno, turma=turma, status='ATIVA')
             
             # 7. Professor
@@ -158,9 +158,11 @@ class Command(BaseCommand):
             avaliacao, _ = Avaliacao.objects.get_or_create(
                 turma=turmas[0],
                 disciplina=disciplina_mat,
-                etapa=Etapa.objects.first(),
                 nome="Prova Bimestral 1",
-                defaults={'valor_total': 30.0, 'data': date(2026, 3, 10)}
+                defaults={
+                    'valor_maximo': 30.0, 'data': date(2026, 3, 10),
+                    'etapa': Etapa.objects.get(nome="1º Bimestre", ano_letivo=ano_letivo)
+                }
             )
             
             # Lançar notas para alunos da turma 0
@@ -12,7 +12,7 @@ class FrequenciaAdmin(admin.ModelAdmin):
 
 @admin.register(Avaliacao)
 class AvaliacaoAdmin(admin.ModelAdmin):
-    list_display = ('nome', 'turma', 'data', 'valor_maximo')
+    list_display = ('nome', 'turma', 'data', 'valor_maximo', 'etapa', 'peso', 'recuperacao')
 
 @admin.register(Nota)
 class NotaAdmin(admin.ModelAdmin):
@@ -1,8 +1,12 @@
+from decimal import Decimal
 from ninja import Router, Schema
+from django.db import transaction
 from django.shortcuts import get_object_or_404
 from typing import List
 from .models import Avaliacao, Nota
+from .signals import notas_alteradas
 from academic.models import Turma, Matricula
+from pedagogical.models import Etapa
 
 router = Router()
 
@@ -14,6 +18,9 @@ class AvaliacaoIn(Schema):
     nome: str
     data: str
     valor_maximo: float
+    etapa_id: int | None = None # sem etapa: a que contém a data (recuperação sem etapa é a final)
+    peso: float = 1
+    recuperacao: bool = False
 
 class AvaliacaoOut(Schema):
     id: int
@@ -21,6 +28,9 @@ class AvaliacaoOut(Schema):
     data: str
     valor_maximo: float
     disciplina_nome: str | None
+    etapa_id: int | None
+    peso: float
+    recuperacao: bool
 
 class NotaIn(Schema):
     matricula_id: int
@@ -41,18 +51,21 @@ class NotaOut(Schema):
 def listar_avaliacoes_turma(request, turma_id: int):
     turma = get_object_or_404(Turma, id=turma_id)
     avaliacoes = turma.avaliacoes.select_related('disciplina').all()
-    return [
-        {
-            "id": a.id,
-            "nome": a.nome,
-            "data": str(a.data),
-            "valor_maximo": a.valor_maximo,
-            "disciplina_nome": a.disciplina.nome if a.disciplina else "Geral"
-        }
-        for a in avaliacoes
-    ]
-
-@router.post("/avaliacoes", response={201: AvaliacaoOut})
+    return [_avaliacao_out(a) for a in avaliacoes]
+
+def _avaliacao_out(avaliacao):
+    return {
+        "id": avaliacao.id,
+        "nome": avaliacao.nome,
+        "data": str(avaliacao.data),
+        "valor_maximo": avaliacao.valor_maximo,
+        "disciplina_nome": avaliacao.disciplina.nome if avaliacao.disciplina else "Geral",
+        "etapa_id": avaliacao.etapa_id,
+        "peso": avaliacao.peso,
+        "recuperacao": avaliacao.recuperacao
+    }
+
+@router.post("/avaliacoes", response={201: AvaliacaoOut, 400: dict})
 def criar_avaliacao(request, payload: AvaliacaoIn):
     turma = get_object_or_404(Turma, id=payload.turma_id)
     disciplina = None
@@ -60,20 +73,27 @@ def criar_avaliacao(request, payload: AvaliacaoIn):
         from pedagogical.models import Disciplina
         disciplina = get_object_or_404(Disciplina, id=payload.disciplina_id)
 
+    etapas = Etapa.objects.filter(ano_letivo_id=turma.ano_letivo_id)
+    if payload.etapa_id:
+        etapa = get_object_or_404(etapas, id=payload.etapa_id)
+    elif payload.recuperacao:
+        etapa = None
+    else:
+        etapa = etapas.filter(data_inicio__lte=payload.data, data_fim__gte=payload.data).order_by('data_inicio').first()
+        if etapa is None:
+            return 400, {"message": f"Nenhuma etapa do ano letivo contém a data {payload.data}. Informe etapa_id."}
+
     avaliacao = Avaliacao.objects.create(
         turma=turma,
         disciplina=disciplina,
         nome=payload.nome,
         data=payload.data,
-        valor_maximo=payload.valor_maximo
+        valor_maximo=payload.valor_maximo,
+        etapa=etapa,
+        peso=payload.peso,
+        recuperacao=payload.recuperacao
     )
-    return 201, {
-        "id": avaliacao.id,
-        "nome": avaliacao.nome,
-        "data": str(avaliacao.data),
-        "valor_maximo": avaliacao.valor_maximo,
-        "disciplina_nome": avaliacao.disciplina.nome if avaliacao.disciplina else "Geral"
-    }
+    return 201, _avaliacao_out(avaliacao)
 
 @router.get("/avaliacoes/{avaliacao_id}/notas", response=List[NotaOut])
 def listar_notas_avaliacao(request, avaliacao_id: int):
@@ -97,20 +117,99 @@ def listar_notas_avaliacao(request, avaliacao_id: int):
         
     return resultado
 
-@router.post("/avaliacoes/{avaliacao_id}/notas", response={200: dict})
+class NotaRejeitada(Schema):
+    matricula_id: int
+    motivo: str
+
+class LancamentoNotasOut(Schema):
+    message: str
+    salvas: int
+    rejeitadas: List[NotaRejeitada]
+
+@router.post("/avaliacoes/{avaliacao_id}/notas", response={200: LancamentoNotasOut})
 def lancar_notas(request, avaliacao_id: int, payload: NotasLoteIn):
     avaliacao = get_object_or_404(Avaliacao, id=avaliacao_id)
-    
-    for item in payload.notas:
-        matricula = get_object_or_404(Matricula, id=item.matricula_id)
-        
-        Nota.objects.update_or_create(
-            avaliacao=avaliacao,
-            matricula=matricula,
-            defaults={'valor': item.valor}
+
+    # Se a mesma matrícula vier repetida vale a última (ON CONFLICT não aceita a chave duas vezes)
+    valores = {item.matricula_id: Decimal(str(item.valor)) for item in payload.notas}
+
+    # Uma consulta valida todas: matrícula ATIVA e da turma da avaliação
+    validas = set(Matricula.objects.filter(
+        id__in=valores.keys(),
+        turma_id=avaliacao.turma_id,
+        status=Matricula.Status.ATIVA
+    ).values_list('id', flat=True))
+
+    notas = []
+    rejeitadas = []
+    for matricula_id, valor in valores.items():
+        if matricula_id not in validas:
+            rejeitadas.append({"matricula_id": matricula_id, "motivo": "Matrícula não está ativa nesta turma."})
+        elif valor < 0 or valor > avaliacao.valor_maximo:
+            rejeitadas.append({"matricula_id": matricula_id, "motivo": f"Nota fora do intervalo 0 a {avaliacao.valor_maximo}."})
+        else:
+            notas.append(Nota(avaliacao=avaliacao, matricula_id=matricula_id, valor=valor))
+
+    # Um único INSERT ... ON CONFLICT (avaliacao, matricula) DO UPDATE
+    with transaction.atomic():
+        Nota.objects.bulk_create(
+            notas,
+            update_conflicts=True,
+            unique_fields=['avaliacao', 'matricula'],
+            update_fields=['valor']
         )
-        
-    return 200, {"message": "Notas lançadas com sucesso"}
+        notas_alteradas.send(sender=Nota, matricula_ids={n.matricula_id for n in notas})
+
+    return 200, {
+        "message": "Notas lançadas com sucesso" if not rejeitadas else "Notas lançadas com pendências",
+        "salvas": len(notas),
+        "rejeitadas": rejeitadas
+    }
+
+# --- Chamada (Aula + Frequência) ---
+from .chamada import ChamadaInvalida, registrar_chamadas
+
+class PresencaIn(Schema):
+    matricula_id: int
+    presente: bool
+
+class ChamadaIn(Schema):
+    turma_id: int
+    data: str
+    conteudo: str = ""
+    aula_id: int | None = None # Informado para corrigir uma chamada já feita
+    presencas: List[PresencaIn] = []
+
+class ChamadasLoteIn(Schema):
+    chamadas: List[ChamadaIn]
+
+class ChamadaOut(Schema):
+    aula_id: int
+    turma_id: int
+    data: str
+    presentes: int
+    ausentes: int
+    ignoradas: List[int] # matrículas informadas que não estão ativas na turma
+
+class ChamadasLoteOut(Schema):
+    chamadas: List[ChamadaOut]
+
+@router.post("/chamadas", response={201: ChamadaOut, 400: dict})
+def registrar_chamada(request, payload: ChamadaIn):
+    try:
+        resultado, = registrar_chamadas([payload])
+    except ChamadaInvalida as e:
+        return 400, {"message": e.motivo}
+    return 201, resultado
+
+@router.post("/chamadas/lote", response={201: ChamadasLoteOut, 400: dict})
+def registrar_chamadas_lote(request, payload: ChamadasLoteIn):
+    """Várias aulas/dias de uma vez (professor pondo o diário em dia no fim da semana)."""
+    try:
+        resultados = registrar_chamadas(payload.chamadas)
+    except ChamadaInvalida as e:
+        return 400, {"message": e.motivo, "indice": e.indice}
+    return 201, {"chamadas": resultados}
 
 # --- Plano de Aula ---
 from .models import PlanoAula
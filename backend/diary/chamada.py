@@ -0,0 +1,81 @@
+"""
+Registro de chamadas (Aula + Frequencia) em lote.
+
+Uma ou várias chamadas são gravadas com um número fixo de consultas:
+validação das turmas/aulas/matrículas, bulk_create/bulk_update das aulas
+e um único INSERT ... ON CONFLICT (aula, matricula) DO UPDATE das presenças.
+"""
+from django.db import transaction
+
+from academic.models import Matricula, Turma
+from .models import Aula, Frequencia
+from .signals import frequencias_alteradas
+
+
+class ChamadaInvalida(Exception):
+    def __init__(self, indice, motivo):
+        super().__init__(motivo)
+        self.indice = indice
+        self.motivo = motivo
+
+
+def registrar_chamadas(chamadas):
+    """
+    chamadas: lista de ChamadaIn. Alunos da turma que não vierem em
+    `presencas` ficam como presentes (padrão de Frequencia).
+    Tudo ou nada: qualquer chamada inválida levanta ChamadaInvalida.
+    Devolve uma lista de dicts (um por chamada, na mesma ordem).
+    """
+    turma_ids = {c.turma_id for c in chamadas}
+    aula_ids = {c.aula_id for c in chamadas if c.aula_id}
+
+    turmas_existentes = set(Turma.objects.filter(id__in=turma_ids).values_list('id', flat=True))
+    aulas_existentes = dict(Aula.objects.filter(id__in=aula_ids).values_list('id', 'turma_id'))
+
+    roster = {}
+    for turma_id, matricula_id in Matricula.objects.filter(
+        turma_id__in=turma_ids,
+        status=Matricula.Status.ATIVA
+    ).values_list('turma_id', 'id'):
+        roster.setdefault(turma_id, set()).add(matricula_id)
+
+    for indice, c in enumerate(chamadas):
+        if c.turma_id not in turmas_existentes:
+            raise ChamadaInvalida(indice, f"Turma {c.turma_id} não encontrada.")
+        if c.aula_id and aulas_existentes.get(c.aula_id) != c.turma_id:
+            raise ChamadaInvalida(indice, f"Aula {c.aula_id} não pertence à turma {c.turma_id}.")
+
+    with transaction.atomic():
+        aulas = [Aula(id=c.aula_id, turma_id=c.turma_id, data=c.data, conteudo=c.conteudo) for c in chamadas]
+        existentes = [a for a in aulas if a.id is not None]
+        Aula.objects.bulk_create([a for a in aulas if a.id is None])
+        Aula.objects.bulk_update(existentes, ['data', 'conteudo'])
+
+        # (aula, matricula) -> presente; a última ocorrência vence
+        frequencias = {}
+        resultados = []
+        for c, aula in zip(chamadas, aulas):
+            matriculas = roster.get(c.turma_id, set())
+            informadas = {p.matricula_id: p.presente for p in c.presencas}
+            for matricula_id in matriculas:
+                frequencias[(aula.id, matricula_id)] = informadas.get(matricula_id, True)
+            resultados.append({
+                "aula_id": aula.id,
+                "turma_id": c.turma_id,
+                "data": str(c.data),
+                "presentes": sum(1 for m in matriculas if informadas.get(m, True)),
+                "ausentes": sum(1 for m in matriculas if not informadas.get(m, True)),
+                "ignoradas": sorted(set(informadas) - matriculas)
+            })
+
+        Frequencia.objects.bulk_create(
+            [Frequencia(aula_id=aula_id, matricula_id=matricula_id, presente=presente)
+             for (aula_id, matricula_id), presente in frequencias.items()],
+            update_conflicts=True,
+            unique_fields=['aula', 'matricula'],
+            update_fields=['presente'],
+            batch_size=5000
+        )
+        frequencias_alteradas.send(sender=Frequencia, matricula_ids={m for _, m in frequencias})
+
+    return resultados
@@ -0,0 +1,79 @@
+import json
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from academic.models import Matricula, Turma
+from diary.models import Aula
+
+MARCA = '[bench_chamada]'
+
+
+class Command(BaseCommand):
+    help = 'Mede chamadas/s com vários professores gravando a frequência ao mesmo tempo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--professores', type=int, default=8, help='Threads simultâneas (uma turma cada)')
+        parser.add_argument('--dias', type=int, default=20, help='Chamadas por professor')
+        parser.add_argument('--lote', type=int, default=1, help='Chamadas por requisição (1 = /chamadas, >1 = /chamadas/lote)')
+
+    def handle(self, *args, **options):
+        turmas = list(Turma.objects.filter(
+            matriculas__status=Matricula.Status.ATIVA
+        ).distinct().values_list('id', flat=True)[:options['professores']])
+        if not turmas:
+            self.stderr.write('Nenhuma turma com matrículas ativas. Popule a base antes.')
+            return
+
+        latencias = []
+        erros = []
+        lock = threading.Lock()
+
+        def professor(turma_id):
+            client = Client()
+            ids = list(Matricula.objects.filter(turma_id=turma_id, status=Matricula.Status.ATIVA).values_list('id', flat=True))
+            chamadas = [
+                {
+                    "turma_id": turma_id,
+                    "data": str(date(2026, 3, 1) + timedelta(days=d)),
+                    "conteudo": MARCA,
+                    "presencas": [{"matricula_id": m, "presente": (m + d) % 7 != 0} for m in ids]
+                }
+                for d in range(options['dias'])
+            ]
+            for i in range(0, len(chamadas), options['lote']):
+                bloco = chamadas[i:i + options['lote']]
+                if options['lote'] == 1:
+                    url, corpo = '/api/diary/chamadas', bloco[0]
+                else:
+                    url, corpo = '/api/diary/chamadas/lote', {"chamadas": bloco}
+                inicio = time.perf_counter()
+                r = client.post(url, json.dumps(corpo), content_type='application/json')
+                with lock:
+                    latencias.append(time.perf_counter() - inicio)
+                    if r.status_code != 201:
+                        erros.append(r.status_code)
+            connections.close_all()
+
+        threads = [threading.Thread(target=professor, args=(t,)) for t in turmas]
+        inicio = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        segundos = time.perf_counter() - inicio
+
+        aulas = Aula.objects.filter(conteudo=MARCA)
+        total_chamadas = aulas.count()
+        total_presencas = sum(a.frequencias.count() for a in aulas)
+        aulas.delete()
+
+        ms = sorted(x * 1000 for x in latencias)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(turmas)} professores, {total_chamadas} chamadas ({total_presencas} presenças) em {segundos:.2f}s: "
+            f"{total_chamadas / segundos:.1f} chamadas/s, {total_presencas / segundos:.0f} presenças/s | "
+            f"req p50 {statistics.median(ms):.1f} ms, p95 {ms[int(len(ms) * 0.95) - 1]:.1f} ms | erros: {len(erros)}"
+        ))
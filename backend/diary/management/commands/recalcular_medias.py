@@ -0,0 +1,12 @@
+import time
+from django.core.management.base import BaseCommand
+from diary import medias
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os resultados por disciplina/etapa de todas as matrículas ativas (após mudar critérios ou carregar dados)'
+
+    def handle(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        total = medias.recalcular()
+        self.stdout.write(self.style.SUCCESS(f'{total} resultados gravados em {time.perf_counter() - inicio:.2f}s.'))
@@ -0,0 +1,266 @@
+"""
+Motor de médias: resultado por (matrícula, disciplina, etapa) e anual.
+
+As notas de um conjunto de matrículas (turma, escola, lote do recálculo)
+saem de uma consulta e viram arrays NumPy; cada fórmula é uma redução por
+grupo (np.bincount), sem laço em Python por nota nem aritmética de Decimal.
+
+Etapa, sobre as avaliações regulares da disciplina (critério do ano letivo):
+  MEDIA_PONDERADA  Σ peso·(valor/valor_maximo) / Σ peso, na escala nota_maxima
+  SOMA             Σ valor, sobre Σ valor_maximo pontos
+  MELHORES         média ponderada das melhores_notas notas
+Ano: formula_anual sobre os resultados das etapas, com o peso da Etapa
+(SOMA soma os pontos das etapas; MELHORES usa as melhores_etapas).
+
+Avaliação de recuperação (recuperacao=True) da etapa, ou final quando não
+tem etapa, não entra na fórmula: substitui o aproveitamento se for maior
+(ou é feita a média com ele, conforme o critério). Avaliações regulares sem
+etapa (ano sem Etapas cadastradas, ou lançadas antes delas) formam um grupo
+à parte, calculado como uma etapa: não gera resultado de etapa, mas entra no
+resultado anual como mais uma etapa, de peso 1.
+
+Os resultados ficam em ResultadoDisciplina; notas_alteradas agenda o
+recálculo só das matrículas afetadas, quando a transação é confirmada.
+"""
+import threading
+
+import numpy as np
+from django.db import connection, transaction
+from django.db.models import FloatField, Value
+from django.db.models.functions import Cast, Coalesce
+
+from academic.models import Matricula
+from pedagogical.models import CriterioAvaliacao, Etapa
+from .models import Nota, ResultadoDisciplina
+
+Formula = CriterioAvaliacao.Formula
+
+SEM = -1 # disciplina/etapa nula nos arrays
+LOTE = 5000 # matrículas por cálculo no recálculo completo
+
+
+def _notas(matricula_ids):
+    """Notas lançadas das matrículas, em colunas (arrays NumPy)."""
+    linhas = Nota.objects.filter(
+        matricula_id__in=matricula_ids, valor__isnull=False, avaliacao__valor_maximo__gt=0
+    ).values_list(
+        'matricula__ano_letivo_id', 'matricula_id',
+        Coalesce('avaliacao__disciplina_id', Value(SEM)), Coalesce('avaliacao__etapa_id', Value(SEM)),
+        Cast('valor', FloatField()), Cast('avaliacao__valor_maximo', FloatField()), Cast('avaliacao__peso', FloatField()),
+        'avaliacao__recuperacao',
+    ).order_by()
+    colunas = list(zip(*linhas)) or [()] * 8
+    ano, matricula, disciplina, etapa = (np.array(c, dtype=np.int64) for c in colunas[:4])
+    valor, maximo, peso = (np.array(c, dtype=np.float64) for c in colunas[4:7])
+    return {
+        'ano': ano, 'matricula': matricula, 'disciplina': disciplina, 'etapa': etapa,
+        'aproveitamento': valor / maximo, 'maximo': maximo, 'peso': peso,
+        'recuperacao': np.array(colunas[7], dtype=bool),
+    }
+
+
+def _agrupar(*colunas):
+    """Chaves distintas (uma linha por grupo) e o grupo de cada item."""
+    chaves, grupo = np.unique(np.stack(colunas, axis=1), axis=0, return_inverse=True)
+    return chaves, grupo.reshape(-1)
+
+
+def _combinar(grupo, n_grupos, aproveitamento, peso, maximo, formula, melhores, nota_maxima):
+    """
+    Aplica a fórmula aos itens (notas ou resultados de etapa) de cada grupo.
+    Devolve (aproveitamento, maximo) por grupo; nan no grupo sem itens.
+    """
+    if formula == Formula.MELHORES:
+        # Dentro de cada grupo, do melhor para o pior; a posição é a distância ao início do grupo
+        ordem = np.lexsort((-aproveitamento, grupo))
+        ordenado = grupo[ordem]
+        posicao = np.empty(len(ordem), dtype=np.int64)
+        posicao[ordem] = np.arange(len(ordem)) - np.searchsorted(ordenado, ordenado)
+        manter = posicao < melhores
+        grupo, aproveitamento, peso, maximo = grupo[manter], aproveitamento[manter], peso[manter], maximo[manter]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        if formula == Formula.SOMA:
+            pontos = np.bincount(grupo, maximo, n_grupos)
+            return np.bincount(grupo, aproveitamento * maximo, n_grupos) / pontos, pontos
+        media = np.bincount(grupo, peso * aproveitamento, n_grupos) / np.bincount(grupo, peso, n_grupos)
+    return media, np.full(n_grupos, nota_maxima)
+
+
+def _recuperar(aproveitamento, grupo, recuperacao, modo):
+    """Aplica a maior nota de recuperação de cada grupo. Devolve (aproveitamento, recuperado)."""
+    maior = np.full(len(aproveitamento), np.nan)
+    np.fmax.at(maior, grupo, recuperacao)
+    if modo == CriterioAvaliacao.Recuperacao.MEDIA:
+        novo = (aproveitamento + maior) / 2
+    else:
+        novo = maior
+    with np.errstate(invalid='ignore'):
+        recuperado = novo > aproveitamento # falso onde um dos dois é nan
+    return np.where(recuperado, novo, aproveitamento), recuperado
+
+
+def _calcular_ano(criterio, n, pesos_etapa):
+    nota_maxima = float(criterio.nota_maxima)
+
+    # Etapas: grupos (matrícula, disciplina, etapa) das notas regulares e das
+    # recuperações de etapa; as regulares sem etapa ficam no grupo etapa=SEM
+    da_etapa = n['etapa'] != SEM
+    e = {k: v[da_etapa | ~n['recuperacao']] for k, v in n.items()}
+    chaves, grupo = _agrupar(e['matricula'], e['disciplina'], e['etapa'])
+    regular = ~e['recuperacao']
+    aproveitamento, maximo = _combinar(
+        grupo[regular], len(chaves), e['aproveitamento'][regular], e['peso'][regular], e['maximo'][regular],
+        criterio.formula_etapa, criterio.melhores_notas, nota_maxima
+    )
+    aproveitamento, recuperado = _recuperar(
+        aproveitamento, grupo[~regular], e['aproveitamento'][~regular], criterio.recuperacao
+    )
+    calculado = ~np.isnan(aproveitamento)
+    etapas = chaves[calculado]
+    aproveitamento, maximo, recuperado = aproveitamento[calculado], maximo[calculado], recuperado[calculado]
+
+    # Ano: grupos (matrícula, disciplina) dos resultados das etapas e das recuperações finais
+    final = n['recuperacao'] & ~da_etapa
+    anuais, grupo = _agrupar(
+        np.concatenate([etapas[:, 0], n['matricula'][final]]),
+        np.concatenate([etapas[:, 1], n['disciplina'][final]]),
+    )
+    distintas, posicao = np.unique(etapas[:, 2], return_inverse=True)
+    peso_etapa = np.array([float(pesos_etapa.get(i, 1)) for i in distintas.tolist()], dtype=np.float64)[posicao]
+    k = len(etapas)
+    aproveitamento_ano, maximo_ano = _combinar(
+        grupo[:k], len(anuais), aproveitamento, peso_etapa, maximo,
+        criterio.formula_anual, criterio.melhores_etapas, nota_maxima
+    )
+    aproveitamento_ano, recuperado_ano = _recuperar(
+        aproveitamento_ano, grupo[k:], n['aproveitamento'][final], criterio.recuperacao
+    )
+    calculado = ~np.isnan(aproveitamento_ano)
+    anuais = anuais[calculado]
+
+    # O grupo sem etapa só serve ao resultado anual
+    com_etapa = etapas[:, 2] != SEM
+    etapas = etapas[com_etapa]
+    return {
+        'matricula': np.concatenate([etapas[:, 0], anuais[:, 0]]),
+        'disciplina': np.concatenate([etapas[:, 1], anuais[:, 1]]),
+        'etapa': np.concatenate([etapas[:, 2], np.full(len(anuais), SEM)]),
+        'aproveitamento': np.concatenate([aproveitamento[com_etapa], aproveitamento_ano[calculado]]),
+        'maximo': np.concatenate([maximo[com_etapa], maximo_ano[calculado]]),
+        'recuperado': np.concatenate([recuperado[com_etapa], recuperado_ano[calculado]]),
+    }
+
+
+def calcular(matricula_ids):
+    """
+    Calcula, sem gravar, os resultados das matrículas. Devolve colunas (arrays):
+    matricula, disciplina, etapa (SEM = resultado anual ou sem disciplina),
+    aproveitamento (0 a 1), maximo, valor (= aproveitamento * maximo) e recuperado.
+    """
+    n = _notas(matricula_ids)
+    anos = np.unique(n['ano']).tolist()
+    criterios = {c.ano_letivo_id: c for c in CriterioAvaliacao.objects.filter(ano_letivo_id__in=anos)}
+    pesos_etapa = dict(Etapa.objects.filter(ano_letivo_id__in=anos).values_list('id', 'peso'))
+
+    partes = []
+    for ano in anos:
+        do_ano = n['ano'] == ano
+        criterio = criterios.get(ano) or CriterioAvaliacao(ano_letivo_id=ano)
+        partes.append(_calcular_ano(criterio, {k: v[do_ano] for k, v in n.items()}, pesos_etapa))
+    if not partes:
+        vazio = np.array([], dtype=np.int64)
+        return {k: vazio for k in ('matricula', 'disciplina', 'etapa', 'aproveitamento', 'maximo', 'valor', 'recuperado')}
+
+    resultado = {k: np.concatenate([p[k] for p in partes]) for k in partes[0]}
+    resultado['aproveitamento'] = np.clip(resultado['aproveitamento'], 0, 1)
+    resultado['valor'] = resultado['aproveitamento'] * resultado['maximo']
+    return resultado
+
+
+def _sql_gravar():
+    # Colunas como arrays (unnest): uma instrução grava o lote inteiro. Só
+    # escreve o que mudou (uma nota nova altera poucos resultados) e remove os
+    # resultados que deixaram de existir (ex.: todas as notas da etapa apagadas)
+    t = ResultadoDisciplina._meta.db_table
+    return f"""
+        WITH novos AS (
+            SELECT * FROM unnest(
+                %(matricula)s::bigint[], %(disciplina)s::bigint[], %(etapa)s::bigint[],
+                %(valor)s::numeric[], %(maximo)s::numeric[], %(aproveitamento)s::numeric[], %(recuperado)s::boolean[]
+            ) AS r(m, d, e, v, mx, ap, rec)
+        ),
+        removidos AS (
+            -- Nulos como SEM dos dois lados: a comparação vira igualdade simples (hash join)
+            DELETE FROM {t} r
+            WHERE r.matricula_id = ANY(%(ids)s::bigint[])
+              AND NOT EXISTS (
+                  SELECT 1 FROM novos n
+                  WHERE n.m = r.matricula_id AND n.d = COALESCE(r.disciplina_id, %(sem)s)
+                    AND n.e = COALESCE(r.etapa_id, %(sem)s)
+              )
+        )
+        INSERT INTO {t} (matricula_id, disciplina_id, etapa_id, valor, maximo, aproveitamento, recuperado, atualizado_em)
+        SELECT m, NULLIF(d, %(sem)s), NULLIF(e, %(sem)s), v, mx, ap, rec, NOW() FROM novos
+        ON CONFLICT (matricula_id, disciplina_id, etapa_id) DO UPDATE SET
+            valor = EXCLUDED.valor,
+            maximo = EXCLUDED.maximo,
+            aproveitamento = EXCLUDED.aproveitamento,
+            recuperado = EXCLUDED.recuperado,
+            atualizado_em = EXCLUDED.atualizado_em
+        WHERE ({t}.valor, {t}.maximo, {t}.aproveitamento, {t}.recuperado)
+              IS DISTINCT FROM (EXCLUDED.valor, EXCLUDED.maximo, EXCLUDED.aproveitamento, EXCLUDED.recuperado)
+    """
+
+
+def _array(valores):
+    # Array como texto ('{1,2,3}'): o Postgres lê bem mais rápido que ARRAY[1,2,3]
+    return '{%s}' % ','.join(map(str, valores))
+
+
+def _gravar(matricula_ids):
+    resultado = calcular(matricula_ids)
+    # Arredondados aqui, na escala das colunas: o texto fica curto e o banco não converte nada
+    for coluna, casas in (('valor', 2), ('maximo', 2), ('aproveitamento', 4)):
+        resultado[coluna] = resultado[coluna].round(casas)
+    params = {k: _array(v.tolist()) for k, v in resultado.items()}
+    params.update(ids=_array(matricula_ids), sem=SEM)
+    with connection.cursor() as cursor:
+        cursor.execute(_sql_gravar(), params)
+        return cursor.rowcount
+
+
+def recalcular(matricula_ids=None):
+    """
+    Recalcula e grava os resultados das matrículas informadas, ou de todas as
+    ativas (matricula_ids=None), em lotes de LOTE matrículas. Devolve o número
+    de resultados novos ou alterados.
+    """
+    if matricula_ids is None:
+        ids = list(Matricula.objects.filter(status=Matricula.Status.ATIVA).order_by('id').values_list('id', flat=True))
+    else:
+        ids = sorted(set(matricula_ids))
+    return sum(_gravar(ids[i:i + LOTE]) for i in range(0, len(ids), LOTE))
+
+
+# --- Recalculo incremental ---
+# Como em reports/risco.py: as matrículas alteradas se acumulam (por thread)
+# e são recalculadas juntas quando a transação atual é confirmada.
+_local = threading.local()
+
+
+def _processar_pendentes():
+    ids = getattr(_local, 'pendentes', None)
+    if not ids:
+        return
+    _local.pendentes = set()
+    recalcular(ids)
+
+
+def agendar(matricula_ids):
+    if not matricula_ids:
+        return
+    if not hasattr(_local, 'pendentes'):
+        _local.pendentes = set()
+    _local.pendentes.update(matricula_ids)
+    transaction.on_commit(_processar_pendentes)
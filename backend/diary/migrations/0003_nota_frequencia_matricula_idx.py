@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:56
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY não roda dentro de transação; assim a tabela
+    # não fica bloqueada para escrita durante a criação
+    atomic = False
+
+    dependencies = [
+        ('academic', '0005_matricula_ativa_idx'),
+        ('diary', '0002_avaliacao_disciplina_planoaula'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='frequencia',
+            index=models.Index(fields=['matricula', 'presente'], name='frequencia_matricula_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='nota',
+            index=models.Index(fields=['matricula'], include=('avaliacao', 'valor'), name='nota_matricula_idx'),
+        ),
+        # Os índices novos começam por matricula: o índice só da FK sobra. Um
+        # AlterField recriaria a FK (revalidando a tabela inteira sob lock); aqui
+        # só o índice sai, também sem bloquear escritas.
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='frequencia',
+                    name='matricula',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='academic.matricula'),
+                ),
+                migrations.AlterField(
+                    model_name='nota',
+                    name='matricula',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='academic.matricula'),
+                ),
+            ],
+            database_operations=[
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY IF EXISTS "diary_frequencia_matricula_id_d96bf308";',
+                    reverse_sql='CREATE INDEX CONCURRENTLY "diary_frequencia_matricula_id_d96bf308" ON "diary_frequencia" ("matricula_id");',
+                ),
+                migrations.RunSQL(
+                    'DROP INDEX CONCURRENTLY IF EXISTS "diary_nota_matricula_id_08c5bb38";',
+                    reverse_sql='CREATE INDEX CONCURRENTLY "diary_nota_matricula_id_08c5bb38" ON "diary_nota" ("matricula_id");',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0007_matricula_ativa_unica_por_ano'),
+        ('diary', '0003_nota_frequencia_matricula_idx'),
+        ('pedagogical', '0003_etapa_peso_criterioavaliacao'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='avaliacao',
+            name='etapa',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='avaliacoes', to='pedagogical.etapa'),
+        ),
+        migrations.AddField(
+            model_name='avaliacao',
+            name='peso',
+            field=models.DecimalField(decimal_places=2, default=1, max_digits=5),
+        ),
+        migrations.AddField(
+            model_name='avaliacao',
+            name='recuperacao',
+            field=models.BooleanField(default=False),
+        ),
+        # Etapa das avaliações existentes: a que contém a data, no ano letivo da turma
+        migrations.RunSQL(
+            """
+            UPDATE diary_avaliacao a SET etapa_id = (
+                SELECT e.id FROM pedagogical_etapa e
+                JOIN academic_turma t ON t.ano_letivo_id = e.ano_letivo_id
+                WHERE t.id = a.turma_id AND a.data BETWEEN e.data_inicio AND e.data_fim
+                ORDER BY e.data_inicio, e.id
+                LIMIT 1
+            )
+            WHERE a.etapa_id IS NULL
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.CreateModel(
+            name='ResultadoDisciplina',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('maximo', models.DecimalField(decimal_places=2, max_digits=7)),
+                ('aproveitamento', models.DecimalField(decimal_places=4, max_digits=5)),
+                ('recuperado', models.BooleanField(default=False)),
+                ('atualizado_em', models.DateTimeField()),
+                ('disciplina', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pedagogical.disciplina')),
+                ('etapa', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pedagogical.etapa')),
+                ('matricula', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='resultados', to='academic.matricula')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('matricula', 'disciplina', 'etapa'), name='resultado_matricula_disciplina_etapa', nulls_distinct=False)],
+            },
+        ),
+    ]
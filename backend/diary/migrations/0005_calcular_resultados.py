@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def calcular_resultados(apps, schema_editor):
+    # O conselho de classe e o boletim leem só ResultadoDisciplina, criada
+    # vazia em 0004: calcula os resultados de toda matrícula com nota (inclusive
+    # de anos encerrados). Usa o motor atual, e não os modelos históricos,
+    # porque as fórmulas vivem em diary/medias.py
+    from diary import medias
+
+    Nota = apps.get_model('diary', 'Nota')
+    ids = Nota.objects.filter(valor__isnull=False).values_list('matricula_id', flat=True).distinct()
+    medias.recalcular(list(ids))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diary', '0004_avaliacao_etapa_resultadodisciplina'),
+    ]
+
+    operations = [
+        migrations.RunPython(calcular_resultados, migrations.RunPython.noop),
+    ]
@@ -11,11 +11,15 @@ class Aula(models.Model):
 
 class Frequencia(models.Model):
     aula = models.ForeignKey(Aula, on_delete=models.CASCADE, related_name='frequencias')
-    matricula = models.ForeignKey(Matricula, on_delete=models.CASCADE)
+    # Índice em frequencia_matricula_idx, que também cobre o presente
+    matricula = models.ForeignKey(Matricula, on_delete=models.CASCADE, db_index=False)
     presente = models.BooleanField(default=True)
     
     class Meta:
         unique_together = ('aula', 'matricula')
+        indexes = [
+            models.Index(fields=['matricula', 'presente'], name='frequencia_matricula_idx'),
+        ]
 
 class Avaliacao(models.Model):
     turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='avaliacoes')
@@ -23,17 +27,50 @@ class Avaliacao(models.Model):
     nome = models.CharField(max_length=100) # Prova 1, Trabalho 1
     data = models.DateField()
     valor_maximo = models.DecimalField(max_digits=5, decimal_places=2)
+    etapa = models.ForeignKey('pedagogical.Etapa', on_delete=models.PROTECT, related_name='avaliacoes', null=True, blank=True)
+    peso = models.DecimalField(max_digits=5, decimal_places=2, default=1) # na média ponderada da etapa
+    # Recuperação da etapa (ou final, sem etapa): não entra na média, pode substituí-la
+    recuperacao = models.BooleanField(default=False)
     
     def __str__(self):
         return f"{self.nome} ({self.turma})"
 
 class Nota(models.Model):
     avaliacao = models.ForeignKey(Avaliacao, on_delete=models.CASCADE, related_name='notas')
-    matricula = models.ForeignKey(Matricula, on_delete=models.CASCADE)
+    # Índice em nota_matricula_idx, que também cobre avaliacao e valor (boletim, risco)
+    matricula = models.ForeignKey(Matricula, on_delete=models.CASCADE, db_index=False)
     valor = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
     
     class Meta:
         unique_together = ('avaliacao', 'matricula')
+        indexes = [
+            models.Index(fields=['matricula'], include=['avaliacao', 'valor'], name='nota_matricula_idx'),
+        ]
+
+class ResultadoDisciplina(models.Model):
+    """
+    Resultado por (matrícula, disciplina, etapa) calculado por diary/medias.py;
+    etapa nula = resultado anual. Recalculado a cada alteração de nota.
+    """
+    # Índice na restrição única, que começa pela matrícula
+    matricula = models.ForeignKey(Matricula, on_delete=models.CASCADE, related_name='resultados', db_index=False)
+    disciplina = models.ForeignKey('pedagogical.Disciplina', on_delete=models.CASCADE, null=True, related_name='+')
+    etapa = models.ForeignKey('pedagogical.Etapa', on_delete=models.CASCADE, null=True, related_name='+')
+    valor = models.DecimalField(max_digits=7, decimal_places=2) # sobre maximo: nota_maxima ou pontos (SOMA)
+    maximo = models.DecimalField(max_digits=7, decimal_places=2)
+    aproveitamento = models.DecimalField(max_digits=5, decimal_places=4) # 0 a 1
+    recuperado = models.BooleanField(default=False) # a recuperação mudou o resultado
+    atualizado_em = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['matricula', 'disciplina', 'etapa'], nulls_distinct=False, name='resultado_matricula_disciplina_etapa'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.matricula_id}/{self.disciplina_id}/{self.etapa_id or 'ano'}: {self.valor}"
 
 class PlanoAula(models.Model):
     turma = models.ForeignKey(Turma, on_delete=models.CASCADE, related_name='planos_aula')
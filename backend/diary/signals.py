@@ -0,0 +1,62 @@
+"""
+Signals de alto nível do diário.
+
+notas_alteradas / frequencias_alteradas avisam quais matrículas tiveram
+notas ou presenças modificadas. São enviados a partir dos post_save/
+post_delete abaixo e também, explicitamente, pelos endpoints que gravam
+em lote (bulk_create não dispara signals de model). Quem precisa reagir
+(ranking de risco, cache do portal, médias) escuta só estes dois.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from academic.models import Matricula
+from pedagogical.models import CriterioAvaliacao, Etapa
+from . import medias
+from .models import Avaliacao, Frequencia, Nota
+
+# kwargs: matricula_ids (set[int])
+notas_alteradas = Signal()
+frequencias_alteradas = Signal()
+
+
+@receiver(post_save, sender=Nota)
+@receiver(post_delete, sender=Nota)
+def nota_alterada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        notas_alteradas.send(sender=Nota, matricula_ids={instance.matricula_id})
+
+
+@receiver(post_save, sender=Avaliacao)
+def avaliacao_alterada(sender, instance, created, raw=False, **kwargs):
+    # valor_maximo/disciplina/etapa/peso mudam o peso de todas as notas da avaliação.
+    # Na exclusão as notas saem em cascata e cada uma já dispara nota_alterada.
+    if created or raw:
+        return
+    matricula_ids = set(Nota.objects.filter(avaliacao=instance).values_list('matricula_id', flat=True))
+    if matricula_ids:
+        notas_alteradas.send(sender=Avaliacao, matricula_ids=matricula_ids)
+
+
+@receiver(post_save, sender=Frequencia)
+@receiver(post_delete, sender=Frequencia)
+def frequencia_alterada(sender, instance, raw=False, **kwargs):
+    if not raw:
+        frequencias_alteradas.send(sender=Frequencia, matricula_ids={instance.matricula_id})
+
+
+# --- Médias (diary/medias.py) ---
+@receiver(notas_alteradas)
+def recalcular_medias(sender, matricula_ids, **kwargs):
+    medias.agendar(matricula_ids)
+
+
+@receiver(post_save, sender=Etapa)
+@receiver(post_save, sender=CriterioAvaliacao)
+@receiver(post_delete, sender=CriterioAvaliacao)
+def criterio_alterado(sender, instance, created=False, raw=False, **kwargs):
+    # Peso da etapa e fórmulas valem para o ano letivo inteiro. Etapa nova
+    # ainda não tem avaliações; a excluída leva os resultados em cascata.
+    if raw or (sender is Etapa and created):
+        return
+    medias.agendar(set(Matricula.objects.filter(ano_letivo_id=instance.ano_letivo_id).values_list('id', flat=True)))
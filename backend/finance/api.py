@@ -1,5 +1,8 @@
-from ninja import Router, Schema
+import datetime
+from ninja import Field, FilterSchema, Query, Router, Schema
+from ninja.pagination import paginate
 from typing import List
+from sge.pagination import KeysetPagination
 from .models import Transacao
 
 router = Router()
@@ -11,6 +14,18 @@ class TransacaoOut(Schema):
     tipo: str
     data: str
 
+    @staticmethod
+    def resolve_data(obj):
+        return str(obj.data)
+
+class TransacaoFiltro(FilterSchema):
+    tipo: str | None = None
+    categoria_id: int | None = None
+    data_de: datetime.date | None = Field(None, json_schema_extra={'q': 'data__gte'})
+    data_ate: datetime.date | None = Field(None, json_schema_extra={'q': 'data__lte'})
+
 @router.get("/transacoes", response=List[TransacaoOut])
-def listar_transacoes(request):
-    return Transacao.objects.all()
+@paginate(KeysetPagination)
+def listar_transacoes(request, filtros: TransacaoFiltro = Query(...)):
+    # Mais recentes primeiro
+    return filtros.filter(Transacao.objects.all()).order_by('-data', '-id')
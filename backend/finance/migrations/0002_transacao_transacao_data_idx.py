@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='transacao',
+            index=models.Index(fields=['data', 'id'], name='transacao_data_idx'),
+        ),
+    ]
@@ -15,5 +15,10 @@ class Transacao(models.Model):
     tipo = models.CharField(max_length=10, choices=[('R', 'Receita'), ('D', 'Despesa')])
     observacao = models.TextField(null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['data', 'id'], name='transacao_data_idx'),
+        ]
+
     def __str__(self):
         return f"{self.descricao} - R$ {self.valor}"
@@ -0,0 +1,65 @@
+import datetime
+from typing import List
+from ninja import Router, Schema
+from pydantic import ValidationError
+from django.http import FileResponse
+from django.shortcuts import get_object_or_404
+from .models import Job
+from . import tarefas, worker
+
+router = Router()
+
+class JobIn(Schema):
+    tipo: str
+    parametros: dict = {}
+
+class JobOut(Schema):
+    id: int
+    tipo: str
+    parametros: dict
+    status: str
+    tentativas: int
+    erro: str
+    criado_em: datetime.datetime
+    iniciado_em: datetime.datetime | None
+    concluido_em: datetime.datetime | None
+    nome_arquivo: str
+    tamanho: int | None
+    download: str | None
+
+    @staticmethod
+    def resolve_download(obj):
+        return f"/api/jobs/{obj.id}/download" if obj.status == Job.Status.CONCLUIDO else None
+
+@router.get("/tipos", response=List[str])
+def listar_tipos(request):
+    return sorted(tarefas.TAREFAS)
+
+@router.post("", response={202: JobOut, 400: dict})
+def criar_job(request, payload: JobIn):
+    # Só grava a linha: quem executa é o `manage.py rodar_jobs`
+    if payload.tipo not in tarefas.TAREFAS:
+        return 400, {"message": f"Tipo de job desconhecido: {payload.tipo}"}
+    try:
+        job = worker.enfileirar(payload.tipo, payload.parametros)
+    except ValidationError as e:
+        return 400, {"message": "Parâmetros inválidos.", "erros": e.errors(include_url=False, include_context=False, include_input=False)}
+    return 202, job
+
+@router.get("/{job_id}", response=JobOut)
+def status_job(request, job_id: int):
+    return get_object_or_404(Job, id=job_id)
+
+@router.get("/{job_id}/download", response={409: dict, 410: dict})
+def baixar_job(request, job_id: int):
+    job = get_object_or_404(Job, id=job_id)
+    if job.status != Job.Status.CONCLUIDO:
+        return 409, {"message": f"Job ainda não concluído ({job.get_status_display()})."}
+    if not job.caminho.exists():
+        return 410, {"message": "Arquivo do job não está mais disponível."}
+    return FileResponse(
+        open(job.caminho, 'rb'),
+        as_attachment=True,
+        filename=job.nome_arquivo,
+        content_type=job.content_type
+    )
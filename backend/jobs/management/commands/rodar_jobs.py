@@ -0,0 +1,104 @@
+import logging
+import multiprocessing
+import signal
+import time
+from multiprocessing.connection import wait
+from django.core.management.base import BaseCommand
+
+logger = logging.getLogger(__name__)
+
+# Jobs abandonados (worker morto no meio) voltam para a fila nesta cadência,
+# não só quando o comando sobe
+RECUPERAR_A_CADA = 60 # segundos
+
+
+def _loop(intervalo, uma_vez):
+    # Processo filho ('spawn'): configura o Django do zero, sem herdar conexões.
+    # Por isso este módulo não importa models/worker no topo.
+    import django
+    django.setup()
+    from jobs import worker
+    from reports import pdf
+
+    parar = False
+
+    def _sair(*_):
+        nonlocal parar
+        parar = True
+
+    signal.signal(signal.SIGTERM, _sair)
+    signal.signal(signal.SIGINT, _sair)
+
+    recuperado_em = None
+    try:
+        while not parar:
+            if recuperado_em is None or time.monotonic() - recuperado_em >= RECUPERAR_A_CADA:
+                reenfileirados, esgotados = worker.recuperar_abandonados()
+                if reenfileirados or esgotados:
+                    logger.warning('%s jobs abandonados voltaram para a fila, %s marcados como erro', reenfileirados, esgotados)
+                recuperado_em = time.monotonic()
+            job = worker.processar_proximo()
+            if job is None:
+                if uma_vez:
+                    return
+                time.sleep(intervalo)
+    finally:
+        # Sem isso o processo filho fica esperando os processos do pool de PDFs na saída
+        pdf.encerrar_pool()
+
+
+class Command(BaseCommand):
+    help = 'Executa os jobs enfileirados (boletins, exportações Educacenso, conselho de classe)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processos', type=int, default=1, help='Jobs executados em paralelo (padrão: 1)')
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Segundos entre consultas quando a fila está vazia')
+        parser.add_argument('--uma-vez', action='store_true', help='Esvazia a fila e termina')
+
+    def handle(self, *args, **options):
+        processos = max(1, options['processos'])
+        inicio = time.perf_counter()
+        if processos == 1:
+            _loop(options['intervalo'], options['uma_vez'])
+        else:
+            self._supervisionar(processos, options['intervalo'], options['uma_vez'])
+        self.stdout.write(self.style.SUCCESS(f'Worker encerrado após {time.perf_counter() - inicio:.1f}s.'))
+
+    def _supervisionar(self, processos, intervalo, uma_vez):
+        """
+        Mantém `processos` filhos rodando: um filho que sai com erro (exceção
+        fora de um job, OOM killer) é substituído; os que saem normalmente
+        (fila vazia com --uma-vez, SIGTERM) não.
+        """
+        # Cada job de boletins ainda abre seu próprio pool de PDFs
+        # (BOLETIM_WORKERS); dimensione processos x BOLETIM_WORKERS pelos núcleos
+        ctx = multiprocessing.get_context('spawn')
+        parar = False
+
+        def _iniciar():
+            p = ctx.Process(target=_loop, args=(intervalo, uma_vez))
+            p.start()
+            return p
+
+        filhos = [_iniciar() for _ in range(processos)]
+
+        # SIGTERM (docker stop) é repassado: cada filho termina o job atual e sai
+        def _repassar(*_):
+            nonlocal parar
+            parar = True
+            for p in filhos:
+                if p.is_alive():
+                    p.terminate()
+
+        signal.signal(signal.SIGTERM, _repassar)
+        signal.signal(signal.SIGINT, _repassar)
+
+        while filhos:
+            wait([p.sentinel for p in filhos])
+            for p in [p for p in filhos if not p.is_alive()]:
+                filhos.remove(p)
+                p.join()
+                if p.exitcode != 0 and not parar:
+                    self.stderr.write(f'Processo {p.pid} saiu com código {p.exitcode}; iniciando outro.')
+                    time.sleep(intervalo) # sem laço apertado se o filho morre ao subir
+                    filhos.append(_iniciar())
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='batimento_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        # Jobs já em execução contam a partir do início
+        migrations.RunSQL(
+            "UPDATE jobs_job SET batimento_em = iniciado_em WHERE status = 'EXECUTANDO'",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.conf import settings
+from django.db import models
+
+
+class Job(models.Model):
+    """
+    Relatório/exportação pesada executada fora da requisição.
+    A tabela é a própria fila: o worker (manage.py rodar_jobs) pega o próximo
+    PENDENTE com SELECT ... FOR UPDATE SKIP LOCKED. O resultado fica em
+    JOBS_DIR/<id>/<nome_arquivo>.
+    """
+    class Status(models.TextChoices):
+        PENDENTE = 'PENDENTE', 'Pendente'
+        EXECUTANDO = 'EXECUTANDO', 'Executando'
+        CONCLUIDO = 'CONCLUIDO', 'Concluído'
+        ERRO = 'ERRO', 'Erro'
+
+    tipo = models.CharField(max_length=50)
+    parametros = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDENTE)
+    tentativas = models.PositiveSmallIntegerField(default=0)
+    erro = models.TextField(blank=True)
+
+    criado_em = models.DateTimeField(auto_now_add=True)
+    iniciado_em = models.DateTimeField(null=True, blank=True)
+    # Renovado pelo worker enquanto a tarefa roda (worker.executar)
+    batimento_em = models.DateTimeField(null=True, blank=True)
+    concluido_em = models.DateTimeField(null=True, blank=True)
+
+    nome_arquivo = models.CharField(max_length=255, blank=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    tamanho = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Só os pendentes interessam ao worker; o índice fica pequeno
+            # mesmo com o histórico de jobs concluídos crescendo
+            models.Index(
+                fields=['criado_em', 'id'],
+                condition=models.Q(status='PENDENTE'),
+                name='job_pendente_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} #{self.id} ({self.status})"
+
+    @property
+    def diretorio(self):
+        return settings.JOBS_DIR / str(self.id)
+
+    @property
+    def caminho(self):
+        return self.diretorio / self.nome_arquivo if self.nome_arquivo else None
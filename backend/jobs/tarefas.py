@@ -0,0 +1,141 @@
+"""
+Tarefas que podem ser enfileiradas como Job.
+
+Cada tarefa é registrada com @tarefa(nome, Parametros): os parâmetros são
+validados pelo Schema na hora de enfileirar (a API responde 400 na hora, não
+depois no worker). A função recebe os parâmetros validados e um arquivo
+binário aberto para escrita, e devolve (nome_arquivo, content_type).
+"""
+import csv
+import io
+from dataclasses import dataclass
+from typing import Callable, Literal
+
+from django.conf import settings
+from ninja import Schema
+
+from academic import conselho
+from academic.models import Turma
+from pedagogical.models import Escola
+from reports import boletim, educacenso, risco
+
+
+@dataclass
+class Tarefa:
+    nome: str
+    parametros: type
+    funcao: Callable
+
+
+TAREFAS = {}
+
+
+def tarefa(nome, parametros):
+    def registrar(funcao):
+        TAREFAS[nome] = Tarefa(nome, parametros, funcao)
+        return funcao
+    return registrar
+
+
+def validar(tipo, parametros):
+    """Devolve os parâmetros normalizados. Levanta KeyError ou ValidationError."""
+    return TAREFAS[tipo].parametros.model_validate(parametros or {}).model_dump()
+
+
+def executar(tipo, parametros, destino):
+    t = TAREFAS[tipo]
+    return t.funcao(t.parametros.model_validate(parametros), destino)
+
+
+def _escrever_csv(destino, cabecalho, linhas):
+    texto = io.TextIOWrapper(destino, encoding='utf-8', newline='')
+    writer = csv.writer(texto)
+    writer.writerow(cabecalho)
+    writer.writerows(linhas)
+    texto.flush()
+    texto.detach()
+
+
+# --- Boletins ---
+
+class BoletinsTurma(Schema):
+    turma_id: int
+    formato: Literal['zip', 'pdf'] = 'zip'
+
+
+class BoletinsEscola(Schema):
+    escola_id: int
+    formato: Literal['zip', 'pdf'] = 'zip'
+
+
+def _escrever_boletins(matriculas, formato, destino, nome_base):
+    documentos = boletim.gerar_lote(matriculas, workers=settings.BOLETIM_WORKERS)
+    if formato == 'pdf':
+        destino.write(boletim.juntar_pdf(documentos))
+        return f"{nome_base}.pdf", 'application/pdf'
+    destino.write(boletim.compactar_zip(documentos))
+    return f"{nome_base}.zip", 'application/zip'
+
+
+@tarefa('boletins_turma', BoletinsTurma)
+def boletins_turma(p, destino):
+    turma = Turma.objects.get(id=p.turma_id)
+    return _escrever_boletins(boletim.matriculas_da_turma(turma.id), p.formato, destino, f"boletins_turma_{turma.id}")
+
+
+@tarefa('boletins_escola', BoletinsEscola)
+def boletins_escola(p, destino):
+    escola = Escola.objects.get(id=p.escola_id)
+    return _escrever_boletins(boletim.matriculas_da_escola(escola.id), p.formato, destino, f"boletins_escola_{escola.id}")
+
+
+# --- Educacenso ---
+
+class SemParametros(Schema):
+    pass
+
+
+@tarefa('educacenso_escolas', SemParametros)
+def educacenso_escolas(p, destino):
+    _escrever_csv(destino, educacenso.CABECALHO_ESCOLAS, educacenso.linhas_escolas())
+    return 'escolas_educacenso.csv', 'text/csv'
+
+
+@tarefa('educacenso_alunos', SemParametros)
+def educacenso_alunos(p, destino):
+    _escrever_csv(destino, educacenso.CABECALHO_ALUNOS, educacenso.linhas_alunos())
+    return 'alunos_educacenso.csv', 'text/csv'
+
+
+# --- Conselho de Classe ---
+
+class ConselhoEscola(Schema):
+    escola_id: int
+
+
+@tarefa('conselho_escola', ConselhoEscola)
+def conselho_escola(p, destino):
+    """Matriz da escola inteira (ano letivo ativo) como planilha: uma linha por aluno."""
+    escola = Escola.objects.get(id=p.escola_id)
+    turma_ids = list(Turma.objects.filter(ano_letivo__escola=escola, ano_letivo__ativo=True).values_list('id', flat=True))
+    dados = conselho.matriz(
+        conselho.matriculas_ativas(turma_id__in=turma_ids).order_by('turma__nome', 'aluno__pessoa__nome', 'id'),
+        conselho.disciplinas_das_turmas(turma_ids)
+    )
+    cabecalho = ['Matrícula', 'Aluno', 'Turma'] + [d['nome'] for d in dados['disciplinas']]
+    linhas = (
+        [a['matricula_id'], a['aluno_nome'], a['turma'], *totais]
+        for a, totais in zip(dados['alunos'], dados['totais'])
+    )
+    _escrever_csv(destino, cabecalho, linhas)
+    return f"conselho_escola_{escola.id}.csv", 'text/csv'
+
+
+# --- Ranking de risco ---
+
+@tarefa('recalcular_risco', SemParametros)
+def recalcular_risco(p, destino):
+    """Recalculo da rede inteira, agendado por risco.agendar() depois de lotes grandes."""
+    gravadas = risco.recalcular()
+    destino.write(f"{gravadas} matrículas recalculadas\n".encode())
+    return 'risco.txt', 'text/plain'
@@ -0,0 +1,139 @@
+"""
+Execução dos jobs.
+
+Vários processos (e vários servidores) podem rodar o worker ao mesmo tempo:
+cada um reserva o próximo job PENDENTE com SELECT ... FOR UPDATE SKIP LOCKED,
+então nunca dois pegam o mesmo e ninguém fica esperando o lock do outro. A
+transação da reserva é curta (só muda o status para EXECUTANDO); a tarefa roda
+fora dela.
+
+Enquanto a tarefa roda, uma thread renova Job.batimento_em; só um job sem
+batimento há JOBS_TIMEOUT volta para a fila (recuperar_abandonados). Cada
+tentativa grava no seu próprio diretório temporário e só conclui o job se ele
+ainda for dela (mesmo número de tentativas): uma tentativa tomada por engano
+não apaga nem sobrescreve o resultado da seguinte.
+"""
+import logging
+import shutil
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from sge.db_router import usar_replica
+from . import tarefas
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def enfileirar(tipo, parametros=None):
+    """Valida os parâmetros e grava o job. Levanta KeyError se o tipo não existe."""
+    return Job.objects.create(tipo=tipo, parametros=tarefas.validar(tipo, parametros))
+
+
+def enfileirar_unico(tipo, parametros=None):
+    """Como enfileirar(), mas reaproveita um job igual que ainda está PENDENTE."""
+    parametros = tarefas.validar(tipo, parametros)
+    pendente = Job.objects.filter(tipo=tipo, parametros=parametros, status=Job.Status.PENDENTE).first()
+    return pendente or Job.objects.create(tipo=tipo, parametros=parametros)
+
+
+def reservar():
+    """Marca o próximo job pendente como EXECUTANDO e o devolve (ou None)."""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.Status.PENDENTE)
+            .order_by('criado_em', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = Job.Status.EXECUTANDO
+        job.iniciado_em = job.batimento_em = timezone.now()
+        job.tentativas += 1
+        job.save(update_fields=['status', 'iniciado_em', 'batimento_em', 'tentativas'])
+    return job
+
+
+def _da_tentativa(job):
+    """O job, se ainda estiver na tentativa que este worker reservou."""
+    return Job.objects.filter(id=job.id, status=Job.Status.EXECUTANDO, tentativas=job.tentativas)
+
+
+def _bater(job, parar):
+    # Thread própria, logo conexão própria: fechada ao sair
+    try:
+        while not parar.wait(settings.JOBS_BATIMENTO):
+            if not _da_tentativa(job).update(batimento_em=timezone.now()):
+                logger.warning("Job %s foi retomado por outro worker (tentativa %s)", job.id, job.tentativas)
+                return
+    finally:
+        connection.close()
+
+
+def executar(job):
+    diretorio = job.diretorio
+    tentativa = diretorio / f'.tentativa-{job.tentativas}'
+    shutil.rmtree(tentativa, ignore_errors=True)
+    tentativa.mkdir(parents=True)
+    temporario = tentativa / 'parcial'
+
+    parar = threading.Event()
+    batimento = threading.Thread(target=_bater, args=(job, parar), daemon=True)
+    batimento.start()
+    try:
+        # As tarefas só leem (relatórios): réplica, se houver
+        with open(temporario, 'wb') as destino, usar_replica():
+            nome_arquivo, content_type = tarefas.executar(job.tipo, job.parametros, destino)
+    except Exception:
+        logger.exception("Job %s (%s) falhou", job.id, job.tipo)
+        _da_tentativa(job).update(
+            status=Job.Status.ERRO, erro=traceback.format_exc(limit=5), concluido_em=timezone.now()
+        )
+        job.refresh_from_db()
+        return job
+    else:
+        with transaction.atomic():
+            concluido = _da_tentativa(job).update(
+                status=Job.Status.CONCLUIDO, nome_arquivo=nome_arquivo, content_type=content_type,
+                tamanho=temporario.stat().st_size, erro='', concluido_em=timezone.now(),
+            )
+            # Dentro da transação: se o rename falha, o job não fica CONCLUIDO sem arquivo
+            if concluido:
+                temporario.rename(diretorio / nome_arquivo)
+        if not concluido:
+            logger.warning("Job %s: resultado da tentativa %s descartado (job retomado)", job.id, job.tentativas)
+        job.refresh_from_db()
+        return job
+    finally:
+        parar.set()
+        batimento.join()
+        shutil.rmtree(tentativa, ignore_errors=True)
+
+
+def recuperar_abandonados():
+    """
+    Jobs em EXECUTANDO sem batimento há mais de JOBS_TIMEOUT são de um worker
+    que morreu: voltam para a fila, ou viram ERRO se já esgotaram as tentativas.
+    """
+    limite = timezone.now() - timedelta(seconds=settings.JOBS_TIMEOUT)
+    abandonados = Job.objects.filter(status=Job.Status.EXECUTANDO, batimento_em__lt=limite)
+    esgotados = abandonados.filter(tentativas__gte=settings.JOBS_TENTATIVAS).update(
+        status=Job.Status.ERRO, erro='Tempo esgotado.', concluido_em=timezone.now()
+    )
+    reenfileirados = abandonados.update(status=Job.Status.PENDENTE, iniciado_em=None, batimento_em=None)
+    return reenfileirados, esgotados
+
+
+def processar_proximo():
+    """Executa um job, se houver. Devolve o job executado ou None."""
+    close_old_connections()
+    job = reservar()
+    if job is None:
+        return None
+    return executar(job)
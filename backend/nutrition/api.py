@@ -1,5 +1,8 @@
-from ninja import Router, Schema
+import datetime
+from ninja import Field, FilterSchema, Query, Router, Schema
+from ninja.pagination import paginate
 from typing import List
+from sge.pagination import KeysetPagination
 from .models import Alimento, Cardapio
 
 router = Router()
@@ -16,10 +19,20 @@ class CardapioOut(Schema):
     descricao: str
     turno: str
 
+    @staticmethod
+    def resolve_data(obj):
+        return str(obj.data)
+
+class CardapioFiltro(FilterSchema):
+    turno: str | None = None
+    data_de: datetime.date | None = Field(None, json_schema_extra={'q': 'data__gte'})
+    data_ate: datetime.date | None = Field(None, json_schema_extra={'q': 'data__lte'})
+
 @router.get("/alimentos", response=List[AlimentoOut])
 def listar_alimentos(request):
     return Alimento.objects.all()
 
 @router.get("/cardapios", response=List[CardapioOut])
-def listar_cardapios(request):
-    return Cardapio.objects.all()
+@paginate(KeysetPagination)
+def listar_cardapios(request, filtros: CardapioFiltro = Query(...)):
+    return filtros.filter(Cardapio.objects.all()).order_by('-data', '-id')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nutrition', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cardapio',
+            index=models.Index(fields=['data', 'id'], name='cardapio_data_idx'),
+        ),
+    ]
@@ -14,5 +14,10 @@ class Cardapio(models.Model):
     descricao = models.TextField() # Ex: Arroz, Feijão, Frango
     turno = models.CharField(max_length=20, choices=[('M', 'Matutino'), ('V', 'Vespertino')])
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['data', 'id'], name='cardapio_data_idx'),
+        ]
+
     def __str__(self):
         return f"Cardápio {self.data} ({self.turno})"
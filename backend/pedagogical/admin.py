@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Escola, AnoLetivo, Etapa, NivelEnsino, Disciplina, MatrizCurricular
+from .models import Escola, AnoLetivo, Etapa, CriterioAvaliacao, NivelEnsino, Disciplina, MatrizCurricular
 
 @admin.register(Escola)
 class EscolaAdmin(admin.ModelAdmin):
@@ -12,7 +12,11 @@ class AnoLetivoAdmin(admin.ModelAdmin):
 
 @admin.register(Etapa)
 class EtapaAdmin(admin.ModelAdmin):
-    list_display = ('nome', 'ano_letivo')
+    list_display = ('nome', 'ano_letivo', 'peso')
+
+@admin.register(CriterioAvaliacao)
+class CriterioAvaliacaoAdmin(admin.ModelAdmin):
+    list_display = ('ano_letivo', 'formula_etapa', 'formula_anual', 'recuperacao', 'nota_maxima')
 
 @admin.register(NivelEnsino)
 class NivelEnsinoAdmin(admin.ModelAdmin):
@@ -1,6 +1,9 @@
+import datetime
 from ninja import Router, Schema
+from ninja.decorators import decorate_view
 from django.shortcuts import get_object_or_404
 from typing import List
+from sge.cache_http import versionado
 from .models import Escola, AnoLetivo, Disciplina
 
 router = Router()
@@ -18,6 +21,7 @@ class EscolaOut(Schema):
     endereco: str | None
 
 @router.get("/escolas", response=List[EscolaOut])
+@decorate_view(versionado(Escola))
 def listar_escolas(request):
     return Escola.objects.all()
 
@@ -52,11 +56,12 @@ class AnoLetivoOut(Schema):
     id: int
     escola_id: int
     ano: int
-    data_inicio: str
-    data_fim: str
+    data_inicio: datetime.date
+    data_fim: datetime.date
     ativo: bool
 
 @router.get("/escolas/{escola_id}/anos-letivos", response=List[AnoLetivoOut])
+@decorate_view(versionado(AnoLetivo))
 def listar_anos_letivos(request, escola_id: int):
     return AnoLetivo.objects.filter(escola_id=escola_id)
 
@@ -90,6 +95,7 @@ class DisciplinaOut(Schema):
     codigo: str
 
 @router.get("/disciplinas", response=List[DisciplinaOut])
+@decorate_view(versionado(Disciplina))
 def listar_disciplinas(request):
     return Disciplina.objects.all()
 
@@ -114,6 +120,7 @@ def deletar_disciplina(request, disciplina_id: int):
 
 # --- Zoneamento ---
 from .models import Zoneamento
+from . import zoneamento
 
 class ZoneamentoIn(Schema):
     bairro: str
@@ -126,6 +133,7 @@ class ZoneamentoOut(Schema):
     escola_nome: str
 
 @router.get("/zoneamento", response=List[ZoneamentoOut])
+@decorate_view(versionado(Zoneamento, Escola))
 def listar_zoneamento(request):
     return [
         {
@@ -148,6 +156,18 @@ def criar_zoneamento(request, payload: ZoneamentoIn):
         "escola_nome": z.escola.nome
     }
 
+class ResolucaoOut(Schema):
+    bairro_normalizado: str
+    escola_id: int | None
+
+# Antes de /zoneamento/{z_id} para não ser capturada por ela
+@router.get("/zoneamento/resolver", response=ResolucaoOut)
+def resolver_zoneamento(request, endereco: str):
+    return {
+        "bairro_normalizado": zoneamento.normalizar(endereco),
+        "escola_id": zoneamento.resolver(endereco)
+    }
+
 @router.delete("/zoneamento/{z_id}", response={204: None})
 def deletar_zoneamento(request, z_id: int):
     z = get_object_or_404(Zoneamento, id=z_id)
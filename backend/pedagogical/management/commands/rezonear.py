@@ -0,0 +1,18 @@
+import time
+from django.core.management.base import BaseCommand
+from pedagogical import zoneamento
+
+
+class Command(BaseCommand):
+    help = 'Recalcula a escola de zoneamento de todos os alunos a partir do endereço'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Só conta as alterações, sem gravar')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        total, alterados = zoneamento.rezonear_alunos(dry_run=options['dry_run'])
+        prefixo = '[dry-run] ' if options['dry_run'] else ''
+        self.stdout.write(self.style.SUCCESS(
+            f'{prefixo}{total} alunos avaliados, {alterados} com escola alterada em {time.perf_counter() - inicio:.2f}s.'
+        ))
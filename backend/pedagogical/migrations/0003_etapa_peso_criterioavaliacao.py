@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:03
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0002_zoneamento'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etapa',
+            name='peso',
+            field=models.DecimalField(decimal_places=2, default=1, max_digits=5),
+        ),
+        migrations.CreateModel(
+            name='CriterioAvaliacao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('formula_etapa', models.CharField(choices=[('MEDIA_PONDERADA', 'Média ponderada'), ('SOMA', 'Soma'), ('MELHORES', 'Melhores notas')], default='MEDIA_PONDERADA', max_length=20)),
+                ('melhores_notas', models.PositiveSmallIntegerField(default=2)),
+                ('formula_anual', models.CharField(choices=[('MEDIA_PONDERADA', 'Média ponderada'), ('SOMA', 'Soma'), ('MELHORES', 'Melhores notas')], default='MEDIA_PONDERADA', max_length=20)),
+                ('melhores_etapas', models.PositiveSmallIntegerField(default=3)),
+                ('recuperacao', models.CharField(choices=[('SUBSTITUI', 'Substitui, se maior'), ('MEDIA', 'Média com a recuperação, se maior')], default='SUBSTITUI', max_length=20)),
+                ('nota_maxima', models.DecimalField(decimal_places=2, default=10, max_digits=5)),
+                ('ano_letivo', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='criterio', to='pedagogical.anoletivo')),
+            ],
+        ),
+    ]
@@ -25,10 +25,36 @@ class Etapa(models.Model):
     ano_letivo = models.ForeignKey(AnoLetivo, on_delete=models.CASCADE, related_name='etapas')
     data_inicio = models.DateField()
     data_fim = models.DateField()
+    peso = models.DecimalField(max_digits=5, decimal_places=2, default=1) # na média anual ponderada
 
     def __str__(self):
         return f"{self.nome} ({self.ano_letivo})"
 
+class CriterioAvaliacao(models.Model):
+    """
+    Fórmulas do resultado por disciplina de um ano letivo (ver diary/medias.py).
+    Ano letivo sem critério cadastrado usa os valores padrão.
+    """
+    class Formula(models.TextChoices):
+        MEDIA_PONDERADA = 'MEDIA_PONDERADA', 'Média ponderada'
+        SOMA = 'SOMA', 'Soma'
+        MELHORES = 'MELHORES', 'Melhores notas'
+
+    class Recuperacao(models.TextChoices):
+        SUBSTITUI = 'SUBSTITUI', 'Substitui, se maior'
+        MEDIA = 'MEDIA', 'Média com a recuperação, se maior'
+
+    ano_letivo = models.OneToOneField(AnoLetivo, on_delete=models.CASCADE, related_name='criterio')
+    formula_etapa = models.CharField(max_length=20, choices=Formula.choices, default=Formula.MEDIA_PONDERADA)
+    melhores_notas = models.PositiveSmallIntegerField(default=2) # quantas notas da etapa contam em MELHORES
+    formula_anual = models.CharField(max_length=20, choices=Formula.choices, default=Formula.MEDIA_PONDERADA)
+    melhores_etapas = models.PositiveSmallIntegerField(default=3)
+    recuperacao = models.CharField(max_length=20, choices=Recuperacao.choices, default=Recuperacao.SUBSTITUI)
+    nota_maxima = models.DecimalField(max_digits=5, decimal_places=2, default=10) # escala das médias
+
+    def __str__(self):
+        return f"Critério {self.ano_letivo}"
+
 class NivelEnsino(models.Model):
     """Infantil, Fundamental I, etc"""
     nome = models.CharField(max_length=100)
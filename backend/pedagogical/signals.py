@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from academic.models import Turma
+from sge import cache_http
+from . import zoneamento
+from .models import AnoLetivo, Disciplina, Escola, Zoneamento
+
+
+@receiver(post_save, sender=Zoneamento)
+@receiver(post_delete, sender=Zoneamento)
+def zoneamento_alterado(sender, **kwargs):
+    zoneamento.invalidar()
+
+
+# Versões do cache HTTP dos dados de referência (sge/cache_http.py)
+@receiver(post_save, sender=Escola)
+@receiver(post_delete, sender=Escola)
+@receiver(post_save, sender=AnoLetivo)
+@receiver(post_delete, sender=AnoLetivo)
+@receiver(post_save, sender=Disciplina)
+@receiver(post_delete, sender=Disciplina)
+@receiver(post_save, sender=Turma)
+@receiver(post_delete, sender=Turma)
+@receiver(post_save, sender=Zoneamento)
+@receiver(post_delete, sender=Zoneamento)
+def referencia_alterada(sender, **kwargs):
+    cache_http.invalidar(sender)
@@ -0,0 +1,156 @@
+"""
+Resolução de endereço -> escola pelo Zoneamento.
+
+Os bairros do Zoneamento são normalizados (sem acento, minúsculas,
+abreviações expandidas: "Jd. São José" == "jardim sao jose") e compilados
+em um dict por processo. Resolver um endereço é só normalizar e fazer
+alguns lookups no dict, sem consulta ao banco.
+
+Quando um Zoneamento muda, a versão no cache 'versoes' (visto por todos os
+processos, com ou sem Redis) é trocada e cada worker recompila o seu mapa na
+próxima verificação (a cada VERIFICAR_A_CADA segundos); o processo que fez a
+alteração recompila na hora.
+"""
+import re
+import threading
+import time
+import unicodedata
+
+from django.core.cache import caches
+from django.db import transaction
+
+from people.models import Aluno
+from .models import Zoneamento
+
+CHAVE_VERSAO = 'zoneamento:versao'
+VERIFICAR_A_CADA = 5 # segundos
+
+ABREVIACOES = {
+    'jd': 'jardim', 'jdm': 'jardim', 'jrd': 'jardim',
+    'vl': 'vila', 'pq': 'parque', 'pqe': 'parque',
+    'res': 'residencial', 'resid': 'residencial',
+    'cj': 'conjunto', 'conj': 'conjunto', 'cjto': 'conjunto',
+    'st': 'setor', 'lot': 'loteamento', 'hab': 'habitacional',
+    'ns': 'nossa senhora', 'nsa': 'nossa senhora', 'nsra': 'nossa senhora', 'sra': 'senhora',
+    'sta': 'santa', 'sto': 'santo', 'dr': 'doutor', 'prof': 'professor',
+    'pres': 'presidente', 'gov': 'governador', 'cel': 'coronel', 'mal': 'marechal',
+    'sen': 'senador', 'eng': 'engenheiro', 'pe': 'padre',
+}
+# Conectivos e prefixos que não ajudam a distinguir bairros
+IGNORADAS = {'de', 'da', 'do', 'das', 'dos', 'e', 'bairro'}
+
+_TOKENS = re.compile(r'[a-z0-9]+')
+_SEGMENTOS = re.compile(r'[,;/]| - ')
+
+_lock = threading.Lock()
+_versao = None
+_mapa = None # {bairro normalizado: escola_id}
+_maior_bairro = 0 # em palavras
+_verificado_em = 0.0
+
+
+def normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto or '').encode('ascii', 'ignore').decode().lower()
+    return ' '.join(ABREVIACOES.get(t, t) for t in _TOKENS.findall(texto) if t not in IGNORADAS)
+
+
+def _compilar(versao):
+    global _versao, _mapa, _maior_bairro
+    mapa = {}
+    # Em caso de bairros que normalizam igual, vale o cadastrado primeiro
+    for bairro, escola_id in Zoneamento.objects.order_by('id').values_list('bairro', 'escola_id'):
+        chave = normalizar(bairro)
+        if chave:
+            mapa.setdefault(chave, escola_id)
+    _maior_bairro = max((len(c.split()) for c in mapa), default=0)
+    _mapa = mapa
+    _versao = versao
+
+
+def mapa():
+    global _verificado_em
+    agora = time.monotonic()
+    if _mapa is not None and agora - _verificado_em < VERIFICAR_A_CADA:
+        return _mapa
+    with _lock:
+        if _mapa is None or agora - _verificado_em >= VERIFICAR_A_CADA:
+            versao = caches['versoes'].get(CHAVE_VERSAO)
+            if _mapa is None or versao != _versao:
+                _compilar(versao)
+            _verificado_em = agora
+    return _mapa
+
+
+def resolver(endereco):
+    """
+    escola_id do bairro do endereço, ou None. Primeiro tenta cada trecho
+    inteiro do endereço ("Rua X, 10, Jd. América" -> "jardim america"), do
+    último para o primeiro. Depois procura o bairro dentro dos trechos que
+    vêm depois do logradouro ("Rua X, 10, Jd. América Norte"), das sequências
+    de palavras mais longas para as mais curtas ("jardim america" encobre
+    "america"); se aparecerem bairros de escolas diferentes, o endereço é
+    ambíguo e fica sem escola. O logradouro nunca entra nessa busca: "Rua
+    Jardim América" não é o bairro.
+    """
+    if not endereco:
+        return None
+    zonas = mapa()
+    if not zonas:
+        return None
+
+    trechos = _SEGMENTOS.split(endereco)
+    for trecho in reversed(trechos):
+        escola_id = zonas.get(normalizar(trecho))
+        if escola_id:
+            return escola_id
+
+    encontradas = set()
+    for trecho in trechos[1:]:
+        palavras = normalizar(trecho).split()
+        cobertas = set() # posições já dentro de um bairro mais longo
+        for n in range(min(_maior_bairro, len(palavras)), 0, -1):
+            for i in range(len(palavras) - n + 1):
+                posicoes = set(range(i, i + n))
+                escola_id = zonas.get(' '.join(palavras[i:i + n]))
+                if escola_id and not posicoes & cobertas:
+                    encontradas.add(escola_id)
+                    cobertas |= posicoes
+    return encontradas.pop() if len(encontradas) == 1 else None
+
+
+def invalidar():
+    """Chamado quando um Zoneamento muda (pedagogical/signals.py)."""
+    def _trocar_versao():
+        global _mapa
+        caches['versoes'].set(CHAVE_VERSAO, time.time_ns())
+        _mapa = None
+    transaction.on_commit(_trocar_versao)
+
+
+# --- Alunos ---
+
+def atualizar_aluno(aluno):
+    """Resolve e grava a escola de zoneamento do aluno (só escreve se mudou)."""
+    escola_id = resolver(aluno.pessoa.endereco)
+    if escola_id != aluno.escola_zoneamento_id:
+        aluno.escola_zoneamento_id = escola_id
+        Aluno.objects.filter(id=aluno.id).update(escola_zoneamento_id=escola_id)
+    return escola_id
+
+
+def rezonear_alunos(dry_run=False, chunk_size=5000):
+    """Recalcula a escola de zoneamento de todos os alunos. Devolve (total, alterados)."""
+    alteracoes = []
+    total = 0
+    for aluno_id, endereco, atual in Aluno.objects.values_list(
+        'id', 'pessoa__endereco', 'escola_zoneamento_id'
+    ).iterator(chunk_size=chunk_size):
+        total += 1
+        escola_id = resolver(endereco)
+        if escola_id != atual:
+            alteracoes.append(Aluno(id=aluno_id, escola_zoneamento_id=escola_id))
+
+    if not dry_run:
+        with transaction.atomic():
+            Aluno.objects.bulk_update(alteracoes, ['escola_zoneamento'], batch_size=chunk_size)
+    return total, len(alteracoes)
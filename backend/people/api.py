@@ -1,5 +1,10 @@
-from ninja import Router, Schema
+from django.db.models import Exists, F, OuterRef, Q
+from ninja import FilterSchema, Query, Router, Schema
+from ninja.decorators import decorate_view
 from typing import List
+from academic.models import Matricula
+from sge.metricas import orcamento_sql
+from sge.pagination import pagina, paginate_valores
 from .models import Aluno
 
 router = Router()
@@ -10,15 +15,64 @@ class AlunoOut(Schema):
     cpf: str | None
     data_nascimento: str
 
-@router.get("/alunos", response=List[AlunoOut])
-def listar_alunos(request):
-    alunos = Aluno.objects.select_related('pessoa').all()
-    return [
-        {
-            "id": a.id,
-            "nome": a.pessoa.nome,
-            "cpf": a.pessoa.cpf,
-            "data_nascimento": str(a.pessoa.data_nascimento)
-        }
-        for a in alunos
-    ]
+    @staticmethod
+    def resolve_nome(obj):
+        return obj.pessoa.nome
+
+    @staticmethod
+    def resolve_cpf(obj):
+        return obj.pessoa.cpf
+
+    @staticmethod
+    def resolve_data_nascimento(obj):
+        return str(obj.pessoa.data_nascimento)
+
+class AlunoFiltro(FilterSchema):
+    # Alunos com matrícula na escola / no ano letivo (EXISTS evita duplicar linhas)
+    escola_id: int | None = None
+    ano_letivo_id: int | None = None
+
+    def filter_escola_id(self, value):
+        return self._com_matricula(ano_letivo__escola_id=value) if value else Q()
+
+    def filter_ano_letivo_id(self, value):
+        return self._com_matricula(ano_letivo_id=value) if value else Q()
+
+    @staticmethod
+    def _com_matricula(**filtros):
+        return Q(Exists(Matricula.objects.filter(aluno_id=OuterRef('pk'), **filtros)))
+
+@router.get("/alunos", response=pagina(AlunoOut))
+@decorate_view(orcamento_sql(2))
+@paginate_valores
+def listar_alunos(request, filtros: AlunoFiltro = Query(...)):
+    return filtros.filter(Aluno.objects.all()).values(
+        'id', nome=F('pessoa__nome'), cpf=F('pessoa__cpf'), data_nascimento=F('pessoa__data_nascimento')
+    ).order_by('id')
+
+# --- Busca ---
+from . import busca
+
+class PessoaBuscaOut(Schema):
+    id: int # ID da Pessoa
+    aluno_id: int | None
+    nome: str
+    nome_mae: str | None
+    cpf: str | None
+    nis: str | None
+    codigo_inep: str | None
+    data_nascimento: str
+    score: float
+
+    @staticmethod
+    def resolve_data_nascimento(obj):
+        return str(obj.data_nascimento)
+
+@router.get("/busca", response=List[PessoaBuscaOut])
+def buscar_pessoas(
+    request,
+    q: str = Query(..., min_length=busca.TAMANHO_MINIMO),
+    somente_alunos: bool = False,
+    limite: int = Query(20, ge=1, le=100)
+):
+    return busca.buscar(q, somente_alunos=somente_alunos, limite=limite)
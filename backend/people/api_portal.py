@@ -1,11 +1,18 @@
 from ninja import Router, Schema
+from ninja.decorators import decorate_view
+from django.core.cache import cache
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
 from .models import Aluno
 from academic.models import Matricula
 from diary.models import Nota, Frequencia
+from . import portal_cache
 from typing import List
+from sge.db_router import ler_da_replica, usar_primario
+from sge.metricas import orcamento_sql
 
 router = Router()
+router.add_decorator(ler_da_replica, mode="view")
 
 class LoginIn(Schema):
     cpf: str
@@ -22,7 +29,7 @@ def login(request, payload: LoginIn):
     
     # Try to find student by CPF
     # We filter by pessoa__cpf because Aluno has a O2O to Pessoa
-    aluno = get_object_or_404(Aluno, pessoa__cpf=clean_cpf)
+    aluno = get_object_or_404(Aluno.objects.select_related('pessoa'), pessoa__cpf=clean_cpf)
     
     return {
         "id": aluno.id,
@@ -47,12 +54,26 @@ class MeOut(Schema):
     frequencia: FrequenciaSchema
 
 @router.get("/me", response=MeOut)
+@decorate_view(orcamento_sql(5))
 def get_me(request, student_id: int):
     # In a real app, we would get student_id from the token/session
-    aluno = get_object_or_404(Aluno, id=student_id)
+    dados = cache.get(portal_cache.chave_me(student_id))
+    if dados is None:
+        # A escrita que invalidou o cache veio de outro cliente (o professor),
+        # então o aluno não está fixado no primário: montado da réplica, o
+        # resumo atrasado ficaria no cache até o TIMEOUT
+        with usar_primario():
+            dados = _montar_me(student_id)
+        cache.set(portal_cache.chave_me(student_id), dados, portal_cache.TIMEOUT)
+    return dados
+
+def _montar_me(student_id):
+    aluno = get_object_or_404(Aluno.objects.select_related('pessoa'), id=student_id)
     
-    # Get active enrollment
-    matricula = Matricula.objects.filter(aluno=aluno, status=Matricula.Status.ATIVA).first()
+    # Get active enrollment (turma -> ano letivo -> escola no mesmo JOIN, para o rótulo da turma)
+    matricula = Matricula.objects.filter(
+        aluno=aluno, status=Matricula.Status.ATIVA
+    ).select_related('turma__ano_letivo__escola').first()
     
     notas_data = []
     freq_data = {"presente": 0, "total": 0, "porcentagem": 0.0}
@@ -70,10 +91,14 @@ def get_me(request, student_id: int):
                 "valor": float(n.valor) if n.valor else 0.0
             })
             
-        # Get attendance
-        frequencias = Frequencia.objects.filter(matricula=matricula)
-        total_aulas = frequencias.count()
-        presente = frequencias.filter(presente=True).count()
+        # Get attendance: total e presentes em um único aggregate. Contando a
+        # coluna presente (e não o id) basta o frequencia_matricula_idx (index-only scan)
+        frequencia = Frequencia.objects.filter(matricula=matricula).aggregate(
+            total=Count('presente'),
+            presente=Count('presente', filter=Q(presente=True))
+        )
+        total_aulas = frequencia['total']
+        presente = frequencia['presente']
         
         if total_aulas > 0:
             porcentagem = (presente / total_aulas) * 100
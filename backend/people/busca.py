@@ -0,0 +1,62 @@
+"""
+Busca de pessoas/alunos por nome, nome da mãe ou documento.
+
+Nomes: comparação sem acento e sem caixa (f_unaccent(lower(...))) com o
+operador de similaridade por palavra do pg_trgm, que tolera erros de
+digitação e nomes incompletos ("maria silva" acha "Maria Aparecida da Silva").
+Documentos (CPF, NIS, INEP): busca por trecho dos dígitos.
+Ambos os casos usam os índices GIN de people/models.py.
+"""
+import re
+
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Greatest
+
+from .models import Normalizado, Pessoa, SoDigitos
+
+TAMANHO_MINIMO = 3 # trigramas não indexam termos menores
+PESO_NOME_MAE = 0.8
+
+_DOCUMENTO = re.compile(r'^[\d\s./-]+$')
+
+
+def buscar(termo, somente_alunos=False, limite=20):
+    """Devolve as `limite` pessoas mais parecidas com `termo`, com `score` (0 a 1)."""
+    termo = termo.strip()
+    pessoas = Pessoa.objects.annotate(
+        aluno_id=F('aluno_profile__id'),
+        nis=F('aluno_profile__nis'),
+        codigo_inep=F('aluno_profile__codigo_inep')
+    )
+    if somente_alunos:
+        pessoas = pessoas.filter(aluno_profile__isnull=False)
+
+    digitos = re.sub(r'\D', '', termo)
+    if _DOCUMENTO.match(termo) and len(digitos) >= TAMANHO_MINIMO:
+        pessoas = pessoas.annotate(cpf_digitos=SoDigitos('cpf')).filter(
+            Q(cpf_digitos__contains=digitos) |
+            Q(aluno_profile__nis__contains=digitos) |
+            Q(aluno_profile__codigo_inep__contains=digitos)
+        )
+        score = Case(
+            When(Q(cpf_digitos=digitos) | Q(nis=digitos) | Q(codigo_inep=digitos), then=Value(1.0)),
+            default=Value(0.5),
+            output_field=FloatField()
+        )
+    else:
+        alvo = Normalizado(Value(termo))
+        pessoas = pessoas.annotate(
+            nome_busca=Normalizado('nome'),
+            nome_mae_busca=Normalizado('nome_mae')
+        ).filter(
+            Q(nome_busca__trigram_word_similar=alvo) |
+            Q(nome_mae_busca__trigram_word_similar=alvo)
+        )
+        # GREATEST ignora NULL (pessoas sem nome da mãe)
+        score = Greatest(
+            TrigramWordSimilarity(alvo, 'nome_busca'),
+            TrigramWordSimilarity(alvo, 'nome_mae_busca') * PESO_NOME_MAE
+        )
+
+    return pessoas.annotate(score=score).order_by('-score', 'nome', 'id')[:limite]
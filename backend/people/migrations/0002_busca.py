@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:56
+
+import django.contrib.postgres.indexes
+import people.models
+from django.contrib.postgres.operations import TrigramExtension, UnaccentExtension
+from django.db import migrations
+
+# unaccent() é STABLE e não pode ser usado em índice; o wrapper com o
+# dicionário fixo é seguro para marcar como IMMUTABLE.
+F_UNACCENT = """
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        UnaccentExtension(),
+        migrations.RunSQL(F_UNACCENT, "DROP FUNCTION IF EXISTS f_unaccent(text);"),
+        migrations.AddIndex(
+            model_name='aluno',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('nis', name='gin_trgm_ops'), name='aluno_nis_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aluno',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('codigo_inep', name='gin_trgm_ops'), name='aluno_inep_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(people.models.Normalizado('nome'), name='gin_trgm_ops'), name='pessoa_nome_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(people.models.Normalizado('nome_mae'), name='gin_trgm_ops'), name='pessoa_nome_mae_trgm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pessoa',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(people.models.SoDigitos('cpf'), name='gin_trgm_ops'), name='pessoa_cpf_trgm_idx'),
+        ),
+    ]
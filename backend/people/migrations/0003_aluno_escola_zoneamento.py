@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogical', '0002_zoneamento'),
+        ('people', '0002_busca'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aluno',
+            name='escola_zoneamento',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='alunos_zoneados', to='pedagogical.escola'),
+        ),
+    ]
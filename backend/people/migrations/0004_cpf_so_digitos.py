@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('people', '0003_aluno_escola_zoneamento'),
+    ]
+
+    operations = [
+        # A importação gravava o CPF com máscara; o login do portal procura só
+        # os dígitos. Mantém a máscara quando a forma só com dígitos já existe.
+        migrations.RunSQL(
+            """
+            UPDATE people_pessoa p SET cpf = regexp_replace(p.cpf, '\\D', '', 'g')
+            WHERE p.cpf ~ '\\D'
+              AND NOT EXISTS (
+                  SELECT 1 FROM people_pessoa o WHERE o.cpf = regexp_replace(p.cpf, '\\D', '', 'g')
+              )
+            """,
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+    ]
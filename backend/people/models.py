@@ -1,4 +1,27 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
 from django.db import models
+from django.db.models.functions import Lower
+
+
+# --- Expressões de busca ---
+# Usadas tanto nos índices GIN quanto nas consultas de people/busca.py;
+# precisam ser idênticas para o Postgres aproveitar os índices.
+
+class Normalizado(models.Func):
+    """f_unaccent(lower(x)). f_unaccent é o wrapper IMMUTABLE criado em 0002_busca."""
+    function = 'f_unaccent'
+    output_field = models.TextField()
+
+    def __init__(self, expression, **extra):
+        super().__init__(Lower(expression), **extra)
+
+
+class SoDigitos(models.Func):
+    """Remove pontuação de documentos (CPF com ou sem máscara)."""
+    function = 'regexp_replace'
+    template = "%(function)s(%(expressions)s, '[^0-9]', '', 'g')"
+    output_field = models.TextField()
+
 
 class Pessoa(models.Model):
     nome = models.CharField(max_length=255)
@@ -17,6 +40,13 @@ class Pessoa(models.Model):
     
     raca_cor = models.CharField(max_length=2, choices=RacaCor.choices, default=RacaCor.NAO_DECLARADA)
     deficiencia = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            GinIndex(OpClass(Normalizado('nome'), name='gin_trgm_ops'), name='pessoa_nome_trgm_idx'),
+            GinIndex(OpClass(Normalizado('nome_mae'), name='gin_trgm_ops'), name='pessoa_nome_mae_trgm_idx'),
+            GinIndex(OpClass(SoDigitos('cpf'), name='gin_trgm_ops'), name='pessoa_cpf_trgm_idx'),
+        ]
     
     def __str__(self):
         return self.nome
@@ -26,6 +56,16 @@ class Aluno(models.Model):
     nis = models.CharField(max_length=20, null=True, blank=True)
     transporte_escolar = models.BooleanField(default=False)
     codigo_inep = models.CharField(max_length=20, null=True, blank=True)
+    # Escola do bairro do endereço (pedagogical/zoneamento.py)
+    escola_zoneamento = models.ForeignKey(
+        'pedagogical.Escola', on_delete=models.SET_NULL, null=True, blank=True, related_name='alunos_zoneados'
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(OpClass('nis', name='gin_trgm_ops'), name='aluno_nis_trgm_idx'),
+            GinIndex(OpClass('codigo_inep', name='gin_trgm_ops'), name='aluno_inep_trgm_idx'),
+        ]
     
     def __str__(self):
         return f"Aluno: {self.pessoa.nome}"
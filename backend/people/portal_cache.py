@@ -0,0 +1,31 @@
+"""
+Cache do resumo do portal (/portal/me), um item por aluno.
+
+O payload inteiro do MeOut fica no cache default e é removido quando
+notas, frequências ou a matrícula do aluno mudam (people/signals.py).
+O TIMEOUT só cobre o que não é invalidado explicitamente (ex.: renomear
+uma disciplina ou turma).
+"""
+from django.core.cache import cache
+from django.db import transaction
+
+from academic.models import Matricula
+
+TIMEOUT = 60 * 10
+
+
+def chave_me(aluno_id):
+    return f"portal:me:{aluno_id}"
+
+
+def invalidar_alunos(aluno_ids):
+    chaves = [chave_me(a) for a in set(aluno_ids)]
+    if chaves:
+        # Só depois do commit: antes disso outro request ainda leria o dado antigo
+        # e gravaria de volta no cache.
+        transaction.on_commit(lambda: cache.delete_many(chaves))
+
+
+def invalidar_matriculas(matricula_ids):
+    if matricula_ids:
+        invalidar_alunos(Matricula.objects.filter(id__in=matricula_ids).values_list('aluno_id', flat=True))
@@ -0,0 +1,38 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from academic.models import Matricula
+from academic.signals import matriculas_criadas, matriculas_encerradas
+from diary.signals import frequencias_alteradas, notas_alteradas
+from . import portal_cache
+from .models import Aluno, Pessoa
+
+# Alunos criados em lote (bulk_create não dispara post_save). kwargs: aluno_ids (set[int])
+alunos_criados = Signal()
+
+
+@receiver(notas_alteradas)
+@receiver(frequencias_alteradas)
+def diario_alterado(sender, matricula_ids, **kwargs):
+    portal_cache.invalidar_matriculas(matricula_ids)
+
+
+@receiver(matriculas_criadas)
+@receiver(matriculas_encerradas)
+def matriculas_em_lote(sender, matricula_ids, aluno_ids=None, **kwargs):
+    if aluno_ids is not None:
+        portal_cache.invalidar_alunos(aluno_ids)
+    else:
+        portal_cache.invalidar_matriculas(matricula_ids)
+
+
+@receiver(post_save, sender=Matricula)
+@receiver(post_delete, sender=Matricula)
+def matricula_alterada(sender, instance, **kwargs):
+    portal_cache.invalidar_alunos([instance.aluno_id])
+
+
+@receiver(post_save, sender=Pessoa)
+def pessoa_alterada(sender, instance, created, **kwargs):
+    if not created:
+        portal_cache.invalidar_alunos(Aluno.objects.filter(pessoa=instance).values_list('id', flat=True))
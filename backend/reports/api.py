@@ -1,13 +1,21 @@
+import time
+from typing import Literal
 from ninja import Router
-from django.http import HttpResponse
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
 from django.shortcuts import get_object_or_404
-from django.template.loader import render_to_string
+from django.conf import settings
 from weasyprint import HTML
 from people.models import Aluno
 from diary.models import Nota
-from academic.models import Matricula
+from academic.models import Turma
+from pedagogical.models import Escola
+from sge.db_router import ler_da_replica
+from . import boletim
 
 router = Router()
+# Relatórios e dashboard só leem: vão para a réplica, se houver
+router.add_decorator(ler_da_replica, mode="view")
 
 @router.get("/boletim/{aluno_id}")
 def gerar_boletim(request, aluno_id: int):
@@ -15,103 +23,211 @@ def gerar_boletim(request, aluno_id: int):
     
     # Busca matrícula ativa (assumindo ano atual 2026)
     # Em produção, pegaria do request ou contexto
-    matricula = Matricula.objects.filter(aluno=aluno, status=Matricula.Status.ATIVA).first()
+    matricula = boletim.matriculas_ativas().filter(aluno=aluno).first()
     
     if not matricula:
         return 404, {"message": "Aluno não possui matrícula ativa."}
         
-    notas = Nota.objects.filter(matricula=matricula).select_related('avaliacao', 'avaliacao__turma')
-    
-    # Agrupar notas por disciplina? 
-    # Modelo atual: Nota -> Avaliacao -> Turma -> Matriz?
-    # Simplificação: Lista plana de avaliações por enquanto.
-    
-    html_string = render_to_string('reports/boletim.html', {
-        'aluno': aluno,
-        'matricula': matricula,
-        'notas': notas
-    })
+    # Lista das avaliações + quadro por disciplina/etapa (já calculado por diary/medias.py)
+    notas = list(Nota.objects.filter(matricula=matricula).select_related('avaliacao').order_by('avaliacao__data', 'avaliacao_id'))
+    resultados = boletim.resultados_por_matricula([matricula.id]).get(matricula.id, [])
+
+    # O digest das notas é o ETag: downloads repetidos não renderizam nada
+    chave = boletim.digest(matricula, notas, resultados)
+    etag = f'"{chave}"'
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        pdf_file = boletim.pdf_em_cache(chave)
+        if pdf_file is None:
+            html_string = boletim.renderizar_html(matricula, notas, resultados)
+            pdf_file = HTML(string=html_string).write_pdf()
+            boletim.guardar_pdf(chave, pdf_file)
+
+        response = HttpResponse(pdf_file, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="boletim_{aluno.pessoa.nome}.pdf"'
+
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
+# --- Boletins em Lote ---
+# Renderiza todos os boletins de uma turma/escola em paralelo (pool de processos)
+# e devolve um único PDF ou um ZIP com um PDF por aluno.
+
+def _resposta_lote(matriculas, formato, workers, nome_base):
+    # workers só limita quantos PDFs deste lote rodam ao mesmo tempo; o pool
+    # do processo é criado uma vez, com BOLETIM_WORKERS_MAX
+    workers = max(1, min(workers or settings.BOLETIM_WORKERS, settings.BOLETIM_WORKERS_MAX))
 
-    pdf_file = HTML(string=html_string).write_pdf()
+    inicio = time.perf_counter()
+    documentos = boletim.gerar_lote(matriculas, workers=workers)
 
-    response = HttpResponse(pdf_file, content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="boletim_{aluno.pessoa.nome}.pdf"'
+    if formato == 'pdf':
+        response = HttpResponse(boletim.juntar_pdf(documentos), content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{nome_base}.pdf"'
+    else:
+        response = HttpResponse(boletim.compactar_zip(documentos), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{nome_base}.zip"'
+
+    for header, valor in boletim.cabecalhos_tempo(documentos, time.perf_counter() - inicio, workers).items():
+        response[header] = valor
     return response
 
+@router.get("/boletins/turma/{turma_id}")
+def gerar_boletins_turma(request, turma_id: int, formato: Literal['zip', 'pdf'] = 'zip', workers: int = None):
+    turma = get_object_or_404(Turma, id=turma_id)
+    return _resposta_lote(boletim.matriculas_da_turma(turma.id), formato, workers, f"boletins_turma_{turma.id}")
+
+@router.get("/boletins/escola/{escola_id}")
+def gerar_boletins_escola(request, escola_id: int, formato: Literal['zip', 'pdf'] = 'zip', workers: int = None):
+    escola = get_object_or_404(Escola, id=escola_id)
+    return _resposta_lote(boletim.matriculas_da_escola(escola.id), formato, workers, f"boletins_escola_{escola.id}")
+
 # --- Educacenso Exports ---
+# Os CSVs são gerados sob demanda: linhas vêm de um cursor do servidor
+# (.iterator) como tuplas (values_list), sem instanciar models, e são
+# enviadas em blocos pelo StreamingHttpResponse. A memória do worker fica
+# constante independente do tamanho da rede.
 import csv
-from pedagogical.models import Escola
+from django.http import StreamingHttpResponse
+from .educacenso import CABECALHO_ALUNOS, CABECALHO_ESCOLAS, linhas_alunos, linhas_escolas
+
+class _Echo:
+    """Pseudo-buffer: csv.writer escreve e recebemos a linha de volta."""
+    def write(self, value):
+        return value
+
+def _csv_stream(cabecalho, linhas, bloco=500):
+    writer = csv.writer(_Echo())
+    buffer = [writer.writerow(cabecalho)]
+    for linha in linhas:
+        buffer.append(writer.writerow(linha))
+        if len(buffer) >= bloco:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+def _csv_response(nome_arquivo, cabecalho, linhas):
+    response = StreamingHttpResponse(_csv_stream(cabecalho, linhas), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{nome_arquivo}"'
+    return response
 
 @router.get("/educacenso/escolas")
 def exportar_escolas(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="escolas_educacenso.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Nome', 'INEP', 'Endereço'])
-
-    escolas = Escola.objects.all()
-    for escola in escolas:
-        writer.writerow([escola.id, escola.nome, escola.inep, escola.endereco])
-
-    return response
+    return _csv_response('escolas_educacenso.csv', CABECALHO_ESCOLAS, linhas_escolas())
 
 @router.get("/educacenso/alunos")
 def exportar_alunos(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="alunos_educacenso.csv"'
-
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Nome', 'CPF', 'Data Nascimento', 'Nome Mãe', 'Raça/Cor', 'Deficiência', 'NIS', 'INEP', 'Transporte'])
-
-    alunos = Aluno.objects.select_related('pessoa').all()
-    for aluno in alunos:
-        writer.writerow([
-            aluno.id,
-            aluno.pessoa.nome,
-            aluno.pessoa.cpf,
-            aluno.pessoa.data_nascimento,
-            aluno.pessoa.nome_mae,
-            aluno.pessoa.get_raca_cor_display(),
-            'Sim' if aluno.pessoa.deficiencia else 'Não',
-            aluno.nis,
-            aluno.codigo_inep,
-            'Sim' if aluno.transporte_escolar else 'Não'
-        ])
-
-    return response
+    return _csv_response('alunos_educacenso.csv', CABECALHO_ALUNOS, linhas_alunos())
 
 # --- Dashboard Stats ---
 from django.db.models import Count, Avg, Q
-from academic.models import Turma
-from people.models import Professor
+from . import contadores, risco
+from .models import RiscoMatricula
 
 @router.get("/dashboard/stats")
 def get_dashboard_stats(request):
-    total_escolas = Escola.objects.count()
-    total_alunos = Aluno.objects.count()
-    total_professores = Professor.objects.count()
-    total_turmas = Turma.objects.count()
-    
-    # Students at risk (Mock logic for now as full aggregation is heavy)
+    # Totais vêm da tabela de contadores materializados (reports/contadores.py)
+    totais, atualizado_em, por_escola = contadores.snapshot()
     
-    alunos_baixo_desempenho = []
-    
-    # Pega ultimas notas para exemplificar
-    notas_baixas = Nota.objects.filter(valor__lt=60).select_related('matricula__aluno__pessoa', 'avaliacao__disciplina')[:5]
-    
-    for n in notas_baixas:
-        alunos_baixo_desempenho.append({
-            "aluno": n.matricula.aluno.pessoa.nome,
-            "motivo": f"Nota baixa em {n.avaliacao.disciplina.nome if n.avaliacao.disciplina else 'Avaliação'}: {n.valor}"
-        })
+    # Alunos em risco: top do ranking pré-calculado (reports/risco.py)
+    alunos_baixo_desempenho = [
+        {
+            "aluno": r.matricula.aluno.pessoa.nome,
+            "motivo": risco.motivo(r)
+        }
+        for r in _ranking_risco().filter(score__gt=0)[:5]
+    ]
 
     return {
         "counts": {
-            "escolas": total_escolas,
-            "alunos": total_alunos,
-            "professores": total_professores,
-            "turmas": total_turmas
+            "escolas": totais.get("escolas", 0),
+            "alunos": totais.get("alunos", 0),
+            "professores": totais.get("professores", 0),
+            "turmas": totais.get("turmas", 0),
+            "matriculas_ativas": totais.get("matriculas_ativas", 0)
         },
+        "atualizado_em": atualizado_em,
+        "por_escola": por_escola,
         "at_risk": alunos_baixo_desempenho
     }
+
+# --- Alunos em Risco ---
+from decimal import Decimal, InvalidOperation
+from ninja import Schema
+from ninja.errors import HttpError
+from typing import List
+
+class RiscoOut(Schema):
+    matricula_id: int
+    aluno_id: int
+    aluno_nome: str
+    turma: str
+    escola_id: int
+    score: float
+    media_geral: float | None
+    pior_media: float | None
+    disciplinas_abaixo: int
+    frequencia: float | None
+    motivo: str
+    atualizado_em: str
+
+class RiscoPagina(Schema):
+    items: List[RiscoOut]
+    proximo: str | None
+
+def _ranking_risco():
+    return RiscoMatricula.objects.select_related(
+        'matricula__aluno__pessoa', 'matricula__turma', 'disciplina_pior'
+    ).order_by('-score', 'matricula_id')
+
+def _decodificar_cursor_risco(cursor):
+    """'score:matricula_id' -> (Decimal, int). Cursor malformado -> 400."""
+    try:
+        score, matricula_id = cursor.split(':')
+        score, matricula_id = Decimal(score), int(matricula_id)
+    except (ValueError, InvalidOperation):
+        raise HttpError(400, "Cursor inválido.")
+    if not score.is_finite():
+        raise HttpError(400, "Cursor inválido.")
+    return score, matricula_id
+
+@router.get("/risco", response=RiscoPagina)
+def listar_risco(request, escola_id: int = None, limite: int = 50, cursor: str = None):
+    """Ranking paginado por chave (score, matricula_id): qualquer página custa o mesmo."""
+    limite = max(1, min(limite, 500))
+    riscos = _ranking_risco()
+    if escola_id:
+        riscos = riscos.filter(escola_id=escola_id)
+    if cursor:
+        score, matricula_id = _decodificar_cursor_risco(cursor)
+        riscos = riscos.filter(Q(score__lt=score) | Q(score=score, matricula_id__gt=matricula_id))
+
+    pagina = list(riscos[:limite + 1])
+    proximo = None
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        proximo = f"{pagina[-1].score}:{pagina[-1].matricula_id}"
+
+    return {
+        "items": [
+            {
+                "matricula_id": r.matricula_id,
+                "aluno_id": r.matricula.aluno_id,
+                "aluno_nome": r.matricula.aluno.pessoa.nome,
+                "turma": r.matricula.turma.nome,
+                "escola_id": r.escola_id,
+                "score": r.score,
+                "media_geral": r.media_geral,
+                "pior_media": r.pior_media,
+                "disciplinas_abaixo": r.disciplinas_abaixo,
+                "frequencia": r.frequencia,
+                "motivo": risco.motivo(r),
+                "atualizado_em": r.atualizado_em.isoformat()
+            }
+            for r in pagina
+        ],
+        "proximo": proximo
+    }
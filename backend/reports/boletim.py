@@ -0,0 +1,284 @@
+"""
+Geração de boletins: monta o contexto, renderiza o HTML e distribui a
+renderização dos PDFs (parte cara, CPU do WeasyPrint) em um pool de processos.
+"""
+import csv
+import hashlib
+import io
+import os
+import statistics
+import tempfile
+import time
+import zipfile
+from dataclasses import dataclass
+from itertools import groupby
+
+from django.conf import settings
+from django.template.loader import get_template, render_to_string
+from django.utils.text import slugify
+from pypdf import PdfWriter
+
+from academic.models import Matricula
+from diary.models import Nota, ResultadoDisciplina
+from .pdf import get_pool, renderizar_em_paralelo
+
+TEMPLATE_BOLETIM = 'reports/boletim.html'
+
+# Incrementar quando a forma de gerar o PDF mudar sem mudar o template
+VERSAO_RENDERIZACAO = 1
+
+_versao_template = None
+
+
+@dataclass
+class Documento:
+    matricula_id: int
+    aluno_nome: str
+    pdf: bytes
+    segundos_html: float
+    segundos_pdf: float
+    em_cache: bool = False
+
+    @property
+    def nome_arquivo(self):
+        return f"boletim_{self.matricula_id}_{slugify(self.aluno_nome)}.pdf"
+
+
+def matriculas_ativas():
+    return Matricula.objects.filter(status=Matricula.Status.ATIVA).select_related(
+        'aluno__pessoa', 'turma__ano_letivo__escola'
+    )
+
+
+def matriculas_da_turma(turma_id):
+    return matriculas_ativas().filter(turma_id=turma_id).order_by('aluno__pessoa__nome')
+
+
+def matriculas_da_escola(escola_id):
+    return matriculas_ativas().filter(
+        ano_letivo__escola_id=escola_id,
+        ano_letivo__ativo=True
+    ).order_by('turma__nome', 'aluno__pessoa__nome')
+
+
+def notas_por_matricula(matriculas):
+    """
+    Busca as notas de todas as matrículas em uma única consulta
+    e devolve {matricula_id: [notas]}.
+    """
+    notas = Nota.objects.filter(matricula__in=matriculas).select_related('avaliacao').order_by(
+        'matricula_id', 'avaliacao__data', 'avaliacao_id'
+    )
+    return {mat_id: list(grupo) for mat_id, grupo in groupby(notas, key=lambda n: n.matricula_id)}
+
+
+def resultados_por_matricula(matriculas):
+    """
+    Resultados por disciplina/etapa (diary/medias.py) de todas as matrículas
+    em uma única consulta: {matricula_id: [resultados]}.
+    """
+    resultados = ResultadoDisciplina.objects.filter(matricula__in=matriculas).select_related(
+        'disciplina', 'etapa'
+    ).order_by('matricula_id', 'disciplina__nome', 'disciplina_id', 'etapa__data_inicio', 'etapa_id')
+    return {mat_id: list(grupo) for mat_id, grupo in groupby(resultados, key=lambda r: r.matricula_id)}
+
+
+def quadro(resultados):
+    """Quadro de resultados do boletim: uma linha por disciplina, uma coluna por etapa e o resultado anual."""
+    etapas = sorted({r.etapa for r in resultados if r.etapa}, key=lambda e: (e.data_inicio, e.id))
+    linhas = {}
+    for r in resultados:
+        linha = linhas.setdefault(r.disciplina_id, {
+            'disciplina': r.disciplina.nome if r.disciplina else 'Geral', 'etapas': {}, 'anual': None
+        })
+        if r.etapa_id is None:
+            linha['anual'] = r
+        else:
+            linha['etapas'][r.etapa_id] = r
+    return {
+        'etapas': etapas,
+        'linhas': [
+            {**linha, 'etapas': [linha['etapas'].get(e.id) for e in etapas]}
+            for linha in linhas.values()
+        ]
+    }
+
+
+def renderizar_html(matricula, notas, resultados):
+    return render_to_string(TEMPLATE_BOLETIM, {
+        'aluno': matricula.aluno,
+        'matricula': matricula,
+        'notas': notas,
+        'quadro': quadro(resultados)
+    })
+
+
+# --- Cache de PDFs ---
+# A chave é um digest de tudo que aparece no boletim (matrícula, turma, notas,
+# avaliações, resultados e versão do template). Qualquer alteração em Nota ou Avaliacao
+# muda o digest, então a entrada antiga simplesmente deixa de ser usada e é
+# apagada por limpar() quando fica BOLETINS_DIAS sem ser lida — não há
+# invalidação explícita a coordenar.
+# Cada PDF é um arquivo BOLETINS_DIR/<ab>/<digest>.pdf: ler e gravar é abrir um
+# arquivo, sem a varredura do diretório inteiro que o FileBasedCache faz a cada
+# set para respeitar o MAX_ENTRIES. A limpeza fica fora das requisições
+# (manage.py limpar_boletins, rodar à noite).
+
+def versao_template():
+    global _versao_template
+    if _versao_template is None:
+        fonte = get_template(TEMPLATE_BOLETIM).template.source
+        _versao_template = hashlib.sha256(fonte.encode()).hexdigest()[:16]
+    return _versao_template
+
+
+def digest(matricula, notas, resultados):
+    h = hashlib.sha256()
+    turma = matricula.turma
+    partes = [
+        versao_template(), VERSAO_RENDERIZACAO,
+        matricula.id, matricula.status, matricula.aluno.pessoa.nome,
+        turma.id, turma.nome, turma.turno, turma.ano_letivo.ano, turma.ano_letivo.escola.nome,
+    ]
+    for nota in notas:
+        a = nota.avaliacao
+        partes.extend([nota.id, nota.valor, a.id, a.nome, a.data, a.valor_maximo])
+    for r in resultados:
+        partes.extend([r.disciplina_id, r.etapa_id, r.valor, r.maximo, r.recuperado])
+    h.update('\x1f'.join(str(p) for p in partes).encode())
+    return h.hexdigest()
+
+
+def caminho_pdf(chave):
+    return settings.BOLETINS_DIR / chave[:2] / f"{chave}.pdf"
+
+
+def pdf_em_cache(chave):
+    caminho = caminho_pdf(chave)
+    try:
+        pdf_file = caminho.read_bytes()
+    except FileNotFoundError:
+        return None
+    # Lido agora: o prazo de limpar() recomeça
+    try:
+        os.utime(caminho)
+    except FileNotFoundError: # apagado por limpar() logo depois da leitura
+        pass
+    return pdf_file
+
+
+def guardar_pdf(chave, pdf_file):
+    caminho = caminho_pdf(chave)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    # Grava ao lado e renomeia: quem lê nunca vê um PDF pela metade
+    fd, temporario = tempfile.mkstemp(dir=caminho.parent, suffix='.parcial')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(pdf_file)
+    os.replace(temporario, caminho)
+
+
+def limpar(dias=None):
+    """
+    Apaga os PDFs não lidos há `dias` (padrão BOLETINS_DIAS) e restos de
+    gravações interrompidas. Devolve quantos arquivos foram apagados.
+    """
+    dias = settings.BOLETINS_DIAS if dias is None else dias
+    limite = time.time() - dias * 24 * 60 * 60
+    apagados = 0
+    for caminho in settings.BOLETINS_DIR.glob('*/*'):
+        try:
+            if caminho.stat().st_mtime < limite:
+                caminho.unlink()
+                apagados += 1
+        except FileNotFoundError:
+            pass
+    return apagados
+
+
+def gerar_lote(matriculas, workers=None):
+    """
+    Renderiza o boletim de cada matrícula. O HTML é montado aqui (precisa do
+    ORM e dos templates); os PDFs são gerados no pool (BOLETIM_WORKERS_MAX
+    processos), com no máximo `workers` deste lote em andamento.
+    Boletins já presentes no cache não são renderizados de novo.
+    Devolve a lista de Documento na mesma ordem das matrículas.
+    """
+    workers = workers or settings.BOLETIM_WORKERS
+    matriculas = list(matriculas)
+    notas = notas_por_matricula([m.id for m in matriculas])
+    resultados = resultados_por_matricula([m.id for m in matriculas])
+
+    chaves = {m.id: digest(m, notas.get(m.id, []), resultados.get(m.id, [])) for m in matriculas}
+
+    documentos = {}
+    pendentes = []
+    for m in matriculas:
+        pdf_file = pdf_em_cache(chaves[m.id])
+        if pdf_file is not None:
+            documentos[m.id] = Documento(m.id, m.aluno.pessoa.nome, pdf_file, 0.0, 0.0, em_cache=True)
+            continue
+        inicio = time.perf_counter()
+        html_string = renderizar_html(m, notas.get(m.id, []), resultados.get(m.id, []))
+        pendentes.append((m, html_string, time.perf_counter() - inicio))
+
+    if pendentes:
+        pool = get_pool(settings.BOLETIM_WORKERS_MAX)
+        resultados = renderizar_em_paralelo(pool, [h for _, h, _ in pendentes], workers)
+        for (m, _, segundos_html), (pdf_file, segundos_pdf) in zip(pendentes, resultados):
+            documentos[m.id] = Documento(m.id, m.aluno.pessoa.nome, pdf_file, segundos_html, segundos_pdf)
+            guardar_pdf(chaves[m.id], pdf_file)
+
+    return [documentos[m.id] for m in matriculas]
+
+
+def juntar_pdf(documentos):
+    writer = PdfWriter()
+    for doc in documentos:
+        writer.append(io.BytesIO(doc.pdf))
+    saida = io.BytesIO()
+    writer.write(saida)
+    return saida.getvalue()
+
+
+def compactar_zip(documentos):
+    """ZIP com um PDF por aluno e um tempos.csv para dimensionar o pool."""
+    saida = io.BytesIO()
+    # PDFs já são comprimidos; ZIP_STORED evita gastar CPU à toa
+    with zipfile.ZipFile(saida, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for doc in documentos:
+            zf.writestr(doc.nome_arquivo, doc.pdf)
+
+        tempos = io.StringIO()
+        writer = csv.writer(tempos)
+        writer.writerow(['matricula_id', 'aluno', 'html_ms', 'pdf_ms', 'bytes'])
+        for doc in documentos:
+            writer.writerow([
+                doc.matricula_id,
+                doc.aluno_nome,
+                round(doc.segundos_html * 1000, 1),
+                round(doc.segundos_pdf * 1000, 1),
+                len(doc.pdf)
+            ])
+        zf.writestr('tempos.csv', tempos.getvalue())
+    return saida.getvalue()
+
+
+def cabecalhos_tempo(documentos, segundos_total, workers):
+    """Resumo de tempos por documento, no formato Server-Timing."""
+    if not documentos:
+        return {'X-Boletim-Documentos': '0'}
+    renderizados = [d for d in documentos if not d.em_cache]
+    pdf_ms = [d.segundos_pdf * 1000 for d in renderizados] or [0.0]
+    html_ms = sum(d.segundos_html for d in documentos) * 1000
+    return {
+        'Server-Timing': ', '.join([
+            f"total;dur={segundos_total * 1000:.1f}",
+            f"html;dur={html_ms:.1f}",
+            f"pdf-soma;dur={sum(pdf_ms):.1f}",
+            f"pdf-p50;dur={statistics.median(pdf_ms):.1f}",
+            f"pdf-max;dur={max(pdf_ms):.1f}",
+        ]),
+        'X-Boletim-Documentos': str(len(documentos)),
+        'X-Boletim-Cache-Hits': str(len(documentos) - len(renderizados)),
+        'X-Boletim-Workers': str(workers),
+    }
@@ -0,0 +1,144 @@
+"""
+Contadores materializados do dashboard.
+
+Os totais ficam na tabela Contador e são ajustados a cada save/delete
+(reports/signals.py). Operações em lote que não disparam signals
+(bulk_create, update) são corrigidas por reconciliar(), executado
+periodicamente pelo comando reconciliar_contadores.
+"""
+from django.db import connection
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from academic.models import Matricula, Turma
+from pedagogical.models import Escola
+from people.models import Aluno, Professor
+from .models import Contador
+
+Nome = Contador.Nome
+
+# Contadores que também têm recorte por escola
+POR_ESCOLA = (Nome.TURMAS, Nome.MATRICULAS_ATIVAS)
+
+
+def _contar(nome, escola_id=None):
+    if nome == Nome.ESCOLAS:
+        return Escola.objects.count()
+    if nome == Nome.ALUNOS:
+        return Aluno.objects.count()
+    if nome == Nome.PROFESSORES:
+        return Professor.objects.count()
+    if nome == Nome.TURMAS:
+        qs = Turma.objects.all()
+        if escola_id:
+            qs = qs.filter(ano_letivo__escola_id=escola_id)
+        return qs.count()
+    if nome == Nome.MATRICULAS_ATIVAS:
+        qs = Matricula.objects.filter(status=Matricula.Status.ATIVA)
+        if escola_id:
+            qs = qs.filter(ano_letivo__escola_id=escola_id)
+        return qs.count()
+    raise ValueError(nome)
+
+
+def _gravar(linhas):
+    """linhas: iterável de (nome, escola_id, valor)."""
+    agora = timezone.now()
+    Contador.objects.bulk_create(
+        [Contador(nome=nome, escola_id=escola_id, valor=valor, atualizado_em=agora) for nome, escola_id, valor in linhas],
+        update_conflicts=True,
+        unique_fields=['nome', 'escola'],
+        update_fields=['valor', 'atualizado_em']
+    )
+
+
+def incrementar(nome, delta, escola_id=None):
+    """
+    Ajusta o total da rede e, se informado, o da escola. Se a linha ainda
+    não existe o valor é recalculado do zero (só acontece na primeira vez).
+    """
+    alvos = [None] if escola_id is None else [None, escola_id]
+    for alvo in alvos:
+        atualizados = Contador.objects.filter(nome=nome, escola_id=alvo).update(
+            valor=F('valor') + delta,
+            atualizado_em=timezone.now()
+        )
+        if not atualizados:
+            _gravar([(nome, alvo, _contar(nome, alvo))])
+
+
+def incrementar_por_escola(nome, deltas):
+    """
+    incrementar() de várias escolas de uma vez ({escola_id: delta}): uma
+    atualização para o total da rede e outra para todas as escolas, em vez
+    de duas por escola (a virada de ano mexe em todas).
+    """
+    deltas = {escola_id: delta for escola_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    incrementar(nome, sum(deltas.values()))
+    escolas = list(deltas)
+    with connection.cursor() as cursor:
+        cursor.execute(f"""
+            UPDATE {Contador._meta.db_table} c
+            SET valor = c.valor + d.delta, atualizado_em = %s
+            FROM unnest(%s::bigint[], %s::bigint[]) AS d(escola_id, delta)
+            WHERE c.nome = %s AND c.escola_id = d.escola_id
+            RETURNING c.escola_id
+        """, [timezone.now(), escolas, [deltas[e] for e in escolas], nome])
+        atualizadas = {linha[0] for linha in cursor.fetchall()}
+    faltando = set(escolas) - atualizadas
+    if faltando:
+        _gravar([(nome, escola_id, _contar(nome, escola_id)) for escola_id in faltando])
+
+
+def iniciar_escola(escola_id):
+    """Cria os recortes zerados de uma escola nova, para ela já aparecer no dashboard."""
+    _gravar([(nome, escola_id, 0) for nome in POR_ESCOLA])
+
+
+def reconciliar():
+    """Recalcula todos os contadores com poucas consultas agrupadas."""
+    linhas = [(nome, None, _contar(nome)) for nome in Nome.values]
+
+    escolas = list(Escola.objects.values_list('id', flat=True))
+    turmas = dict(
+        Turma.objects.values('ano_letivo__escola_id').annotate(total=Count('id')).values_list('ano_letivo__escola_id', 'total')
+    )
+    matriculas = dict(
+        Matricula.objects.filter(status=Matricula.Status.ATIVA)
+        .values('ano_letivo__escola_id').annotate(total=Count('id'))
+        .values_list('ano_letivo__escola_id', 'total')
+    )
+    for escola_id in escolas:
+        linhas.append((Nome.TURMAS, escola_id, turmas.get(escola_id, 0)))
+        linhas.append((Nome.MATRICULAS_ATIVAS, escola_id, matriculas.get(escola_id, 0)))
+
+    _gravar(linhas)
+    return len(linhas)
+
+
+def snapshot():
+    """
+    Lê os contadores da tabela (uma consulta, sem varrer tabelas grandes).
+    Na primeira chamada, com a tabela vazia, faz a carga inicial.
+    """
+    contadores = list(Contador.objects.select_related('escola').order_by('escola__nome', 'nome'))
+    if not contadores:
+        reconciliar()
+        contadores = list(Contador.objects.select_related('escola').order_by('escola__nome', 'nome'))
+
+    totais = {}
+    atualizado_em = {}
+    por_escola = {}
+    for c in contadores:
+        if c.escola_id is None:
+            totais[c.nome] = c.valor
+            atualizado_em[c.nome] = c.atualizado_em
+        else:
+            item = por_escola.setdefault(c.escola_id, {"escola_id": c.escola_id, "escola": c.escola.nome})
+            item[c.nome] = c.valor
+            item.setdefault("atualizado_em", c.atualizado_em)
+            item["atualizado_em"] = min(item["atualizado_em"], c.atualizado_em)
+
+    return totais, atualizado_em, list(por_escola.values())
@@ -0,0 +1,61 @@
+"""
+Linhas dos exports do Educacenso.
+
+Vêm de um cursor do servidor (.iterator) como tuplas (values_list), sem
+instanciar models: quem consome (StreamingHttpResponse em api.py ou o job
+que grava em disco) mantém a memória constante.
+
+O banco (réplica ou primário) é escolhido na chamada, com .using(): o
+StreamingHttpResponse só percorre as linhas depois que a view retornou e
+saiu de ler_da_replica, quando o roteador já mandaria a leitura ao primário.
+"""
+from pedagogical.models import Escola
+from people.models import Aluno, Pessoa
+
+CSV_CHUNK_SIZE = 2000
+
+
+def _no_banco_atual(queryset):
+    return queryset.using(queryset.db)
+
+
+def linhas_escolas():
+    escolas = _no_banco_atual(Escola.objects.order_by('id'))
+    return escolas.values_list('id', 'nome', 'inep', 'endereco').iterator(chunk_size=CSV_CHUNK_SIZE)
+
+
+def linhas_alunos():
+    alunos = _no_banco_atual(Aluno.objects.order_by('id')).values_list(
+        'id',
+        'pessoa__nome',
+        'pessoa__cpf',
+        'pessoa__data_nascimento',
+        'pessoa__nome_mae',
+        'pessoa__raca_cor',
+        'pessoa__deficiencia',
+        'nis',
+        'codigo_inep',
+        'transporte_escolar'
+    ).iterator(chunk_size=CSV_CHUNK_SIZE)
+    return _formatar_alunos(alunos)
+
+
+def _formatar_alunos(alunos):
+    racas = dict(Pessoa.RacaCor.choices)
+    for id_, nome, cpf, nascimento, nome_mae, raca_cor, deficiencia, nis, inep, transporte in alunos:
+        yield (
+            id_,
+            nome,
+            cpf,
+            nascimento,
+            nome_mae,
+            racas.get(raca_cor, raca_cor),
+            'Sim' if deficiencia else 'Não',
+            nis,
+            inep,
+            'Sim' if transporte else 'Não'
+        )
+
+
+CABECALHO_ESCOLAS = ['ID', 'Nome', 'INEP', 'Endereço']
+CABECALHO_ALUNOS = ['ID', 'Nome', 'CPF', 'Data Nascimento', 'Nome Mãe', 'Raça/Cor', 'Deficiência', 'NIS', 'INEP', 'Transporte']
@@ -0,0 +1,77 @@
+import csv
+import io
+import resource
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from django.test import Client
+from people.models import Aluno
+
+
+def _rss_mb():
+    # ru_maxrss é o pico do processo, em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Mede memória de pico e linhas/s das exportações Educacenso (streaming)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--export', choices=['alunos', 'escolas'], default='alunos')
+        parser.add_argument(
+            '--comparar',
+            action='store_true',
+            help='Também mede a montagem do CSV inteiro em memória (implementação anterior)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Alunos na base: {Aluno.objects.count()}")
+
+        self._medir('streaming', lambda: self._consumir_endpoint(options['export']))
+        if options['comparar'] and options['export'] == 'alunos':
+            self._medir('em memória', self._csv_em_memoria)
+
+    def _medir(self, nome, funcao):
+        rss_antes = _rss_mb()
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        linhas, total_bytes = funcao()
+        segundos = time.perf_counter() - inicio
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"[{nome}] {linhas} linhas, {total_bytes / 1024 / 1024:.1f} MB em {segundos:.2f}s "
+            f"({linhas / segundos if segundos else 0:.0f} linhas/s) | "
+            f"pico Python: {pico / 1024 / 1024:.1f} MB | "
+            f"RSS máximo: {_rss_mb():.1f} MB (antes: {rss_antes:.1f} MB)"
+        ))
+
+    def _consumir_endpoint(self, export):
+        response = Client().get(f'/api/reports/educacenso/{export}')
+        linhas = 0
+        total_bytes = 0
+        for bloco in response.streaming_content:
+            linhas += bloco.count(b'\n')
+            total_bytes += len(bloco)
+        return linhas - 1, total_bytes
+
+    def _csv_em_memoria(self):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        linhas = 0
+        for aluno in Aluno.objects.select_related('pessoa').all():
+            writer.writerow([
+                aluno.id,
+                aluno.pessoa.nome,
+                aluno.pessoa.cpf,
+                aluno.pessoa.data_nascimento,
+                aluno.pessoa.nome_mae,
+                aluno.pessoa.get_raca_cor_display(),
+                'Sim' if aluno.pessoa.deficiencia else 'Não',
+                aluno.nis,
+                aluno.codigo_inep,
+                'Sim' if aluno.transporte_escolar else 'Não'
+            ])
+            linhas += 1
+        return linhas, len(buffer.getvalue().encode())
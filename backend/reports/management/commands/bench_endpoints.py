@@ -0,0 +1,192 @@
+import json
+import time
+import tracemalloc
+from contextlib import ExitStack
+from pathlib import Path
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from academic.models import Matricula
+from diary.models import Avaliacao, Frequencia, Nota
+from people import portal_cache
+from people.models import Aluno
+from reports import boletim
+
+BASELINE = Path(__file__).resolve().parents[2] / 'benchmarks' / 'endpoints.json'
+# Abaixo disso a diferença de latência é ruído, mesmo que passe da tolerância
+RUIDO_MS = 5
+
+
+def _alvos():
+    """Turma/avaliação/aluno usados nas rotas: os primeiros com notas lançadas (estáveis numa massa gerada)."""
+    avaliacao = Avaliacao.objects.filter(notas__isnull=False).select_related('turma__ano_letivo').order_by('id').first()
+    if avaliacao is None:
+        raise CommandError('Nenhuma avaliação com notas. Gere a massa antes (manage.py gerar_massa).')
+    matricula = Matricula.objects.filter(turma=avaliacao.turma, status=Matricula.Status.ATIVA).order_by('id').first()
+    etapa = avaliacao.turma.ano_letivo.etapas.order_by('data_inicio', 'id').first()
+    return {
+        'avaliacao_id': avaliacao.id,
+        'turma_id': avaliacao.turma_id,
+        'etapa_id': etapa.id if etapa else None,
+        'aluno_id': matricula.aluno_id,
+        'notas': [
+            {"matricula_id": m, "valor": float(v)}
+            for m, v in Nota.objects.filter(avaliacao=avaliacao, valor__isnull=False).values_list('matricula_id', 'valor')
+        ],
+    }
+
+
+def _boletim_frio(alvos):
+    matricula = boletim.matriculas_ativas().filter(aluno_id=alvos['aluno_id']).first()
+    notas = list(Nota.objects.filter(matricula=matricula).select_related('avaliacao').order_by('avaliacao__data', 'avaliacao_id'))
+    resultados = boletim.resultados_por_matricula([matricula.id]).get(matricula.id, [])
+    boletim.caminho_pdf(boletim.digest(matricula, notas, resultados)).unlink(missing_ok=True)
+
+
+# Rota: (método, url, corpo, preparar). preparar roda antes de cada requisição,
+# fora da medição: apaga o cache da própria rota, para medir o caminho completo
+ROTAS = {
+    'lancar_notas': (
+        'post', lambda a: f"/api/diary/avaliacoes/{a['avaliacao_id']}/notas",
+        # Relança as notas atuais: exercita o upsert e o recálculo de risco sem mudar a massa
+        lambda a: {"notas": a['notas']}, None,
+    ),
+    'listar_notas_avaliacao': (
+        'get', lambda a: f"/api/diary/avaliacoes/{a['avaliacao_id']}/notas", None, None,
+    ),
+    'dados_conselho_classe': (
+        'get', lambda a: f"/api/academic/turmas/{a['turma_id']}/conselho" + (f"?etapa_id={a['etapa_id']}" if a['etapa_id'] else ""),
+        None, None,
+    ),
+    'get_me': (
+        'get', lambda a: f"/api/portal/me?student_id={a['aluno_id']}", None,
+        lambda a: cache.delete(portal_cache.chave_me(a['aluno_id'])),
+    ),
+    'gerar_boletim': (
+        'get', lambda a: f"/api/reports/boletim/{a['aluno_id']}", None, _boletim_frio,
+    ),
+    'exportar_alunos': (
+        'get', lambda a: "/api/reports/educacenso/alunos", None, None,
+    ),
+    'get_dashboard_stats': (
+        'get', lambda a: "/api/reports/dashboard/stats", None, None,
+    ),
+}
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p * len(ordenados)))]
+
+
+class Command(BaseCommand):
+    help = 'Mede latência (p50/p95), consultas e memória de pico das rotas mais usadas e compara com a baseline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rota', action='append', choices=sorted(ROTAS), help='Só estas rotas (pode repetir)')
+        parser.add_argument('--repeticoes', type=int, default=20)
+        parser.add_argument('--baseline', type=Path, default=BASELINE)
+        parser.add_argument('--salvar', action='store_true', help='Grava os resultados como nova baseline')
+        parser.add_argument(
+            '--tolerancia', type=float, default=0.5,
+            help='Aumento aceito de p95 e memória em relação à baseline (padrão: 0.5 = 50%%)'
+        )
+
+    def handle(self, *args, **options):
+        alvos = _alvos()
+        massa = {
+            'alunos': Aluno.objects.count(),
+            'matriculas': Matricula.objects.count(),
+            'frequencias': Frequencia.objects.count(),
+            'notas': Nota.objects.count(),
+        }
+        self.stdout.write(f"Massa: {massa}")
+
+        client = Client()
+        resultados = {}
+        for nome in options['rota'] or ROTAS:
+            resultados[nome] = self._medir(client, ROTAS[nome], alvos, options['repeticoes'])
+            r = resultados[nome]
+            self.stdout.write(
+                f"{nome:<24} p50 {r['p50_ms']:8.1f} ms | p95 {r['p95_ms']:8.1f} ms | "
+                f"{r['consultas']:3d} consultas | pico {r['pico_kb']:9.0f} KB"
+            )
+
+        if options['salvar']:
+            options['baseline'].parent.mkdir(parents=True, exist_ok=True)
+            anteriores = json.loads(options['baseline'].read_text())['rotas'] if options['baseline'].exists() else {}
+            baseline = {'massa': massa, 'rotas': {**anteriores, **resultados}}
+            options['baseline'].write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline gravada em {options['baseline']}"))
+            return
+
+        if not options['baseline'].exists():
+            self.stdout.write(self.style.WARNING('Sem baseline para comparar (use --salvar).'))
+            return
+        baseline = json.loads(options['baseline'].read_text())
+        if baseline.get('massa') != massa:
+            self.stdout.write(self.style.WARNING(
+                f"A massa difere da usada na baseline ({baseline.get('massa')}): a comparação vale pouco."
+            ))
+        regressoes = self._comparar(baseline['rotas'], resultados, options['tolerancia'])
+        if regressoes:
+            raise CommandError('Regressões:\n  ' + '\n  '.join(regressoes))
+        self.stdout.write(self.style.SUCCESS('Dentro da baseline.'))
+
+    def _requisitar(self, client, rota, alvos):
+        metodo, url, corpo, preparar = rota
+        if preparar:
+            preparar(alvos)
+        with ExitStack() as pilha:
+            capturas = [pilha.enter_context(CaptureQueriesContext(connections[a])) for a in settings.DATABASES]
+            inicio = time.perf_counter()
+            if metodo == 'post':
+                response = client.post(url(alvos), json.dumps(corpo(alvos)), content_type='application/json')
+            else:
+                response = client.get(url(alvos))
+            # Respostas em streaming (CSV) só consultam o banco ao serem consumidas
+            b''.join(response.streaming_content) if response.streaming else response.content
+            segundos = time.perf_counter() - inicio
+        if response.status_code >= 400:
+            raise CommandError(f"{metodo.upper()} {url(alvos)} respondeu {response.status_code}")
+        return segundos, sum(len(c) for c in capturas)
+
+    def _medir(self, client, rota, alvos, repeticoes):
+        self._requisitar(client, rota, alvos) # aquecimento (imports, conexões, caches de processo)
+        tempos = []
+        consultas = 0
+        for _ in range(repeticoes):
+            segundos, consultas = self._requisitar(client, rota, alvos)
+            tempos.append(segundos * 1000)
+
+        # Memória medida à parte: o tracemalloc deixa a execução bem mais lenta
+        tracemalloc.start()
+        self._requisitar(client, rota, alvos)
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'p50_ms': round(_percentil(tempos, 0.5), 2),
+            'p95_ms': round(_percentil(tempos, 0.95), 2),
+            'consultas': consultas,
+            'pico_kb': round(pico / 1024, 1),
+        }
+
+    def _comparar(self, baseline, resultados, tolerancia):
+        regressoes = []
+        for nome, r in resultados.items():
+            base = baseline.get(nome)
+            if base is None:
+                self.stdout.write(self.style.WARNING(f"{nome}: sem baseline"))
+                continue
+            # Consultas não variam entre execuções: qualquer aumento é regressão (N+1)
+            if r['consultas'] > base['consultas']:
+                regressoes.append(f"{nome}: {r['consultas']} consultas (baseline {base['consultas']})")
+            limite = base['p95_ms'] * (1 + tolerancia)
+            if r['p95_ms'] > limite and r['p95_ms'] - base['p95_ms'] > RUIDO_MS:
+                regressoes.append(f"{nome}: p95 {r['p95_ms']:.1f} ms (baseline {base['p95_ms']:.1f} ms)")
+            if r['pico_kb'] > base['pico_kb'] * (1 + tolerancia):
+                regressoes.append(f"{nome}: pico {r['pico_kb']:.0f} KB (baseline {base['pico_kb']:.0f} KB)")
+        return regressoes
@@ -0,0 +1,90 @@
+import json
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from django.db.models import F, Value
+from django.db.models.functions import Coalesce
+from ninja.responses import NinjaJSONEncoder
+from academic.api import FilaOut, MatriculaOut
+from academic.models import FilaEspera, Matricula
+from people.api import AlunoOut
+from people.models import Aluno
+from sge.renderers import dumps
+
+# Para cada listagem: schema de saída, queryset de objetos (caminho anterior:
+# select_related + resolvers) e queryset .values() (caminho rápido)
+LISTAGENS = {
+    'matriculas': (
+        MatriculaOut,
+        lambda: Matricula.objects.select_related('aluno__pessoa', 'turma').order_by('id'),
+        lambda: Matricula.objects.values(
+            'id', 'status', aluno_nome=F('aluno__pessoa__nome'), turma_nome=F('turma__nome')
+        ).order_by('id'),
+    ),
+    'alunos': (
+        AlunoOut,
+        lambda: Aluno.objects.select_related('pessoa').order_by('id'),
+        lambda: Aluno.objects.values(
+            'id', nome=F('pessoa__nome'), cpf=F('pessoa__cpf'), data_nascimento=F('pessoa__data_nascimento')
+        ).order_by('id'),
+    ),
+    'fila': (
+        FilaOut,
+        lambda: FilaEspera.objects.select_related('aluno__pessoa', 'escola_pretendida').order_by('data_solicitacao', 'id'),
+        lambda: FilaEspera.objects.values(
+            'id', 'aluno_id', 'data_solicitacao', 'status',
+            aluno_nome=F('aluno__pessoa__nome'),
+            escola_nome=Coalesce(F('escola_pretendida__nome'), Value("Zoneamento Automático"))
+        ).order_by('data_solicitacao', 'id'),
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = 'Compara tempo e memória de pico da serialização das listagens (Pydantic + json vs .values() + orjson)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lista', choices=sorted(LISTAGENS), default='matriculas')
+        parser.add_argument('--linhas', type=int, default=10000, help='Linhas serializadas (padrão: 10000)')
+        parser.add_argument('--repeticoes', type=int, default=3, help='Vale a melhor de N execuções')
+
+    def handle(self, *args, **options):
+        schema, objetos, valores = LISTAGENS[options['lista']]
+        n = options['linhas']
+
+        def anterior():
+            itens = [schema.from_orm(o).model_dump() for o in objetos()[:n]]
+            return json.dumps(itens, cls=NinjaJSONEncoder).encode()
+
+        def pydantic_orjson():
+            return dumps([schema.from_orm(o).model_dump() for o in objetos()[:n]])
+
+        def rapido():
+            return dumps(list(valores()[:n]))
+
+        resultados = [
+            self._medir('pydantic + json (anterior)', anterior, options['repeticoes']),
+            self._medir('pydantic + orjson', pydantic_orjson, options['repeticoes']),
+            self._medir('.values() + orjson', rapido, options['repeticoes']),
+        ]
+        base = resultados[0][1]
+        for nome, segundos, pico, tamanho, linhas in resultados:
+            self.stdout.write(self.style.SUCCESS(
+                f"[{nome}] {linhas} linhas, {tamanho / 1024:.0f} KB em {segundos * 1000:.1f} ms "
+                f"({base / segundos:.1f}x) | pico Python: {pico / 1024 / 1024:.1f} MB"
+            ))
+
+    def _medir(self, nome, funcao, repeticoes):
+        melhor = None
+        for _ in range(repeticoes):
+            inicio = time.perf_counter()
+            corpo = funcao()
+            segundos = time.perf_counter() - inicio
+            melhor = segundos if melhor is None else min(melhor, segundos)
+
+        # Memória medida à parte: o tracemalloc deixa a execução bem mais lenta
+        tracemalloc.start()
+        funcao()
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return nome, melhor, pico, len(corpo), len(json.loads(corpo))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from reports import boletim
+
+
+class Command(BaseCommand):
+    help = 'Apaga os PDFs de boletim não lidos há BOLETINS_DIAS (rodar à noite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help='Idade mínima, em dias, dos PDFs apagados (padrão: BOLETINS_DIAS)')
+
+    def handle(self, *args, **options):
+        total = boletim.limpar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'{total} PDFs de boletim apagados.'))
@@ -0,0 +1,12 @@
+import time
+from django.core.management.base import BaseCommand
+from reports import risco
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o ranking de alunos em risco para todas as matrículas ativas (rodar à noite)'
+
+    def handle(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        total = risco.recalcular()
+        self.stdout.write(self.style.SUCCESS(f'{total} matrículas avaliadas em {time.perf_counter() - inicio:.2f}s.'))
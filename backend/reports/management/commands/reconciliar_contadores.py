@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from reports import contadores
+
+
+class Command(BaseCommand):
+    help = 'Recalcula os contadores do dashboard (corrige desvios de operações em lote)'
+
+    def handle(self, *args, **kwargs):
+        total = contadores.reconciliar()
+        self.stdout.write(self.style.SUCCESS(f'{total} contadores reconciliados.'))
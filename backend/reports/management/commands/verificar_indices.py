@@ -0,0 +1,92 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from academic.models import Matricula
+from diary.models import Frequencia, Nota
+
+# Abaixo disso o planner prefere Seq Scan mesmo com o índice certo: o resultado não diz nada
+LINHAS_MINIMAS = 50000
+
+
+def _meio(queryset, campo):
+    """Valor do meio (por id) de um campo: um alvo típico e estável numa massa gerada."""
+    total = queryset.count()
+    if not total:
+        raise CommandError(f'{queryset.model.__name__} vazia. Gere a massa antes (manage.py gerar_massa).')
+    return queryset.order_by('id').values_list(campo, flat=True)[total // 2]
+
+
+# Consultas quentes: (descrição, queryset igual ao do código, índice esperado)
+def _consultas():
+    ativas = Matricula.objects.filter(status=Matricula.Status.ATIVA)
+    turma_id = _meio(ativas, 'turma_id')
+    aluno_id = _meio(ativas, 'aluno_id')
+    matricula_id = _meio(ativas, 'id')
+    return [
+        (
+            'Matrículas ativas da turma (diário, conselho, boletins em lote)',
+            Matricula.objects.filter(turma_id=turma_id, status=Matricula.Status.ATIVA).values('id', 'aluno_id'),
+            'matricula_turma_ativa_idx',
+        ),
+        (
+            'Matrícula ativa do aluno (portal, boletim, conflito de matrícula)',
+            Matricula.objects.filter(aluno_id=aluno_id, status=Matricula.Status.ATIVA).values('id', 'turma_id'),
+            'matricula_ativa_unica_por_ano',
+        ),
+        (
+            'Notas da matrícula (boletim, portal, risco)',
+            Nota.objects.filter(matricula_id=matricula_id).values('avaliacao_id', 'valor'),
+            'nota_matricula_idx',
+        ),
+        (
+            'Frequência da matrícula (portal, risco)',
+            Frequencia.objects.filter(matricula_id=matricula_id).values('presente'),
+            'frequencia_matricula_idx',
+        ),
+    ]
+
+
+def _nos(plano):
+    yield plano
+    for filho in plano.get('Plans', []):
+        yield from _nos(filho)
+
+
+def _linhas(modelo):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [modelo._meta.db_table])
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = 'Confere com EXPLAIN que as consultas quentes usam índice (rode sobre uma massa grande)'
+
+    def handle(self, *args, **options):
+        falhas = []
+        for descricao, queryset, esperado in _consultas():
+            tabela = queryset.model._meta.db_table
+            plano = json.loads(queryset.explain(format='json'))[0]['Plan']
+            nos = [n for n in _nos(plano) if n.get('Relation Name') == tabela]
+            # Bitmap Index Scan (filho do Bitmap Heap Scan) não traz o nome da tabela
+            indices = [m['Index Name'] for n in nos for m in _nos(n) if 'Index Name' in m]
+            tipos = ', '.join(sorted({n['Node Type'] for n in nos}))
+
+            linhas = _linhas(queryset.model)
+            if linhas < LINHAS_MINIMAS:
+                self.stdout.write(self.style.WARNING(
+                    f"[?] {descricao}: {tabela} tem ~{linhas} linhas, poucas para o planner escolher índice ({tipos})"
+                ))
+                continue
+
+            if any(n['Node Type'] == 'Seq Scan' for n in nos) or not indices:
+                falhas.append(f"{descricao}: {tipos} em {tabela}")
+                self.stdout.write(self.style.ERROR(f"[x] {descricao}: {tipos}"))
+            elif esperado not in indices:
+                self.stdout.write(self.style.WARNING(
+                    f"[~] {descricao}: {tipos} por {', '.join(indices)} (esperado {esperado})"
+                ))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"[ok] {descricao}: {tipos} por {esperado}"))
+
+        if falhas:
+            raise CommandError('Consultas sem índice:\n  ' + '\n  '.join(falhas))
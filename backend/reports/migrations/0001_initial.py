@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('pedagogical', '0002_zoneamento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Contador',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(choices=[('escolas', 'Escolas'), ('alunos', 'Alunos'), ('professores', 'Professores'), ('turmas', 'Turmas'), ('matriculas_ativas', 'Matrículas Ativas')], max_length=30)),
+                ('valor', models.BigIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField()),
+                ('escola', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='contadores', to='pedagogical.escola')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('nome', 'escola'), name='contador_nome_escola_unico', nulls_distinct=False)],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 10:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academic', '0002_filaespera'),
+        ('pedagogical', '0002_zoneamento'),
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RiscoMatricula',
+            fields=[
+                ('matricula', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='risco', serialize=False, to='academic.matricula')),
+                ('score', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('media_geral', models.DecimalField(decimal_places=4, max_digits=5, null=True)),
+                ('pior_media', models.DecimalField(decimal_places=4, max_digits=5, null=True)),
+                ('disciplinas_abaixo', models.IntegerField(default=0)),
+                ('frequencia', models.DecimalField(decimal_places=4, max_digits=5, null=True)),
+                ('atualizado_em', models.DateTimeField()),
+                ('disciplina_pior', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='pedagogical.disciplina')),
+                ('escola', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='riscos', to='pedagogical.escola')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-score', 'matricula'], name='risco_score_idx'), models.Index(fields=['escola', '-score', 'matricula'], name='risco_escola_score_idx')],
+            },
+        ),
+    ]
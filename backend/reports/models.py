@@ -0,0 +1,51 @@
+from django.db import models
+from pedagogical.models import Escola
+
+class Contador(models.Model):
+    """
+    Totais do dashboard mantidos incrementalmente (ver reports/signals.py).
+    escola nulo = total da rede; preenchido = recorte por escola.
+    """
+    class Nome(models.TextChoices):
+        ESCOLAS = 'escolas', 'Escolas'
+        ALUNOS = 'alunos', 'Alunos'
+        PROFESSORES = 'professores', 'Professores'
+        TURMAS = 'turmas', 'Turmas'
+        MATRICULAS_ATIVAS = 'matriculas_ativas', 'Matrículas Ativas'
+
+    nome = models.CharField(max_length=30, choices=Nome.choices)
+    escola = models.ForeignKey(Escola, on_delete=models.CASCADE, null=True, blank=True, related_name='contadores')
+    valor = models.BigIntegerField(default=0)
+    atualizado_em = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['nome', 'escola'], nulls_distinct=False, name='contador_nome_escola_unico')
+        ]
+
+    def __str__(self):
+        return f"{self.nome} ({self.escola_id or 'rede'}): {self.valor}"
+
+class RiscoMatricula(models.Model):
+    """
+    Score de risco por matrícula ativa, calculado em SQL por reports/risco.py.
+    Recalculado à noite (recalcular_risco) e a cada alteração de nota/frequência.
+    """
+    matricula = models.OneToOneField('academic.Matricula', on_delete=models.CASCADE, primary_key=True, related_name='risco')
+    escola = models.ForeignKey(Escola, on_delete=models.CASCADE, related_name='riscos')
+    score = models.DecimalField(max_digits=5, decimal_places=2) # 0 a 100
+    media_geral = models.DecimalField(max_digits=5, decimal_places=4, null=True) # 0 a 1, notas normalizadas
+    pior_media = models.DecimalField(max_digits=5, decimal_places=4, null=True)
+    disciplina_pior = models.ForeignKey('pedagogical.Disciplina', on_delete=models.SET_NULL, null=True, related_name='+')
+    disciplinas_abaixo = models.IntegerField(default=0)
+    frequencia = models.DecimalField(max_digits=5, decimal_places=4, null=True) # 0 a 1
+    atualizado_em = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-score', 'matricula'], name='risco_score_idx'),
+            models.Index(fields=['escola', '-score', 'matricula'], name='risco_escola_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.matricula_id}: {self.score}"
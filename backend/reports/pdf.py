@@ -0,0 +1,58 @@
+"""
+Renderização de PDF isolada do Django.
+
+Este módulo roda dentro dos processos do pool, por isso não importa models
+nem settings: recebe HTML pronto e devolve os bytes do PDF.
+"""
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from weasyprint import HTML
+
+_pool = None
+
+
+def renderizar_pdf(html_string):
+    """Renderiza um HTML e devolve (pdf_bytes, segundos_gastos)."""
+    inicio = time.perf_counter()
+    pdf_file = HTML(string=html_string).write_pdf()
+    return pdf_file, time.perf_counter() - inicio
+
+
+def get_pool(tamanho):
+    """
+    Pool de processos reaproveitado entre requisições do mesmo worker.
+    Usa 'spawn' para não herdar conexões de banco nem threads do gunicorn.
+    O tamanho vale só na criação: o pool nunca é recriado por causa de uma
+    requisição. Com 'spawn' os processos sobem sob demanda, até `tamanho`.
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=tamanho, mp_context=multiprocessing.get_context('spawn'))
+    return _pool
+
+
+def renderizar_em_paralelo(pool, htmls, paralelos):
+    """
+    renderizar_pdf de cada HTML no pool, com no máximo `paralelos` em
+    andamento ao mesmo tempo (o resto espera a vez). Mantém a ordem.
+    """
+    resultados = [None] * len(htmls)
+    fila = enumerate(htmls)
+    em_andamento = {pool.submit(renderizar_pdf, html): i for i, html in islice(fila, paralelos)}
+    while em_andamento:
+        prontos, _ = wait(em_andamento, return_when=FIRST_COMPLETED)
+        for futuro in prontos:
+            resultados[em_andamento.pop(futuro)] = futuro.result()
+            for i, html in islice(fila, 1):
+                em_andamento[pool.submit(renderizar_pdf, html)] = i
+    return resultados
+
+
+def encerrar_pool():
+    """Encerra o pool (ex.: fim de um processo do worker de jobs)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+    _pool = None
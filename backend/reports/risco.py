@@ -0,0 +1,178 @@
+"""
+Motor de detecção de alunos em risco.
+
+Para cada matrícula ATIVA calcula, em uma única instrução SQL:
+  - média normalizada por disciplina: soma(valor) / soma(valor_maximo)
+  - pior disciplina e quantas estão abaixo do corte
+  - taxa de presença (diary.Frequencia)
+e grava o score (0-100) em RiscoMatricula via INSERT ... ON CONFLICT.
+
+score = 100 * (PESO_NOTA * déficit da pior disciplina em relação a CORTE_NOTA
+             + PESO_FREQUENCIA * déficit da presença em relação a CORTE_FREQUENCIA)
+
+O aproveitamento aqui é o bruto do ano todo, independente das fórmulas do
+critério do ano letivo (essas ficam em diary/medias.py).
+"""
+import threading
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from academic.models import Matricula
+from diary.models import Avaliacao, Frequencia, Nota
+from pedagogical.models import AnoLetivo
+from .models import RiscoMatricula
+
+CORTE_NOTA = Decimal('0.6') # 60% do valor máximo
+CORTE_FREQUENCIA = Decimal('0.75') # mínimo legal de presença
+PESO_NOTA = Decimal('0.6')
+PESO_FREQUENCIA = Decimal('0.4')
+
+
+def _sql_recalcular(filtrar_ids):
+    t = {
+        'risco': RiscoMatricula._meta.db_table,
+        'matricula': Matricula._meta.db_table,
+        'ano_letivo': AnoLetivo._meta.db_table,
+        'nota': Nota._meta.db_table,
+        'avaliacao': Avaliacao._meta.db_table,
+        'frequencia': Frequencia._meta.db_table,
+    }
+    filtro = "AND m.id = ANY(%(ids)s)" if filtrar_ids else ""
+    return f"""
+        WITH alvo AS (
+            SELECT m.id AS matricula_id, al.escola_id
+            FROM {t['matricula']} m
+            JOIN {t['ano_letivo']} al ON al.id = m.ano_letivo_id
+            WHERE m.status = %(ativa)s {filtro}
+        ),
+        por_disciplina AS (
+            SELECT n.matricula_id, a.disciplina_id,
+                   SUM(n.valor) / NULLIF(SUM(a.valor_maximo), 0) AS media
+            FROM {t['nota']} n
+            JOIN {t['avaliacao']} a ON a.id = n.avaliacao_id
+            JOIN alvo ON alvo.matricula_id = n.matricula_id
+            WHERE n.valor IS NOT NULL
+            GROUP BY n.matricula_id, a.disciplina_id
+        ),
+        notas AS (
+            SELECT DISTINCT ON (matricula_id)
+                   matricula_id,
+                   AVG(media) OVER w AS media_geral,
+                   media AS pior_media,
+                   disciplina_id AS disciplina_pior,
+                   COUNT(*) FILTER (WHERE media < %(corte_nota)s) OVER w AS disciplinas_abaixo
+            FROM por_disciplina
+            WHERE media IS NOT NULL
+            WINDOW w AS (PARTITION BY matricula_id)
+            ORDER BY matricula_id, media ASC, disciplina_id
+        ),
+        freq AS (
+            SELECT f.matricula_id,
+                   COUNT(*) FILTER (WHERE f.presente)::numeric / COUNT(*) AS frequencia
+            FROM {t['frequencia']} f
+            JOIN alvo ON alvo.matricula_id = f.matricula_id
+            GROUP BY f.matricula_id
+        )
+        INSERT INTO {t['risco']} (
+            matricula_id, escola_id, score, media_geral, pior_media,
+            disciplina_pior_id, disciplinas_abaixo, frequencia, atualizado_em
+        )
+        SELECT alvo.matricula_id, alvo.escola_id,
+               ROUND(100 * (
+                   %(peso_nota)s * GREATEST(0, (%(corte_nota)s - LEAST(COALESCE(notas.pior_media, 1), 1)) / %(corte_nota)s)
+                 + %(peso_freq)s * GREATEST(0, (%(corte_freq)s - COALESCE(freq.frequencia, 1)) / %(corte_freq)s)
+               ), 2),
+               ROUND(notas.media_geral, 4), ROUND(notas.pior_media, 4), notas.disciplina_pior,
+               COALESCE(notas.disciplinas_abaixo, 0), ROUND(freq.frequencia, 4), NOW()
+        FROM alvo
+        LEFT JOIN notas ON notas.matricula_id = alvo.matricula_id
+        LEFT JOIN freq ON freq.matricula_id = alvo.matricula_id
+        ON CONFLICT (matricula_id) DO UPDATE SET
+            escola_id = EXCLUDED.escola_id,
+            score = EXCLUDED.score,
+            media_geral = EXCLUDED.media_geral,
+            pior_media = EXCLUDED.pior_media,
+            disciplina_pior_id = EXCLUDED.disciplina_pior_id,
+            disciplinas_abaixo = EXCLUDED.disciplinas_abaixo,
+            frequencia = EXCLUDED.frequencia,
+            atualizado_em = EXCLUDED.atualizado_em
+    """
+
+
+def recalcular(matricula_ids=None):
+    """
+    Recalcula o risco de todas as matrículas ativas (matricula_ids=None)
+    ou só das informadas. Matrículas que deixaram de ser ATIVA saem da tabela.
+    Devolve o número de linhas gravadas.
+    """
+    ids = None if matricula_ids is None else sorted(set(matricula_ids))
+    if ids == []:
+        return 0
+
+    params = {
+        'ativa': Matricula.Status.ATIVA,
+        'ids': ids,
+        'corte_nota': CORTE_NOTA,
+        'corte_freq': CORTE_FREQUENCIA,
+        'peso_nota': PESO_NOTA,
+        'peso_freq': PESO_FREQUENCIA,
+    }
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(_sql_recalcular(ids is not None), params)
+        gravadas = cursor.rowcount
+
+        # ANY(array) em vez de IN (...): a virada de ano manda centenas de milhares de IDs
+        filtro = "AND r.matricula_id = ANY(%(ids)s)" if ids is not None else ""
+        cursor.execute(f"""
+            DELETE FROM {RiscoMatricula._meta.db_table} r
+            USING {Matricula._meta.db_table} m
+            WHERE m.id = r.matricula_id AND m.status <> %(ativa)s {filtro}
+        """, params)
+
+    return gravadas
+
+
+# --- Recalculo incremental ---
+# As matrículas alteradas se acumulam (por thread) e são processadas em um
+# único recalcular() quando a transação atual é confirmada. Lotes acima de
+# LIMITE_SINCRONO (virada de ano, importação em massa) não seguram a
+# requisição: viram um job que recalcula a rede inteira (rodar_jobs).
+LIMITE_SINCRONO = 5000
+
+_local = threading.local()
+
+
+def _processar_pendentes():
+    ids = getattr(_local, 'pendentes', None)
+    if not ids:
+        return
+    _local.pendentes = set()
+    if len(ids) > LIMITE_SINCRONO:
+        # Import aqui: jobs.tarefas importa este módulo
+        from jobs import worker
+        worker.enfileirar_unico('recalcular_risco')
+    else:
+        recalcular(ids)
+
+
+def agendar(matricula_ids):
+    if not matricula_ids:
+        return
+    if not hasattr(_local, 'pendentes'):
+        _local.pendentes = set()
+    _local.pendentes.update(matricula_ids)
+    transaction.on_commit(_processar_pendentes)
+
+
+def motivo(risco):
+    """Texto curto para o dashboard a partir dos campos gravados."""
+    partes = []
+    if risco.pior_media is not None and risco.pior_media < CORTE_NOTA:
+        nome = risco.disciplina_pior.nome if risco.disciplina_pior else 'Avaliação'
+        partes.append(f"Aproveitamento de {risco.pior_media * 100:.0f}% em {nome}")
+        if risco.disciplinas_abaixo > 1:
+            partes.append(f"{risco.disciplinas_abaixo} disciplinas abaixo da média")
+    if risco.frequencia is not None and risco.frequencia < CORTE_FREQUENCIA:
+        partes.append(f"Frequência de {risco.frequencia * 100:.0f}%")
+    return '; '.join(partes) or 'Sem pendências'
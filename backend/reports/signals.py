@@ -0,0 +1,130 @@
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from academic.models import Matricula, Turma
+from academic.signals import matriculas_criadas, matriculas_encerradas
+from diary.signals import frequencias_alteradas, notas_alteradas
+from pedagogical.models import AnoLetivo, Escola
+from people.models import Aluno, Professor
+from people.signals import alunos_criados
+from . import contadores, risco
+from .models import Contador
+
+Nome = Contador.Nome
+
+
+def _escola_da_turma(turma_id):
+    return Turma.objects.filter(id=turma_id).values_list('ano_letivo__escola_id', flat=True).first()
+
+
+# --- Contadores simples (só total da rede) ---
+_SIMPLES = {Escola: Nome.ESCOLAS, Aluno: Nome.ALUNOS, Professor: Nome.PROFESSORES}
+
+def contador_criado(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        contadores.incrementar(_SIMPLES[sender], 1)
+        if sender is Escola:
+            contadores.iniciar_escola(instance.id)
+
+def contador_removido(sender, instance, **kwargs):
+    contadores.incrementar(_SIMPLES[sender], -1)
+
+for _model in _SIMPLES:
+    post_save.connect(contador_criado, sender=_model, dispatch_uid=f'contador_criado_{_model.__name__}')
+    post_delete.connect(contador_removido, sender=_model, dispatch_uid=f'contador_removido_{_model.__name__}')
+
+
+@receiver(alunos_criados)
+def alunos_criados_em_lote(sender, aluno_ids, **kwargs):
+    contadores.incrementar(Nome.ALUNOS, len(aluno_ids))
+
+
+# --- Turmas (total + escola) ---
+@receiver(post_save, sender=Turma)
+def turma_criada(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        escola_id = AnoLetivo.objects.filter(id=instance.ano_letivo_id).values_list('escola_id', flat=True).first()
+        contadores.incrementar(Nome.TURMAS, 1, escola_id)
+
+@receiver(post_delete, sender=Turma)
+def turma_removida(sender, instance, **kwargs):
+    escola_id = AnoLetivo.objects.filter(id=instance.ano_letivo_id).values_list('escola_id', flat=True).first()
+    contadores.incrementar(Nome.TURMAS, -1, escola_id)
+
+
+# --- Matrículas ativas (total + escola) ---
+# Guardamos status/turma originais para saber se a matrícula entrou
+# ou saiu do conjunto "ATIVA" em um save. Carregada com only()/defer() sem
+# esses campos, a leitura fica para o pre_save/pre_delete: lê-los aqui
+# dispararia outra carga (e outro post_init) para cada campo adiado.
+ADIADO = object()
+
+@receiver(post_init, sender=Matricula)
+def matricula_carregada(sender, instance, **kwargs):
+    if not instance.pk:
+        instance._contador_original = (None, None)
+    elif 'status' in instance.__dict__ and 'turma_id' in instance.__dict__:
+        instance._contador_original = (instance.status, instance.turma_id)
+    else:
+        instance._contador_original = ADIADO
+
+@receiver(pre_save, sender=Matricula)
+@receiver(pre_delete, sender=Matricula)
+def matricula_original_adiada(sender, instance, **kwargs):
+    if instance._contador_original is ADIADO:
+        instance._contador_original = Matricula.objects.filter(pk=instance.pk).values_list(
+            'status', 'turma_id'
+        ).first() or (None, None)
+
+@receiver(post_save, sender=Matricula)
+def matricula_salva(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    status_antigo, turma_antiga = (None, None) if created else instance._contador_original
+    ativa_antes = status_antigo == Matricula.Status.ATIVA
+    ativa_agora = instance.status == Matricula.Status.ATIVA
+
+    if ativa_antes and (not ativa_agora or turma_antiga != instance.turma_id):
+        contadores.incrementar(Nome.MATRICULAS_ATIVAS, -1, _escola_da_turma(turma_antiga))
+    if ativa_agora and (not ativa_antes or turma_antiga != instance.turma_id):
+        contadores.incrementar(Nome.MATRICULAS_ATIVAS, 1, _escola_da_turma(instance.turma_id))
+
+    if ativa_antes != ativa_agora or turma_antiga != instance.turma_id:
+        risco.agendar({instance.id})
+
+    instance._contador_original = (instance.status, instance.turma_id)
+
+@receiver(post_delete, sender=Matricula)
+def matricula_removida(sender, instance, **kwargs):
+    status_antigo, turma_antiga = instance._contador_original
+    if status_antigo == Matricula.Status.ATIVA:
+        contadores.incrementar(Nome.MATRICULAS_ATIVAS, -1, _escola_da_turma(turma_antiga))
+
+
+def _matriculas_por_escola(matricula_ids, por_escola=None):
+    """{escola_id: matrículas}; usa o por_escola do signal quando veio."""
+    if por_escola is not None:
+        return por_escola
+    return dict(Matricula.objects.filter(id__in=matricula_ids).values_list(
+        'ano_letivo__escola_id'
+    ).annotate(total=Count('id')))
+
+@receiver(matriculas_criadas)
+def matriculas_criadas_em_lote(sender, matricula_ids, por_escola=None, **kwargs):
+    contadores.incrementar_por_escola(Nome.MATRICULAS_ATIVAS, _matriculas_por_escola(matricula_ids, por_escola))
+    risco.agendar(matricula_ids)
+
+@receiver(matriculas_encerradas)
+def matriculas_encerradas_em_lote(sender, matricula_ids, por_escola=None, **kwargs):
+    contadores.incrementar_por_escola(Nome.MATRICULAS_ATIVAS, {
+        escola_id: -total for escola_id, total in _matriculas_por_escola(matricula_ids, por_escola).items()
+    })
+    risco.agendar(matricula_ids)
+
+
+# --- Ranking de risco ---
+@receiver(notas_alteradas)
+@receiver(frequencias_alteradas)
+def recalcular_risco(sender, matricula_ids, **kwargs):
+    risco.agendar(matricula_ids)
@@ -0,0 +1,174 @@
+"""
+Cache HTTP versionado para os endpoints de dados de referência
+(escolas, anos letivos, disciplinas, turmas, zoneamento).
+
+Uso:
+    @router.get("/escolas", response=List[EscolaOut])
+    @decorate_view(versionado(Escola))
+    def listar_escolas(request):
+        return Escola.objects.all()
+
+Cada model tem uma versão no cache 'versoes' (visto por todos os processos,
+com ou sem Redis), trocada a cada save/delete (ver invalidar(), ligado nos signals.py dos apps). A versão é o
+time_ns da última alteração, então serve também de Last-Modified.
+
+A requisição é resolvida só com leituras de cache, antes de qualquer ORM:
+1. ETag = digest(rota + query string + versões dos models). Se o cliente
+   mandou o mesmo ETag (If-None-Match), responde 304. If-Modified-Since
+   sozinho não gera 304: o Last-Modified vai em segundos inteiros, e uma
+   alteração no mesmo segundo da cópia do cliente passaria despercebida;
+2. senão, procura o corpo já serializado no cache 'http' pelo mesmo digest;
+3. só então executa a view e guarda o corpo.
+Como a chave muda junto com a versão, não há corpo velho a apagar: a entrada
+antiga expira pelo TIMEOUT.
+
+Alterações feitas com update()/bulk_create não disparam signals: quem as fizer
+nesses models deve chamar invalidar(Model).
+"""
+import hashlib
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import wraps
+
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+
+# Entra no digest: incrementar quando a serialização das respostas mudar
+# (ex.: troca de renderer), para não servir corpos no formato antigo
+VERSAO_FORMATO = 2
+
+# Métricas acumuladas no processo e somadas no cache compartilhado a cada
+# PUBLICAR_A_CADA segundos, para não escrever no cache a cada requisição.
+# A soma é o incr do cache (INCRBY no Redis, atômico entre processos)
+PUBLICAR_A_CADA = 10
+EVENTOS = ('hit', 'miss', 'nao_modificado')
+
+_rotas = {} # nome da view -> labels dos models
+_lock = threading.Lock()
+_pendentes = defaultdict(Counter)
+_publicado_em = time.monotonic()
+
+
+def _chave_versao(label):
+    return f"versao:{label}"
+
+
+def _versoes(labels):
+    chaves = [_chave_versao(label) for label in labels]
+    versoes = caches['versoes'].get_many(chaves)
+    faltando = [c for c in chaves if c not in versoes]
+    if faltando:
+        # Primeira vez (ou entrada despejada do cache): começa do "agora", nunca
+        # de um valor fixo que poderia repetir um ETag antigo
+        agora = time.time_ns()
+        for chave in faltando:
+            caches['versoes'].add(chave, agora)
+        versoes.update(caches['versoes'].get_many(faltando))
+    return [versoes[c] for c in chaves]
+
+
+def invalidar(modelo):
+    """Troca a versão do model após o commit (a leitura seguinte já vê o dado novo)."""
+    chave = _chave_versao(modelo._meta.label_lower)
+    transaction.on_commit(lambda: caches['versoes'].set(chave, time.time_ns()))
+
+
+def _registrar(rota, evento):
+    global _publicado_em
+    with _lock:
+        _pendentes[rota][evento] += 1
+        agora = time.monotonic()
+        if agora - _publicado_em < PUBLICAR_A_CADA:
+            return
+        pendentes = dict(_pendentes)
+        _pendentes.clear()
+        _publicado_em = agora
+    _publicar(pendentes)
+
+
+def _somar(chave, n):
+    try:
+        cache.incr(chave, n)
+    except ValueError: # chave ainda não existe (ou foi despejada)
+        if not cache.add(chave, n, timeout=None):
+            cache.incr(chave, n) # outro processo criou entre o incr e o add
+
+
+def _publicar(pendentes):
+    for rota, eventos in pendentes.items():
+        for evento, n in eventos.items():
+            _somar(f"http:metricas:{rota}:{evento}", n)
+
+
+def versionado(*modelos):
+    """Decorator de view (via ninja.decorators.decorate_view)."""
+    labels = sorted(m._meta.label_lower for m in modelos)
+
+    def decorator(view):
+        # decorate_view entrega Operation.run; o nome vem da função da view
+        operacao = getattr(view, '__self__', None)
+        rota = getattr(operacao, 'view_func', view).__name__
+        _rotas[rota] = labels
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            versoes = _versoes(labels)
+            h = hashlib.sha256(request.get_full_path().encode())
+            h.update(f"{VERSAO_FORMATO}:{','.join(map(str, versoes))}".encode())
+            digest = h.hexdigest()[:32]
+            etag = f'"{digest}"'
+            ultima_alteracao = max(versoes) // 1_000_000_000
+
+            if etag in parse_etags(request.headers.get('If-None-Match', '')):
+                response = HttpResponseNotModified()
+                _registrar(rota, 'nao_modificado')
+            else:
+                corpo = caches['http'].get(f"http:{rota}:{digest}")
+                if corpo is not None:
+                    response = HttpResponse(corpo, content_type='application/json; charset=utf-8')
+                    _registrar(rota, 'hit')
+                else:
+                    response = view(request, *args, **kwargs)
+                    _registrar(rota, 'miss')
+                    if response.status_code != 200:
+                        return response
+                    caches['http'].set(f"http:{rota}:{digest}", response.content)
+
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(ultima_alteracao)
+            response['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator
+
+
+# --- Métricas ---
+
+def metricas():
+    """Totais de todos os processos (publicados) + os ainda pendentes deste."""
+    with _lock:
+        locais = {rota: Counter(eventos) for rota, eventos in _pendentes.items()}
+    chaves = [f"http:metricas:{rota}:{evento}" for rota in _rotas for evento in EVENTOS]
+    publicados = cache.get_many(chaves)
+
+    resultado = []
+    for rota in sorted(_rotas):
+        n = {
+            evento: publicados.get(f"http:metricas:{rota}:{evento}", 0) + locais.get(rota, Counter())[evento]
+            for evento in EVENTOS
+        }
+        total = sum(n.values())
+        resultado.append({
+            "rota": rota,
+            "models": _rotas[rota],
+            **n,
+            "taxa_acerto": round((n['hit'] + n['nao_modificado']) / total, 4) if total else None,
+        })
+    return resultado
+
@@ -0,0 +1,130 @@
+"""
+Leituras pesadas na réplica (opcional).
+
+Com DB_REPLICA_HOST definido, settings.py cria o alias 'replica'. Só leem dele
+as views marcadas com ler_da_replica (relatórios, dashboard, portal,
+conselho de classe) e os jobs em segundo plano; todo o resto, e toda escrita,
+vai para 'default'. Sem a réplica configurada tudo vai para 'default'.
+
+Read-your-writes: depois de uma escrita (POST/PUT/PATCH/DELETE, ou qualquer
+escrita no ORM durante a requisição) o cliente fica fixado no primário por
+DB_REPLICA_FIXAR_SEGUNDOS, tempo folgado para o atraso de replicação; assim
+quem lançou notas e abre o relatório em seguida já vê as notas. O cliente é
+identificado pela sessão ou, sem sessão, pelo cabeçalho X-Cliente-Id que o
+frontend envia (um id aleatório por navegador, api/client.ts). O IP é só o
+último recurso e é grosseiro: uma escola inteira atrás do mesmo NAT fica
+fixada no primário a cada escrita de qualquer um. Dentro da própria
+requisição, a primeira escrita devolve as leituras seguintes ao primário.
+"""
+import hashlib
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+
+REPLICA = 'replica'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS')
+
+_ler_da_replica = ContextVar('ler_da_replica', default=False)
+_escreveu = ContextVar('escreveu', default=False)
+
+
+def replica_configurada():
+    return REPLICA in settings.DATABASES
+
+
+@contextmanager
+def usar_replica():
+    token = _ler_da_replica.set(replica_configurada())
+    try:
+        yield
+    finally:
+        _ler_da_replica.reset(token)
+
+
+@contextmanager
+def usar_primario():
+    """
+    Leituras de volta no primário dentro de uma view ler_da_replica: para o
+    que vai para um cache compartilhado, onde um dado atrasado da réplica
+    ficaria servido até o TIMEOUT.
+    """
+    token = _ler_da_replica.set(False)
+    try:
+        yield
+    finally:
+        _ler_da_replica.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        return REPLICA if _ler_da_replica.get() else None
+
+    def db_for_write(self, model, **hints):
+        if _ler_da_replica.get():
+            _ler_da_replica.set(False)
+        _escreveu.set(True)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Os dois aliases são o mesmo banco
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        # A réplica recebe o schema pela replicação
+        return False if db == REPLICA else None
+
+
+# --- Fixação no primário ---
+
+CABECALHO_CLIENTE = 'X-Cliente-Id'
+
+
+def _chave(request):
+    sessao = getattr(request, 'session', None)
+    if sessao is not None and sessao.session_key:
+        cliente = f"sessao:{sessao.session_key}"
+    elif request.headers.get(CABECALHO_CLIENTE):
+        cliente = f"cliente:{request.headers[CABECALHO_CLIENTE][:64]}"
+    else:
+        cliente = f"ip:{request.META.get('REMOTE_ADDR', '')}"
+    return f"replica:fixado:{hashlib.sha256(cliente.encode()).hexdigest()[:32]}"
+
+
+def fixado(request):
+    return cache.get(_chave(request)) is not None
+
+
+def fixar(request):
+    cache.set(_chave(request), 1, settings.DB_REPLICA_FIXAR_SEGUNDOS)
+
+
+def ler_da_replica(view):
+    """
+    Decorator de view (decorate_view / Router.add_decorator(mode="view")):
+    leituras de GET/HEAD vão para a réplica, salvo cliente fixado no primário.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or not replica_configurada() or fixado(request):
+            return view(request, *args, **kwargs)
+        with usar_replica():
+            return view(request, *args, **kwargs)
+    return wrapper
+
+
+class FixarPrimarioMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = _escreveu.set(False)
+        try:
+            response = self.get_response(request)
+            if replica_configurada() and (request.method not in METODOS_SEGUROS or _escreveu.get()):
+                fixar(request)
+        finally:
+            _escreveu.reset(token)
+        return response
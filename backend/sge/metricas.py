@@ -0,0 +1,250 @@
+"""
+Instrumentação de SQL por rota e endpoint /api/_metrics (formato Prometheus).
+
+MetricasMiddleware envolve a execução de SQL de todos os aliases
+(connection.execute_wrapper) e, por requisição, conta consultas, soma o
+tempo no banco, acha consultas repetidas (mesmo SQL, com placeholders, mais de
+uma vez: a assinatura de um N+1) e mede o tamanho da resposta. Os números são
+agregados em memória por rota (o padrão da URL, ex.
+"GET api/academic/fila/<int:item_id>"), com percentis calculados sobre as
+últimas AMOSTRAS requisições.
+
+Os agregados são do processo: cada worker do gunicorn expõe os seus.
+
+Orçamento de consultas: cada rota tem até SQL_ORCAMENTO consultas (ou o
+valor de @decorate_view(orcamento_sql(n)) na view). Estourar o orçamento
+gera um aviso no log e conta em sge_db_orcamento_excedido_total; com
+SQL_ESTRITO (ex.: nos testes) levanta OrcamentoExcedido.
+"""
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+from functools import wraps
+from typing import List
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from ninja import Router, Schema
+
+from . import cache_http
+
+logger = logging.getLogger(__name__)
+
+AMOSTRAS = 1024 # por rota, para os percentis
+QUANTIS = (0.5, 0.9, 0.99)
+PADROES_POR_ROTA = 5 # consultas repetidas mais frequentes guardadas por rota
+
+
+class OrcamentoExcedido(AssertionError):
+    pass
+
+
+class _Requisicao:
+    """Consultas de uma requisição (preenchido pelo execute_wrapper)."""
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = 0.0
+        self.sqls = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.segundos += time.perf_counter() - inicio
+            self.consultas += 1
+            self.sqls[sql] += 1
+
+    @property
+    def repetidas(self):
+        return {sql: n for sql, n in self.sqls.items() if n > 1}
+
+
+class _Rota:
+    def __init__(self):
+        self.requisicoes = 0
+        self.consultas_total = 0
+        self.db_segundos_total = 0.0
+        self.duracao_total = 0.0
+        self.bytes_total = 0
+        self.respostas_medidas = 0 # requisições sem streaming (as que entram em bytes_total)
+        self.repetidas_total = 0
+        self.orcamento_excedido = 0
+        self.duracao = deque(maxlen=AMOSTRAS)
+        self.consultas = deque(maxlen=AMOSTRAS)
+        self.db_segundos = deque(maxlen=AMOSTRAS)
+        self.bytes = deque(maxlen=AMOSTRAS)
+        self.padroes = Counter() # sql repetido -> requisições em que repetiu
+
+
+_lock = threading.Lock()
+_rotas = defaultdict(_Rota)
+
+
+def orcamento_sql(maximo):
+    """Decorator de view (via decorate_view): orçamento de consultas da rota."""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            request.orcamento_sql = maximo
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _nome_rota(request):
+    match = request.resolver_match
+    return f"{request.method} {match.route if match else '(sem rota)'}"
+
+
+def _tamanho(response):
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+def registrar(rota, req, segundos, tamanho, excedido):
+    with _lock:
+        r = _rotas[rota]
+        r.requisicoes += 1
+        r.consultas_total += req.consultas
+        r.db_segundos_total += req.segundos
+        r.duracao_total += segundos
+        r.duracao.append(segundos)
+        r.consultas.append(req.consultas)
+        r.db_segundos.append(req.segundos)
+        if tamanho is not None:
+            r.respostas_medidas += 1
+            r.bytes_total += tamanho
+            r.bytes.append(tamanho)
+        repetidas = req.repetidas
+        r.repetidas_total += sum(n - 1 for n in repetidas.values())
+        r.padroes.update(repetidas.keys())
+        if len(r.padroes) > PADROES_POR_ROTA * 10:
+            r.padroes = Counter(dict(r.padroes.most_common(PADROES_POR_ROTA)))
+        if excedido:
+            r.orcamento_excedido += 1
+
+
+class MetricasMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        req = _Requisicao()
+        inicio = time.perf_counter()
+        with ExitStack() as pilha:
+            for alias in settings.DATABASES:
+                pilha.enter_context(connections[alias].execute_wrapper(req))
+            response = self.get_response(request)
+        segundos = time.perf_counter() - inicio
+
+        rota = _nome_rota(request)
+        orcamento = getattr(request, 'orcamento_sql', settings.SQL_ORCAMENTO)
+        excedido = req.consultas > orcamento
+        registrar(rota, req, segundos, _tamanho(response), excedido)
+
+        if excedido:
+            repetidas = sorted(req.repetidas.items(), key=lambda item: -item[1])[:3]
+            mensagem = (
+                f"{rota}: {req.consultas} consultas (orçamento {orcamento}). "
+                f"Repetidas: {[f'{n}x {sql[:120]}' for sql, n in repetidas]}"
+            )
+            if settings.SQL_ESTRITO:
+                raise OrcamentoExcedido(mensagem)
+            logger.warning(mensagem)
+        return response
+
+
+# --- Exportação (Prometheus) ---
+
+def _quantil(valores, q):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))]
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{k}="{_escapar(v)}"' for k, v in labels.items()) + '}'
+
+
+def _resumo(linhas, nome, ajuda, por_rota):
+    """por_rota: {rota: (amostras, soma, contagem)}"""
+    linhas.append(f"# HELP {nome} {ajuda}")
+    linhas.append(f"# TYPE {nome} summary")
+    for rota, (amostras, soma, contagem) in por_rota.items():
+        if amostras:
+            for q in QUANTIS:
+                linhas.append(f"{nome}{_labels(rota=rota, quantile=q)} {_quantil(amostras, q)}")
+        linhas.append(f"{nome}_sum{_labels(rota=rota)} {soma}")
+        linhas.append(f"{nome}_count{_labels(rota=rota)} {contagem}")
+
+
+def _contador(linhas, nome, ajuda, valores):
+    """valores: [(labels, valor)]"""
+    linhas.append(f"# HELP {nome} {ajuda}")
+    linhas.append(f"# TYPE {nome} counter")
+    for labels, valor in valores:
+        linhas.append(f"{nome}{_labels(**labels)} {valor}")
+
+
+def prometheus():
+    with _lock:
+        rotas = {
+            rota: {
+                'requisicoes': r.requisicoes, 'duracao_total': r.duracao_total,
+                'consultas_total': r.consultas_total, 'db_segundos_total': r.db_segundos_total,
+                'bytes_total': r.bytes_total, 'respostas_medidas': r.respostas_medidas, 'repetidas_total': r.repetidas_total,
+                'orcamento_excedido': r.orcamento_excedido,
+                'duracao': list(r.duracao), 'consultas': list(r.consultas),
+                'db_segundos': list(r.db_segundos), 'bytes': list(r.bytes),
+                'padroes': r.padroes.most_common(PADROES_POR_ROTA),
+            }
+            for rota, r in sorted(_rotas.items())
+        }
+
+    linhas = []
+    _resumo(linhas, 'sge_http_duracao_segundos', 'Duração da requisição',
+            {rota: (r['duracao'], r['duracao_total'], r['requisicoes']) for rota, r in rotas.items()})
+    _resumo(linhas, 'sge_db_consultas', 'Consultas SQL por requisição',
+            {rota: (r['consultas'], r['consultas_total'], r['requisicoes']) for rota, r in rotas.items()})
+    _resumo(linhas, 'sge_db_segundos', 'Tempo no banco por requisição',
+            {rota: (r['db_segundos'], r['db_segundos_total'], r['requisicoes']) for rota, r in rotas.items()})
+    _resumo(linhas, 'sge_http_resposta_bytes', 'Tamanho da resposta (exceto streaming)',
+            {rota: (r['bytes'], r['bytes_total'], r['respostas_medidas']) for rota, r in rotas.items()})
+    _contador(linhas, 'sge_db_consultas_repetidas_total', 'Execuções repetidas do mesmo SQL na mesma requisição (N+1)',
+              [({'rota': rota}, r['repetidas_total']) for rota, r in rotas.items()])
+    _contador(linhas, 'sge_db_padrao_repetido_total', 'Requisições em que o SQL se repetiu',
+              [({'rota': rota, 'sql': sql[:200]}, n) for rota, r in rotas.items() for sql, n in r['padroes']])
+    _contador(linhas, 'sge_db_orcamento_excedido_total', 'Requisições acima do orçamento de consultas',
+              [({'rota': rota}, r['orcamento_excedido']) for rota, r in rotas.items()])
+    _contador(linhas, 'sge_cache_http_total', 'Cache HTTP dos dados de referência (todos os processos)',
+              [({'rota': m['rota'], 'evento': evento}, m[evento]) for m in cache_http.metricas() for evento in cache_http.EVENTOS])
+    return '\n'.join(linhas) + '\n'
+
+
+router = Router()
+
+@router.get("")
+def metricas_prometheus(request):
+    return HttpResponse(prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class MetricaCacheOut(Schema):
+    rota: str
+    models: List[str]
+    hit: int
+    miss: int
+    nao_modificado: int
+    taxa_acerto: float | None
+
+@router.get("/cache", response=List[MetricaCacheOut])
+def metricas_cache(request):
+    return cache_http.metricas()
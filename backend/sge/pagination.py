@@ -0,0 +1,151 @@
+"""
+Paginação por chave (keyset/cursor) para os endpoints de listagem.
+
+Uso:
+    @router.get("/coisas", response=List[CoisaOut])
+    @paginate(KeysetPagination)
+    def listar_coisas(request):
+        return Coisa.objects.order_by('-data', '-id')
+
+A view devolve um queryset JÁ ORDENADO, com a última coluna única (em geral
+'id'). O cursor guarda os valores dessas colunas no último item da página e a
+próxima página começa logo depois deles com um WHERE, sem OFFSET: a página
+1000 custa o mesmo que a primeira, desde que haja índice nas colunas da ordem.
+As colunas de ordenação não podem ser nulas.
+
+Caminho rápido, para listagens grandes:
+    @router.get("/coisas", response=pagina(CoisaOut))
+    @paginate_valores
+    def listar_coisas(request):
+        return Coisa.objects.values('id', 'data', dono_nome=F('dono__nome')).order_by('-data', 'id')
+
+A view devolve um queryset .values() cujas chaves já são os campos do schema
+(e incluem as colunas da ordenação). As linhas vão do cursor direto para o
+orjson: sem instanciar models, sem resolvers e sem validação do Pydantic na
+saída. O schema em pagina() serve só para a documentação OpenAPI.
+"""
+import base64
+import json
+from functools import wraps
+from typing import Any, List
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import HttpResponse
+from ninja import Field, Query, Schema
+from ninja.errors import HttpError
+from ninja.pagination import PaginationBase
+from ninja.utils import contribute_operation_args
+from pydantic import create_model
+
+from .renderers import dumps
+
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+
+def _codificar(valores):
+    bruto = json.dumps(valores, cls=DjangoJSONEncoder, separators=(',', ':'))
+    return base64.urlsafe_b64encode(bruto.encode()).decode().rstrip('=')
+
+
+def _decodificar(cursor, tamanho):
+    try:
+        bruto = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        valores = json.loads(bruto)
+    except ValueError:
+        raise HttpError(400, "Cursor inválido.")
+    if not isinstance(valores, list) or len(valores) != tamanho:
+        raise HttpError(400, "Cursor inválido.")
+    return valores
+
+
+def _valor(obj, campo):
+    if isinstance(obj, dict): # linha de .values()
+        return obj[campo]
+    for parte in campo.split('__'):
+        obj = getattr(obj, parte)
+    return obj
+
+
+def filtro_apos(ordenacao, valores):
+    """
+    WHERE para "depois de `valores`" na ordem `ordenacao`, ex.: ('-data', 'id'):
+        data <= v0 AND (data < v0 OR (data = v0 AND id > v1))
+    O primeiro termo é redundante, mas deixa o banco começar a varredura do
+    índice direto no ponto do cursor.
+    """
+    campos = [c.lstrip('-') for c in ordenacao]
+    lookups = ['lt' if c.startswith('-') else 'gt' for c in ordenacao]
+
+    condicao = Q()
+    for i in range(len(campos)):
+        termo = Q(**{f"{campos[i]}__{lookups[i]}": valores[i]})
+        for j in range(i):
+            termo &= Q(**{campos[j]: valores[j]})
+        condicao |= termo
+
+    if len(campos) == 1:
+        return condicao
+    limite_inicial = Q(**{f"{campos[0]}__{lookups[0][0]}te": valores[0]})
+    return limite_inicial & condicao
+
+
+class KeysetPagination(PaginationBase):
+    class Input(Schema):
+        cursor: str | None = None
+        limite: int = Field(LIMITE_PADRAO, ge=1, le=LIMITE_MAXIMO)
+
+    class Output(Schema):
+        items: List[Any]
+        proximo: str | None = None # cursor da próxima página; None na última
+
+    def paginate_queryset(self, queryset, pagination, **params):
+        return paginar(queryset, pagination.cursor, pagination.limite)
+
+
+def paginar(queryset, cursor, limite):
+    ordenacao = tuple(queryset.query.order_by)
+    if not ordenacao:
+        raise ValueError("KeysetPagination exige um queryset com order_by().")
+
+    if cursor:
+        valores = _decodificar(cursor, len(ordenacao))
+        try:
+            # Os campos convertem os valores já aqui: tipo errado ("x" num id,
+            # null, objeto) é erro do cliente, não 500
+            queryset = queryset.filter(filtro_apos(ordenacao, valores))
+        except (ValueError, TypeError, ValidationError):
+            raise HttpError(400, "Cursor inválido.")
+
+    itens = list(queryset[:limite + 1])
+    proximo = None
+    if len(itens) > limite:
+        itens = itens[:limite]
+        ultimo = itens[-1]
+        proximo = _codificar([_valor(ultimo, c.lstrip('-')) for c in ordenacao])
+
+    return {"items": itens, "proximo": proximo}
+
+
+def pagina(schema):
+    """Schema da resposta de @paginate_valores (documentação)."""
+    return create_model(
+        f"Pagina{schema.__name__}",
+        __base__=Schema,
+        items=(List[schema], ...),
+        proximo=(str | None, None),
+    )
+
+
+def paginate_valores(view):
+    @wraps(view)
+    def wrapper(request, **kwargs):
+        pagination = kwargs.pop('ninja_pagination', None) or KeysetPagination.Input()
+        resultado = paginar(view(request, **kwargs), pagination.cursor, pagination.limite)
+        return HttpResponse(dumps(resultado), content_type='application/json; charset=utf-8')
+
+    # Mesmos parâmetros de query (cursor, limite) que o @paginate(KeysetPagination)
+    contribute_operation_args(wrapper, "ninja_pagination", KeysetPagination.Input, Query(...))
+    return wrapper
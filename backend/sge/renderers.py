@@ -0,0 +1,26 @@
+"""
+Serialização JSON das respostas da API com orjson.
+
+O orjson serializa dict/list/str/int/float/datetime/date/UUID em C, várias
+vezes mais rápido que o json da stdlib usado pelo JSONRenderer padrão do
+ninja. Tipos que ele não conhece (Decimal, ...) caem no encoder do ninja, para
+a saída continuar igual (Decimal vira string, como antes).
+"""
+import orjson
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+_encoder = NinjaJSONEncoder()
+
+OPCOES = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+
+def dumps(dados):
+    return orjson.dumps(dados, default=_encoder.default, option=OPCOES)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+
+    def render(self, request, data, *, response_status):
+        return dumps(data)
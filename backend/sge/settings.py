@@ -1,6 +1,7 @@
 import os
 from pathlib import Path
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -40,9 +41,11 @@ INSTALLED_APPS = [
     'nutrition',
     'hr',
     'finance',
+    'jobs',
 ]
 
 MIDDLEWARE = [
+    'sge.metricas.MetricasMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -51,6 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'sge.db_router.FixarPrimarioMiddleware',
 ]
 
 ROOT_URLCONF = 'sge.urls'
@@ -74,6 +78,11 @@ TEMPLATES = [
 WSGI_APPLICATION = 'sge.wsgi.application'
 
 # Database
+# Conexões persistentes (CONN_MAX_AGE) com verificação antes de reusar
+# (CONN_HEALTH_CHECKS): cada worker mantém sua conexão em vez de abrir uma
+# por requisição, e uma conexão derrubada pelo servidor é trocada sem erro.
+DB_CONN_MAX_AGE = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -82,9 +91,71 @@ DATABASES = {
         'PASSWORD': os.environ.get('DB_PASSWORD', 'password'),
         'HOST': os.environ.get('DB_HOST', 'localhost'),
         'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Réplica de leitura opcional para relatórios, dashboard e portal (sge/db_router.py).
+# Para testar localmente basta apontar DB_REPLICA_HOST para o mesmo servidor.
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': os.environ.get('DB_REPLICA_NAME', DATABASES['default']['NAME']),
+        'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+        'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['sge.db_router.ReplicaRouter']
+# Depois de uma escrita, o cliente lê do primário por este tempo (read-your-writes)
+DB_REPLICA_FIXAR_SEGUNDOS = int(os.environ.get('DB_REPLICA_FIXAR_SEGUNDOS', 10))
+
+# Cache
+# 'default' é compartilhado entre os processos (workers do servidor e rodar_jobs),
+# para que uma invalidação feita em um valha para todos (ex.: portal do aluno).
+# Fica no Redis (REDIS_URL): recebe as chaves de alta rotatividade (fixação no
+# primário a cada escrita, /portal/me por aluno, contadores do cache HTTP), com
+# add/incr atômicos e sem a varredura do diretório que o FileBasedCache faz a
+# cada set. Sem REDIS_URL (desenvolvimento com um processo só) cai para a
+# memória do processo.
+# 'http' guarda as respostas JSON dos endpoints de dados de referência (sge/cache_http.py)
+# 'versoes' guarda as versões que invalidam caches de outros processos (cache
+# HTTP, zoneamento): precisa ser visto por todos mesmo sem Redis, então sem
+# REDIS_URL fica em disco. São poucas chaves, lidas a cada requisição e
+# escritas só quando o dado muda; nunca expiram.
+CACHE_DIR = Path(os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'var' / 'cache'))
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'TIMEOUT': 60 * 10,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'TIMEOUT': 60 * 10,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'http': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR / 'http',
+        'TIMEOUT': 60 * 60 * 24,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+    'versoes': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+        'TIMEOUT': None,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': CACHE_DIR / 'versoes',
+        'TIMEOUT': None,
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -119,3 +190,30 @@ AUTH_USER_MODEL = 'accounts.User'
 
 # CORS
 CORS_ALLOW_ALL_ORIGINS = True # For development only
+# X-Cliente-Id: fixação no primário por navegador (sge/db_router.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'x-cliente-id')
+
+# Boletins em lote: processos do pool de renderização de PDF (WeasyPrint)
+BOLETIM_WORKERS = int(os.environ.get('BOLETIM_WORKERS', os.cpu_count() or 1))
+BOLETIM_WORKERS_MAX = int(os.environ.get('BOLETIM_WORKERS_MAX', 8))
+# PDFs já renderizados, um arquivo por digest do conteúdo (reports/boletim.py);
+# manage.py limpar_boletins apaga os não lidos há BOLETINS_DIAS
+BOLETINS_DIR = Path(os.environ.get('BOLETINS_DIR', CACHE_DIR / 'boletins-pdf'))
+BOLETINS_DIAS = int(os.environ.get('BOLETINS_DIAS', 30))
+
+# Jobs em segundo plano (manage.py rodar_jobs): arquivos gerados ficam em disco
+# local, um diretório por job. Enquanto a tarefa roda, o worker renova
+# Job.batimento_em a cada JOBS_BATIMENTO segundos; um job em EXECUTANDO sem
+# batimento há JOBS_TIMEOUT segundos é considerado abandonado (worker morto) e
+# volta para a fila. Jobs lentos, mas vivos, nunca são tomados.
+JOBS_DIR = Path(os.environ.get('JOBS_DIR', BASE_DIR / 'var' / 'jobs'))
+JOBS_BATIMENTO = int(os.environ.get('JOBS_BATIMENTO', 30))
+JOBS_TIMEOUT = int(os.environ.get('JOBS_TIMEOUT', 60 * 5))
+JOBS_TENTATIVAS = int(os.environ.get('JOBS_TENTATIVAS', 3))
+
+# Instrumentação de SQL por rota (sge/metricas.py, exposta em /api/_metrics).
+# SQL_ORCAMENTO: consultas por requisição acima das quais a rota é apontada no
+# log (a view pode declarar o seu com orcamento_sql). SQL_ESTRITO: estourar o
+# orçamento levanta OrcamentoExcedido (use nos testes).
+SQL_ORCAMENTO = int(os.environ.get('SQL_ORCAMENTO', 30))
+SQL_ESTRITO = os.environ.get('SQL_ESTRITO', 'False') == 'True'
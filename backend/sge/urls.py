@@ -1,8 +1,9 @@
 from django.contrib import admin
 from django.urls import path
 from ninja import NinjaAPI
+from sge.renderers import ORJSONRenderer
 
-api = NinjaAPI()
+api = NinjaAPI(renderer=ORJSONRenderer())
 
 from academic.api import router as academic_router
 from people.api import router as people_router
@@ -11,6 +12,7 @@ from reports.api import router as reports_router
 from pedagogical.api import router as pedagogical_router
 
 
+api.add_router("/academic", academic_router)
 api.add_router("/people", people_router)
 api.add_router("/diary", diary_router)
 api.add_router("/reports", reports_router)
@@ -29,6 +31,12 @@ api.add_router("/nutrition", nutrition_router)
 api.add_router("/hr", hr_router)
 api.add_router("/finance", finance_router)
 
+from jobs.api import router as jobs_router
+api.add_router("/jobs", jobs_router)
+
+from sge.metricas import router as metricas_router
+api.add_router("/_metrics", metricas_router)
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', api.urls),
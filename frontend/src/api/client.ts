@@ -1,5 +1,37 @@
 import axios from 'axios';
 
+// Identifica este navegador para o backend: depois de uma escrita, as leituras
+// dele vão ao banco primário por alguns segundos (sge/db_router.py). Sem o
+// cabeçalho o backend cai para o IP, que junta toda a escola atrás do mesmo NAT.
+function clienteId(): string {
+  const chave = 'sge:cliente-id';
+  let id = localStorage.getItem(chave);
+  if (!id) {
+    // randomUUID só existe em contexto seguro (https ou localhost)
+    id = crypto.randomUUID?.() ?? `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+    localStorage.setItem(chave, id);
+  }
+  return id;
+}
+
 export const api = axios.create({
   baseURL: 'http://localhost:8000/api',
+  headers: { 'X-Cliente-Id': clienteId() },
 });
+
+// Resposta dos endpoints de listagem paginados (cursor em `proximo`)
+export interface Pagina<T> {
+  items: T[];
+  proximo: string | null;
+}
+
+// Opções de useInfiniteQuery para uma listagem paginada: começa sem cursor e
+// segue `proximo` a cada fetchNextPage (hasNextPage fica falso na última página)
+export function paginado<T>(url: string, params: Record<string, unknown> = {}) {
+  return {
+    queryFn: async ({ pageParam }: { pageParam: string | null }) =>
+      (await api.get<Pagina<T>>(url, { params: { ...params, cursor: pageParam ?? undefined } })).data,
+    initialPageParam: null as string | null,
+    getNextPageParam: (ultima: Pagina<T>) => ultima.proximo,
+  };
+}
@@ -1,6 +1,6 @@
 import { Title, Select, Button, Table, Checkbox, Group, Paper } from '@mantine/core';
 import { useState } from 'react';
-import { useQuery } from '@tanstack/react-query';
+import { useQuery, useMutation } from '@tanstack/react-query';
 import { api } from '../api/client';
 import { notifications } from '@mantine/notifications';
 
@@ -17,6 +17,14 @@ interface AlunoMatricula {
     nome: string;
 }
 
+// AAAA-MM-DD do dia local: toISOString() daria a data em UTC, que depois das
+// 21h (horário de Brasília) já é o dia seguinte
+function hojeLocal(): string {
+    const d = new Date();
+    const doisDigitos = (n: number) => String(n).padStart(2, '0');
+    return `${d.getFullYear()}-${doisDigitos(d.getMonth() + 1)}-${doisDigitos(d.getDate())}`;
+}
+
 export default function Diary() {
     const [turmaId, setTurmaId] = useState<string | null>(null);
     const [presencas, setPresencas] = useState<Record<number, boolean>>({});
@@ -47,15 +55,23 @@ export default function Diary() {
         setPresencas(prev => ({ ...prev, [matriculaId]: checked }));
     };
 
-    const handleSubmit = () => {
-        // Here we would call API to save attendance
-        console.log("Saving attendance:", { turmaId, presencas });
-        notifications.show({
-            title: 'Sucesso',
-            message: 'Chamada realizada com sucesso (Simulação)',
-            color: 'green'
-        });
-    };
+    const saveMutation = useMutation({
+        mutationFn: async () => api.post('/diary/chamadas', {
+            turma_id: Number(turmaId),
+            data: hojeLocal(),
+            presencas: Object.entries(presencas).map(([matricula_id, presente]) => ({
+                matricula_id: Number(matricula_id),
+                presente
+            }))
+        }),
+        onSuccess: () => {
+            notifications.show({
+                title: 'Sucesso',
+                message: 'Chamada realizada com sucesso',
+                color: 'green'
+            });
+        }
+    });
 
     return (
         <>
@@ -98,7 +114,7 @@ export default function Diary() {
                     </Table>
 
                     <Group justify="flex-end" mt="md">
-                        <Button onClick={handleSubmit} loading={isFetching}>Salvar Chamada</Button>
+                        <Button onClick={() => saveMutation.mutate()} loading={isFetching || saveMutation.isPending}>Salvar Chamada</Button>
                     </Group>
                 </>
             )}
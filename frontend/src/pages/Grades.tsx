@@ -93,6 +93,10 @@ export default function Grades() {
             queryClient.invalidateQueries({ queryKey: ['avaliacoes'] });
             close();
             notifications.show({ title: 'Sucesso', message: 'Avaliação criada!', color: 'green' });
+        },
+        onError: (error: any) => {
+            // 400 quando nenhuma etapa do ano letivo contém a data
+            notifications.show({ title: 'Erro', message: error.response?.data?.message ?? 'Não foi possível criar a avaliação.', color: 'red' });
         }
     });
 
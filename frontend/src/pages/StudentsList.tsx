@@ -1,6 +1,6 @@
-import { ActionIcon, Table, Title, Tooltip } from '@mantine/core';
-import { useQuery } from '@tanstack/react-query';
-import { api } from '../api/client';
+import { ActionIcon, Button, Group, Table, Title, Tooltip } from '@mantine/core';
+import { useInfiniteQuery } from '@tanstack/react-query';
+import { paginado } from '../api/client';
 import { IconFileTypePdf } from '@tabler/icons-react';
 
 interface Student {
@@ -14,10 +14,11 @@ interface Student {
 // Vamos assumir que sim por enquanto.
 
 export default function StudentsList() {
-    const { data: students, isLoading } = useQuery({
+    const { data, isLoading, hasNextPage, fetchNextPage, isFetchingNextPage } = useInfiniteQuery({
         queryKey: ['students'],
-        queryFn: async () => (await api.get<Student[]>('/people/alunos')).data
+        ...paginado<Student>('/people/alunos', { limite: 200 })
     });
+    const students = data?.pages.flatMap((pagina) => pagina.items);
 
     const handlePrintBoletim = (studentId: number) => {
         // studentId aqui deve ser o ID do Aluno na tabela Pessoa/Aluno, 
@@ -56,6 +57,13 @@ export default function StudentsList() {
                     ))}
                 </Table.Tbody>
             </Table>
+            {hasNextPage && (
+                <Group justify="center" mt="md">
+                    <Button variant="light" onClick={() => fetchNextPage()} loading={isFetchingNextPage}>
+                        Carregar mais
+                    </Button>
+                </Group>
+            )}
         </>
     );
 }
@@ -8,11 +8,16 @@ interface Turma {
     nome: string;
 }
 
+// total sobre maximo (escala do critério do ano letivo); null = sem nota
 interface NotaDisciplina {
     disciplina: string;
-    total: number;
+    total: number | null;
+    maximo: number | null;
 }
 
+// Abaixo de 60% do máximo, como no ranking de risco
+const CORTE_NOTA = 0.6;
+
 interface AlunoConselho {
     aluno_nome: string;
     notas: NotaDisciplina[];
@@ -69,12 +74,16 @@ export default function Council() {
                                     <Table.Td>{aluno.aluno_nome}</Table.Td>
                                     {aluno.notas.map(nota => (
                                         <Table.Td key={nota.disciplina} style={{ textAlign: 'center' }}>
-                                            <Text
-                                                fw={500}
-                                                c={nota.total < 60 ? 'red' : 'dark'}
-                                            >
-                                                {nota.total.toFixed(1)}
-                                            </Text>
+                                            {nota.total === null ? (
+                                                <Text c="dimmed">-</Text>
+                                            ) : (
+                                                <Text
+                                                    fw={500}
+                                                    c={nota.maximo !== null && nota.total < CORTE_NOTA * nota.maximo ? 'red' : 'dark'}
+                                                >
+                                                    {nota.total.toFixed(1)}
+                                                </Text>
+                                            )}
                                         </Table.Td>
                                     ))}
                                 </Table.Tr>
@@ -1,9 +1,10 @@
 import { ActionIcon, Button, Group, Modal, Select, Table, Title, Text, Badge } from '@mantine/core';
 import { useForm } from '@mantine/form';
-import { useDisclosure } from '@mantine/hooks';
-import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
+import { useDebouncedValue, useDisclosure } from '@mantine/hooks';
+import { useInfiniteQuery, useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
 import { IconTrash, IconUserPlus, IconCheck } from '@tabler/icons-react';
-import { api } from '../../api/client';
+import { useState } from 'react';
+import { api, paginado } from '../../api/client';
 import { notifications } from '@mantine/notifications';
 
 interface ItemFila {
@@ -15,11 +16,15 @@ interface ItemFila {
     status: string;
 }
 
-interface Aluno {
-    id: number;
+// Resultado de /people/busca (somente_alunos); o seletor usa aluno_id
+interface AlunoBusca {
+    aluno_id: number;
     nome: string;
+    data_nascimento: string;
 }
 
+const BUSCA_MINIMO = 3; // people/busca.py TAMANHO_MINIMO
+
 interface Escola {
     id: number;
     nome: string;
@@ -39,15 +44,32 @@ export default function Queue() {
         },
     });
 
-    const { data: fila } = useQuery({
+    const { data: paginasFila, hasNextPage, fetchNextPage, isFetchingNextPage } = useInfiniteQuery({
         queryKey: ['fila'],
-        queryFn: async () => (await api.get<ItemFila[]>('/academic/fila')).data
+        ...paginado<ItemFila>('/academic/fila', { limite: 100 })
     });
+    const fila = paginasFila?.pages.flatMap((pagina) => pagina.items);
 
-    const { data: alunos } = useQuery({
-        queryKey: ['alunos'],
-        queryFn: async () => (await api.get<Aluno[]>('/people/alunos')).data
+    // A rede tem alunos demais para uma lista só: o seletor busca no servidor
+    // enquanto se digita. O aluno escolhido continua nas opções mesmo quando
+    // a busca seguinte não o traz.
+    const [buscaAluno, setBuscaAluno] = useState('');
+    const [termo] = useDebouncedValue(buscaAluno.trim(), 300);
+    const [alunoEscolhido, setAlunoEscolhido] = useState<{ value: string; label: string } | null>(null);
+    const { data: alunosEncontrados } = useQuery({
+        queryKey: ['busca-alunos', termo],
+        queryFn: async () => (await api.get<AlunoBusca[]>('/people/busca', {
+            params: { q: termo, somente_alunos: true, limite: 20 }
+        })).data,
+        enabled: termo.length >= BUSCA_MINIMO
     });
+    const opcoesAluno = (alunosEncontrados ?? []).map((a) => ({
+        value: String(a.aluno_id),
+        label: `${a.nome} (${new Date(`${a.data_nascimento}T00:00`).toLocaleDateString()})`
+    }));
+    if (alunoEscolhido && !opcoesAluno.some((o) => o.value === alunoEscolhido.value)) {
+        opcoesAluno.unshift(alunoEscolhido);
+    }
 
     const { data: escolas } = useQuery({
         queryKey: ['escolas'],
@@ -65,6 +87,7 @@ export default function Queue() {
             queryClient.invalidateQueries({ queryKey: ['fila'] });
             close();
             form.reset();
+            setAlunoEscolhido(null);
             notifications.show({ title: 'Sucesso', message: 'Aluno adicionado à fila!', color: 'green' });
         }
     });
@@ -115,17 +138,32 @@ export default function Queue() {
                     ))}
                 </Table.Tbody>
             </Table>
+            {hasNextPage && (
+                <Group justify="center" mt="md">
+                    <Button variant="light" onClick={() => fetchNextPage()} loading={isFetchingNextPage}>
+                        Carregar mais
+                    </Button>
+                </Group>
+            )}
 
             <Modal opened={opened} onClose={close} title="Solicitar Vaga">
                 <form onSubmit={form.onSubmit((values) => mutation.mutate(values))}>
                     <Select
                         label="Aluno"
-                        placeholder="Selecione o aluno"
-                        data={alunos?.map(a => ({ value: String(a.id), label: a.nome })) || []}
+                        placeholder="Digite o nome, CPF ou NIS"
+                        data={opcoesAluno}
                         withAsterisk
                         searchable
+                        searchValue={buscaAluno}
+                        onSearchChange={setBuscaAluno}
+                        filter={({ options }) => options}
+                        nothingFoundMessage={termo.length >= BUSCA_MINIMO ? 'Nenhum aluno encontrado' : `Digite ao menos ${BUSCA_MINIMO} caracteres`}
                         mb="md"
                         {...form.getInputProps('aluno_id')}
+                        onChange={(value, opcao) => {
+                            form.setFieldValue('aluno_id', value ?? '');
+                            setAlunoEscolhido(value ? opcao : null);
+                        }}
                     />
 
                     <Select